@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import AccountType, Currency, Category, Account, Goal, Transaction
+from .models import AccountType, Currency, Category, Account, Goal, Transaction, DailyLedger, AccountEntry, \
+    BalanceSnapshot, CategoryRule, Receipt, ReceiptItem
 
 
 @admin.register(AccountType)
@@ -55,6 +56,57 @@ class TransactionAdmin(admin.ModelAdmin):
     verbose_name_plural = "Транзакции"
 
 
+@admin.register(DailyLedger)
+class DailyLedgerAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'category', 'type', 'total', 'count')
+    search_fields = ('user__username', 'category__name')
+    list_filter = ('type', 'date')
+    verbose_name = "Дневной итог"
+    verbose_name_plural = "Дневные итоги"
+
+
+@admin.register(AccountEntry)
+class AccountEntryAdmin(admin.ModelAdmin):
+    list_display = ('account', 'kind', 'date', 'amount', 'transaction', 'transfer_id', 'created_at')
+    search_fields = ('account__name', 'account__user__username')
+    list_filter = ('kind', 'date')
+    verbose_name = "Проводка"
+    verbose_name_plural = "Проводки"
+
+
+@admin.register(BalanceSnapshot)
+class BalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('account', 'date', 'balance', 'last_entry_id', 'created_at')
+    search_fields = ('account__name', 'account__user__username')
+    list_filter = ('date',)
+    verbose_name = "Снимок баланса"
+    verbose_name_plural = "Снимки балансов"
+
+
+@admin.register(CategoryRule)
+class CategoryRuleAdmin(admin.ModelAdmin):
+    list_display = ('pattern', 'category', 'user', 'priority')
+    search_fields = ('pattern', 'category__name', 'user__username')
+    verbose_name = "Правило категории"
+    verbose_name_plural = "Правила категорий"
+
+
+@admin.register(Receipt)
+class ReceiptAdmin(admin.ModelAdmin):
+    list_display = ('qrraw', 'fn', 'i', 'fp', 'created_at')
+    search_fields = ('qrraw', 'fn')
+    verbose_name = "Чек"
+    verbose_name_plural = "Чеки"
+
+
+@admin.register(ReceiptItem)
+class ReceiptItemAdmin(admin.ModelAdmin):
+    list_display = ('name', 'transaction', 'price', 'quantity', 'sum')
+    search_fields = ('name', 'transaction__user__username')
+    verbose_name = "Позиция чека"
+    verbose_name_plural = "Позиции чеков"
+
+
 admin.site.site_header = "FinMaster Админка"
 admin.site.site_title = "Админ-портал FinMaster"
 admin.site.index_title = "Добро пожаловать в админ-портал FinMaster"
@@ -0,0 +1,164 @@
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import DailyLedger, ReceiptItem, Transaction
+
+# Соответствие типа категории и ключа в итоговой сводке
+TYPE_KEYS = {
+    'I': 'incomes',
+    'E': 'expenses',
+    'T': 'transfers',
+}
+
+
+def summarize_transactions(user, start_date=None, end_date=None):
+    """
+    Сводка по непостоянным транзакциям пользователя за период одним запросом к DailyLedger.
+
+    Строки дневных итогов уже сгруппированы по (дата, категория, тип), поэтому
+    стоимость зависит от числа дней в периоде, а не от числа транзакций или
+    категорий. Итоги по датам и по категориям собираются из одного результата.
+
+    :return: словарь с ключами 'incomes', 'expenses', 'transfers' (списки
+        {'date': 'YYYY-MM-DD', 'amount': float} по возрастанию даты) и
+        'categories' (список {'name', 'total', 'color'})
+    """
+    filter_kwargs = {
+        'user': user,
+    }
+    if start_date:
+        filter_kwargs['date__gte'] = start_date
+    if end_date:
+        filter_kwargs['date__lte'] = end_date
+
+    rows = DailyLedger.objects.filter(**filter_kwargs) \
+        .values('date', 'type', 'total', 'category_id', 'category__name', 'category__color') \
+        .order_by('date', 'category_id')
+
+    per_date = {key: {} for key in TYPE_KEYS.values()}
+    categories = {}
+
+    for row in rows:
+        key = TYPE_KEYS[row['type']]
+        date_str = row['date'].strftime('%Y-%m-%d')
+        per_date[key][date_str] = per_date[key].get(date_str, 0) + row['total']
+
+        category = categories.setdefault(row['category_id'], {
+            'name': row['category__name'],
+            'total': 0,
+            'color': row['category__color'],
+        })
+        category['total'] += row['total']
+
+    summary = {
+        key: [{'date': date_str, 'amount': float(amount)} for date_str, amount in totals.items()]
+        for key, totals in per_date.items()
+    }
+    summary['categories'] = [
+        {'name': category['name'], 'total': float(category['total']), 'color': category['color']}
+        for category in categories.values()
+    ]
+    return summary
+
+
+def summarize_tags(user, start_date=None, end_date=None):
+    """
+    Итоги по тегам за период одним сгруппированным запросом через промежуточную
+    таблицу taggit: (тег, тип категории, месяц) -> сумма и количество.
+    Итоги по тегу и помесячная динамика собираются из одного результата.
+
+    :return: список {'name', 'incomes', 'expenses', 'transfers', 'count', 'trend'}
+        по убыванию числа транзакций; trend - список {'month': 'YYYY-MM',
+        'incomes', 'expenses', 'transfers', 'count'} по возрастанию месяца
+    """
+    filter_kwargs = {
+        'user': user,
+        'permanent': False,
+        'tags__isnull': False,
+    }
+    if start_date:
+        filter_kwargs['date__gte'] = start_date
+    if end_date:
+        filter_kwargs['date__lte'] = end_date
+
+    rows = Transaction.objects.filter(**filter_kwargs) \
+        .annotate(month=TruncMonth('date')) \
+        .values('tags__name', 'category__type', 'month') \
+        .annotate(total=Sum('amount'), count=Count('id')) \
+        .order_by('tags__name', 'month')
+
+    def empty():
+        return {**{key: 0.0 for key in TYPE_KEYS.values()}, 'count': 0}
+
+    tags = {}
+    for row in rows:
+        tag = tags.setdefault(row['tags__name'], {'name': row['tags__name'], **empty(), 'trend': {}})
+        month = tag['trend'].setdefault(row['month'].strftime('%Y-%m'), empty())
+        key = TYPE_KEYS[row['category__type']]
+        for totals in (tag, month):
+            totals[key] += float(row['total'])
+            totals['count'] += row['count']
+
+    result = []
+    for tag in tags.values():
+        tag['trend'] = [{'month': month, **totals} for month, totals in tag['trend'].items()]
+        result.append(tag)
+    return sorted(result, key=lambda tag: -tag['count'])
+
+
+def _receipt_items(user, start_date=None, end_date=None):
+    filter_kwargs = {
+        'transaction__user': user,
+    }
+    if start_date:
+        filter_kwargs['transaction__date__gte'] = start_date
+    if end_date:
+        filter_kwargs['transaction__date__lte'] = end_date
+    return ReceiptItem.objects.filter(**filter_kwargs)
+
+
+def top_products(user, start_date=None, end_date=None, limit=20):
+    """
+    Товары из чеков пользователя за период по убыванию потраченной суммы,
+    одним сгруппированным запросом по позициям чеков
+
+    :return: список {'name', 'total', 'quantity', 'purchases', 'average_price', 'last_date'}
+    """
+    rows = _receipt_items(user, start_date, end_date) \
+        .values('name') \
+        .annotate(total=Sum('sum'), quantity=Sum('quantity'), purchases=Count('id'),
+                  average_price=Avg('price'), last_date=Max('transaction__date')) \
+        .order_by('-total', 'name')[:limit]
+    return [
+        {
+            'name': row['name'],
+            'total': float(row['total']),
+            'quantity': float(row['quantity']),
+            'purchases': row['purchases'],
+            'average_price': round(float(row['average_price']), 2),
+            'last_date': row['last_date'].isoformat(),
+        }
+        for row in rows
+    ]
+
+
+def price_history(user, name, start_date=None, end_date=None):
+    """
+    Цена товара name по датам покупок одним запросом (индекс budget_receiptitem_name)
+
+    :return: список {'date': 'YYYY-MM-DD', 'min_price', 'max_price', 'quantity'} по возрастанию даты
+    """
+    rows = _receipt_items(user, start_date, end_date) \
+        .filter(name=name) \
+        .values('transaction__date') \
+        .annotate(min_price=Min('price'), max_price=Max('price'), quantity=Sum('quantity')) \
+        .order_by('transaction__date')
+    return [
+        {
+            'date': row['transaction__date'].isoformat(),
+            'min_price': float(row['min_price']),
+            'max_price': float(row['max_price']),
+            'quantity': float(row['quantity']),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,164 @@
+import datetime
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max, Q, Sum
+
+from .dashboard import invalidate_dashboard
+from .models import Account, AccountEntry, BalanceSnapshot, Transaction
+
+# Знак проводки по типу категории транзакции; переводы между счетами идут через transfer()
+TYPE_SIGNS = {
+    'I': 1,
+    'E': -1,
+}
+
+# Сколько транзакций читается за один запрос при сверке проводок (ограничение на число параметров)
+SYNC_CHUNK_SIZE = 500
+
+# Цели (account_type_id=1) копят в initial_balance, поле balance у них - стоимость цели
+GOAL_ACCOUNT_TYPE_ID = 1
+
+
+def balance_field(account_type_id):
+    """
+    Поле Account, в котором хранится текущий баланс счёта данного типа
+    """
+    return 'initial_balance' if account_type_id == GOAL_ACCOUNT_TYPE_ID else 'balance'
+
+
+def post_entries(entries, update_balances=True):
+    """
+    Записывает проводки и атомарно (F()) прибавляет к полю баланса счёта суммы
+    проводок с датой не позже сегодняшней. Более поздние проводки попадут в поле
+    при снимке балансов (команда snapshot_balances)
+    """
+    entries = [entry for entry in entries if entry.amount]
+    if not entries:
+        return []
+
+    today = datetime.date.today()
+    with transaction.atomic():
+        AccountEntry.objects.bulk_create(entries)
+        if not update_balances:
+            return entries
+
+        deltas = defaultdict(Decimal)
+        for entry in entries:
+            if AccountEntry._meta.get_field('date').to_python(entry.date) <= today:
+                deltas[entry.account_id] += Decimal(entry.amount)
+
+        account_types = dict(Account.objects.filter(pk__in=deltas).values_list('pk', 'account_type_id'))
+        for account_id, delta in deltas.items():
+            field = balance_field(account_types.get(account_id))
+            Account.objects.filter(pk=account_id).update(**{field: F(field) + delta})
+    return entries
+
+
+def sync_transaction_entries(transaction_ids, deleted=False):
+    """
+    Приводит проводки транзакций к их текущему состоянию: для каждой пары
+    (счёт, дата) записывается разница между нужной суммой и уже проведённой.
+    Так создание, изменение (в том числе смена счёта или даты) и удаление
+    обрабатываются одинаково, а история проводок не переписывается
+
+    :param deleted: транзакции удаляются, все их проводки нужно сторнировать
+    """
+    transaction_ids = [pk for pk in transaction_ids if pk is not None]
+    if not transaction_ids:
+        return []
+
+    desired = defaultdict(Decimal)
+    current = defaultdict(Decimal)
+    for start in range(0, len(transaction_ids), SYNC_CHUNK_SIZE):
+        chunk = transaction_ids[start:start + SYNC_CHUNK_SIZE]
+        if not deleted:
+            rows = Transaction.objects.filter(pk__in=chunk, permanent=False) \
+                .values_list('pk', 'account_id', 'date', 'amount', 'category__type')
+            for pk, account_id, date, amount, category_type in rows:
+                sign = TYPE_SIGNS.get(category_type)
+                if sign:
+                    desired[(pk, account_id, date)] += sign * amount
+
+        posted = AccountEntry.objects.filter(transaction_id__in=chunk) \
+            .values_list('transaction_id', 'account_id', 'date') \
+            .annotate(total=Sum('amount')) \
+            .order_by()
+        for transaction_id, account_id, date, total in posted:
+            current[(transaction_id, account_id, date)] += total
+
+    entries = []
+    for key in desired.keys() | current.keys():
+        transaction_id, account_id, date = key
+        if desired[key] != current[key]:
+            entries.append(AccountEntry(
+                account_id=account_id,
+                transaction_id=transaction_id,
+                kind=AccountEntry.TRANSACTION,
+                date=date,
+                amount=desired[key] - current[key],
+            ))
+    return post_entries(entries)
+
+
+def transfer(from_account, to_account, amount, date=None):
+    """
+    Перевод между счетами парой проводок с общим transfer_id
+    """
+    date = date or datetime.date.today()
+    transfer_id = uuid.uuid4()
+    entries = post_entries([
+        AccountEntry(account=from_account, transfer_id=transfer_id, kind=AccountEntry.TRANSFER,
+                     date=date, amount=-amount),
+        AccountEntry(account=to_account, transfer_id=transfer_id, kind=AccountEntry.TRANSFER,
+                     date=date, amount=amount),
+    ])
+    invalidate_dashboard([from_account.user_id, to_account.user_id])
+    return entries
+
+
+def _sum_entries(account, as_of, upto_entry_id=None):
+    """
+    Баланс на дату as_of: последний снимок не позже as_of плюс хвост проводок,
+    не вошедших в снимок (более новые или с датой после даты снимка)
+    """
+    entries = AccountEntry.objects.filter(account=account, date__lte=as_of)
+    if upto_entry_id is not None:
+        entries = entries.filter(pk__lte=upto_entry_id)
+
+    snapshots = BalanceSnapshot.objects.filter(account=account, date__lte=as_of)
+    if upto_entry_id is not None:
+        snapshots = snapshots.filter(last_entry_id__lte=upto_entry_id)
+    snapshot = snapshots.order_by('-date', '-last_entry_id').first()
+
+    balance = Decimal(0)
+    if snapshot is not None:
+        balance = snapshot.balance
+        entries = entries.filter(Q(pk__gt=snapshot.last_entry_id) | Q(date__gt=snapshot.date))
+    return balance + (entries.aggregate(total=Sum('amount'))['total'] or 0)
+
+
+def get_balance(account, as_of=None):
+    return _sum_entries(account, as_of or datetime.date.today())
+
+
+def take_snapshot(account, date=None):
+    """
+    Сохраняет снимок баланса и записывает его в поле баланса счёта
+    (туда же попадают наступившие к этой дате проводки будущих транзакций)
+    """
+    date = date or datetime.date.today()
+    with transaction.atomic():
+        # Блокировка строки счёта: параллельные F()-обновления применятся после записи снимка
+        account = Account.objects.select_for_update().get(pk=account.pk)
+        last_entry_id = AccountEntry.objects.filter(account=account).aggregate(last=Max('pk'))['last'] or 0
+        balance = _sum_entries(account, date, last_entry_id)
+        snapshot = BalanceSnapshot.objects.create(
+            account=account, date=date, last_entry_id=last_entry_id, balance=balance,
+        )
+        if date == datetime.date.today():
+            Account.objects.filter(pk=account.pk).update(**{balance_field(account.account_type_id): balance})
+    invalidate_dashboard([account.user_id])
+    return snapshot
@@ -0,0 +1,169 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from .cache import LRUCache
+from .ledger import bump_versions, get_version
+from .models import ClassifierVersion, Transaction
+
+# Длины символьных n-грамм описания
+NGRAM_SIZES = (2, 3, 4)
+# Сглаживание Лапласа
+SMOOTHING = 0.5
+# Сколько последних транзакций берётся при первом обучении и сколько символов описания учитывается
+CLASSIFIER_MAX_ROWS = getattr(settings, 'CLASSIFIER_MAX_ROWS', 5000)
+CLASSIFIER_MAX_LENGTH = getattr(settings, 'CLASSIFIER_MAX_LENGTH', 200)
+
+NON_WORD = re.compile(r'[\W\d_]+')
+
+
+def ngrams(description):
+    """
+    Символьные n-граммы описания: слова в нижнем регистре, цифры и знаки
+    отброшены, границы слов отмечены пробелами ('молоко' -> ' м', ' мо', ...)
+    """
+    text = ' ' + NON_WORD.sub(' ', description[:CLASSIFIER_MAX_LENGTH].lower()).strip() + ' '
+    features = Counter()
+    if len(text) <= 2:
+        return features
+    for size in NGRAM_SIZES:
+        for start in range(len(text) - size + 1):
+            gram = text[start:start + size]
+            if gram.strip():
+                features[gram] += 1
+    return features
+
+
+class CategoryClassifier:
+    """
+    Мультиномиальный наивный байесовский классификатор категорий по символьным
+    n-граммам описания. Обучается на транзакциях одного пользователя
+    и дообучается по одной транзакции без пересчёта остальных.
+    version - ClassifierVersion пользователя на момент обучения
+    """
+
+    def __init__(self, version=0):
+        self.version = version
+        self.documents = Counter()
+        self.totals = Counter()
+        self.counts = defaultdict(Counter)
+        self.vocabulary = Counter()
+        self.types = {}
+        self.last_pk = 0
+        self._lock = threading.Lock()
+
+    @property
+    def trained(self):
+        return bool(self.documents)
+
+    def learn(self, description, category_id, category_type):
+        features = ngrams(description)
+        if not features:
+            return
+        self.types[category_id] = category_type
+        self.documents[category_id] += 1
+        self.totals[category_id] += sum(features.values())
+        counts = self.counts[category_id]
+        for gram, count in features.items():
+            if not counts[gram]:
+                self.vocabulary[gram] += 1
+            counts[gram] += count
+
+    def scores(self, description, category_type=None):
+        """
+        Логарифмы апостериорных вероятностей категорий (без нормировки) по убыванию.
+        Счётчики читаются под блокировкой: update() в другом потоке меняет их
+        """
+        features = ngrams(description)
+        if not features:
+            return []
+        with self._lock:
+            candidates = [category_id for category_id in self.documents
+                          if category_type is None or self.types[category_id] == category_type]
+            if not candidates:
+                return []
+            documents = sum(self.documents[category_id] for category_id in candidates)
+            vocabulary = len(self.vocabulary) + 1
+            result = []
+            for category_id in candidates:
+                counts = self.counts[category_id]
+                denominator = math.log(self.totals[category_id] + SMOOTHING * vocabulary)
+                score = math.log(self.documents[category_id] / documents)
+                for gram, count in features.items():
+                    score += count * (math.log(counts.get(gram, 0) + SMOOTHING) - denominator)
+                result.append((score, category_id))
+        result.sort(reverse=True)
+        return [(category_id, score) for score, category_id in result]
+
+    def predict(self, description, category_type=None):
+        """
+        id наиболее вероятной категории или None, если подходящих категорий не было в обучении
+        """
+        scores = self.scores(description, category_type)
+        return scores[0][0] if scores else None
+
+    def update(self, user_id, limit=None):
+        """
+        Дообучение на транзакциях пользователя, созданных после уже учтённых
+        """
+        transactions = Transaction.objects.filter(user_id=user_id, pk__gt=self.last_pk).exclude(description='')
+        if limit:
+            # Первое обучение - на последних limit транзакциях
+            rows = list(transactions.order_by('-pk').values_list('pk', 'description', 'category_id',
+                                                                 'category__type')[:limit])[::-1]
+        else:
+            rows = transactions.order_by('pk').values_list('pk', 'description', 'category_id', 'category__type')
+        with self._lock:
+            for pk, description, category_id, category_type in rows:
+                if pk > self.last_pk:
+                    self.learn(description, category_id, category_type)
+                    self.last_pk = pk
+        return self
+
+
+# Модели в памяти процесса. Сброс из другого процесса (forget_classifier в команде
+# или другом воркере) виден через ClassifierVersion при следующем get_classifier
+classifier_cache = LRUCache(
+    maxsize=getattr(settings, 'CLASSIFIER_CACHE_SIZE', 128),
+    ttl=getattr(settings, 'CLASSIFIER_CACHE_TTL', 3600),
+)
+
+
+def get_classifier(user):
+    """
+    Классификатор пользователя из кэша (LRU): новые транзакции дообучают его
+    одним запросом по первичному ключу, полностью модель обучается при промахе
+    или если ClassifierVersion пользователя изменилась после обучения
+    """
+    user_id = getattr(user, 'pk', user)
+    version = get_version(user_id, ClassifierVersion)
+    classifier = classifier_cache.get(user_id)
+    if classifier is None or classifier.version != version:
+        classifier = CategoryClassifier(version).update(user_id, limit=CLASSIFIER_MAX_ROWS)
+        classifier_cache.set(user_id, classifier)
+    else:
+        classifier.update(user_id)
+    return classifier
+
+
+def forget_classifier(user_ids):
+    """
+    Сбрасывает модели пользователей, у которых изменились или удалились уже учтённые транзакции:
+    в кэше этого процесса и, через ClassifierVersion, в остальных
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    bump_versions(user_ids, ClassifierVersion)
+    for user_id in user_ids:
+        classifier_cache.delete(user_id)
+
+
+def suggest_category(user, description, category_type=None):
+    """
+    id категории для описания по истории пользователя или None
+    """
+    if not description:
+        return None
+    return get_classifier(user).predict(description, category_type)
@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+from django.db.models.functions import Coalesce
+
+# Курс Currency.exchange_rate - стоимость единицы валюты в рублях;
+# счёт без валюты считается рублёвым
+DEFAULT_RATE = Decimal(1)
+
+AMOUNT_FIELD = DecimalField(max_digits=20, decimal_places=2)
+
+
+def converted(amount, rate, target_rate):
+    """
+    Выражение суммы amount в валюте с курсом target_rate: сумма переводится
+    в рубли по курсу rate (путь к полю exchange_rate валюты счёта) и умножается
+    на обратный курс целевой валюты. Считается в базе, без обхода строк в Python
+    (умножение, а не деление: в SQLite деление целых значений целочисленное)
+
+    :param amount: путь к полю суммы ('amount', 'balance', ...)
+    :param rate: путь к курсу валюты счёта ('account__currency__exchange_rate', ...)
+    :param target_rate: курс целевой валюты (Decimal)
+    """
+    return ExpressionWrapper(
+        F(amount) * Coalesce(F(rate), Value(DEFAULT_RATE)) * Value(DEFAULT_RATE / Decimal(target_rate)),
+        output_field=AMOUNT_FIELD,
+    )
+
+
+def target_rate(target_currency):
+    return DEFAULT_RATE if target_currency is None else target_currency.exchange_rate
+
+
+def converted_amount(target_currency, amount='amount'):
+    """
+    Сумма транзакции в валюте target_currency (None - в рублях) по курсу валюты её счёта
+    """
+    return converted(amount, 'account__currency__exchange_rate', target_rate(target_currency))
+
+
+def converted_balance(target_currency, field='balance'):
+    """
+    Поле баланса счёта в валюте target_currency (None - в рублях) по курсу валюты счёта
+    """
+    return converted(field, 'currency__exchange_rate', target_rate(target_currency))
+
+
+def from_roubles(value, target_currency):
+    """
+    Перевод суммы в рублях в валюту target_currency
+    """
+    return Decimal(value) / target_rate(target_currency)
@@ -0,0 +1,102 @@
+import datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Max, OuterRef, Q, Subquery, Sum
+
+from .currency import AMOUNT_FIELD, converted, converted_amount, from_roubles
+from .models import Transaction
+from .recurrence import RECURRENCE_HORIZON_DAYS, future_totals, materialize_due
+
+# Основной счёт пользователя, с которого считаются свободные деньги
+STANDARD_ACCOUNT_NAME = 'Стандарт'
+# Типы счетов: цели копят в initial_balance, накопительные счета - в balance
+GOAL_ACCOUNT_TYPE_ID = 1
+SAVINGS_ACCOUNT_TYPE_ID = 2
+
+DASHBOARD_CACHE_TTL = getattr(settings, 'DASHBOARD_CACHE_TTL', 600)
+
+
+def cache_key(user_id):
+    return f'budget:dashboard:{user_id}'
+
+
+def invalidate_dashboard(user_ids):
+    """
+    Сбрасывает кэшированные сводки пользователей, у которых изменились транзакции или счета.
+    Кэш default общий для процессов (DatabaseCache, см. CACHES), поэтому сброс
+    из management-команды виден воркерам сервера
+    """
+    keys = [cache_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _future_total(category_type, since):
+    transactions = Transaction.objects.filter(user=OuterRef('pk'), date__gte=since, category__type=category_type) \
+        .values('user') \
+        .annotate(total=Sum(converted_amount(None))) \
+        .values('total')
+    return Subquery(transactions, output_field=AMOUNT_FIELD)
+
+
+def _account_total(field, condition):
+    return Sum(converted(f'account__{field}', 'account__currency__exchange_rate', 1), filter=condition)
+
+
+def compute_summary(user):
+    """
+    Итоги главной страницы бюджета в рублях одним запросом: условные суммы
+    по счетам пользователя и подзапросы по будущим доходам и расходам. К будущим
+    суммам добавляются повторения регулярных транзакций на RECURRENCE_HORIZON_DAYS дней вперёд
+    """
+    since = datetime.date.today() + datetime.timedelta(days=1)
+    recurring = future_totals(user, since, since + datetime.timedelta(days=RECURRENCE_HORIZON_DAYS - 1))
+    standard = Q(account__name=STANDARD_ACCOUNT_NAME)
+    row = User.objects.filter(pk=user.pk) \
+        .values('pk') \
+        .annotate(
+            account_id=Max('account__pk', filter=standard),
+            standard=_account_total('balance', standard),
+            deposits=_account_total('balance', Q(account__account_type_id=SAVINGS_ACCOUNT_TYPE_ID) & ~standard),
+            goals=_account_total('initial_balance', Q(account__account_type_id=GOAL_ACCOUNT_TYPE_ID) & ~standard),
+            all_savings=_account_total('balance', Q(account__account_type_id=SAVINGS_ACCOUNT_TYPE_ID)),
+            future_incomes=_future_total('I', since),
+            future_expenses=_future_total('E', since),
+        ) \
+        .first() or {}
+
+    def value(key):
+        return row.get(key) or 0
+
+    planning = value('future_incomes') + recurring['I'] - value('future_expenses') - recurring['E']
+    return {
+        'account_id': row.get('account_id'),
+        'acc_amount': value('standard'),
+        'planning': planning,
+        'free': planning + value('standard') if planning < 0 else value('standard'),
+        'savings': value('deposits') + value('goals'),
+        'all_savings': value('all_savings'),
+        'date': datetime.date.today(),
+    }
+
+
+def get_dashboard_summary(user, currency=None):
+    """
+    Итоги главной страницы бюджета в валюте currency. Сводка в рублях кэшируется
+    по пользователю и сбрасывается при изменении его транзакций и счетов, поэтому
+    смена основной валюты не требует пересчёта. Наступившие повторения регулярных
+    транзакций создаются только при пересчёте (в остальное время - командой materialize_recurring)
+    """
+    key = cache_key(user.pk)
+    summary = cache.get(key)
+    if summary is None or summary['date'] != datetime.date.today():
+        materialize_due(user)
+        summary = compute_summary(user)
+        cache.set(key, summary, DASHBOARD_CACHE_TTL)
+
+    result = {'account_id': summary['account_id']}
+    for name in ('acc_amount', 'planning', 'free', 'savings', 'all_savings'):
+        result[name] = round(from_roubles(summary[name], currency), 2)
+    return result
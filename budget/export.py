@@ -0,0 +1,93 @@
+import csv
+import tempfile
+
+from .models import Category, Transaction
+
+# Сколько транзакций читается из базы за один раз при выгрузке
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = ['Дата', 'Тип', 'Категория', 'Счёт', 'Сумма', 'Описание', 'Теги']
+TYPE_NAMES = dict(Category.TYPE_CHOICES)
+# Начало текста, которое Excel и LibreOffice считают формулой
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def export_queryset(user, start_date=None, end_date=None, categories=None, tags=None):
+    """
+    Транзакции пользователя для выгрузки с фильтрами по периоду, категориям и тегам.
+    Постоянные транзакции (шаблоны) не выгружаются: при импорте они стали бы обычными
+    """
+    transactions = Transaction.objects.filter(user=user, permanent=False)
+    if start_date:
+        transactions = transactions.filter(date__gte=start_date)
+    if end_date:
+        transactions = transactions.filter(date__lte=end_date)
+    if categories:
+        transactions = transactions.filter(category__in=categories)
+    if tags:
+        transactions = transactions.filter(tags__name__in=tags).distinct()
+    return transactions.select_related('category', 'account').prefetch_related('tags').order_by('date', 'pk')
+
+
+def text_cell(value):
+    """
+    Текст пользователя для ячейки: значение, похожее на формулу, экранируется апострофом
+    """
+    return "'" + value if value.startswith(FORMULA_PREFIXES) else value
+
+
+def export_rows(transactions, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Строки выгрузки по одной: iterator() читает базу пачками по chunk_size
+    (теги подгружаются одним запросом на пачку), память не зависит от длины истории.
+    Сумма расхода отрицательная, как в банковской выписке: выгрузка импортируется обратно.
+    Названия, описание и теги проходят через text_cell
+    """
+    for transaction in transactions.iterator(chunk_size=chunk_size):
+        yield [
+            transaction.date.isoformat(),
+            TYPE_NAMES.get(transaction.category.type, transaction.category.type),
+            text_cell(transaction.category.name),
+            text_cell(transaction.account.name),
+            -transaction.amount if transaction.category.type == 'E' else transaction.amount,
+            text_cell(transaction.description),
+            text_cell(', '.join(sorted(tag.name for tag in transaction.tags.all()))),
+        ]
+
+
+class Echo:
+    """
+    Псевдофайл для csv.writer: write возвращает строку, а не пишет её
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(transactions):
+    writer = csv.writer(Echo(), delimiter=';')
+    # BOM - чтобы Excel открыл UTF-8 без выбора кодировки
+    yield '\ufeff' + writer.writerow(EXPORT_COLUMNS)
+    for row in export_rows(transactions):
+        yield writer.writerow(row)
+
+
+def xlsx_file(transactions):
+    """
+    XLSX во временном файле: openpyxl в режиме write_only пишет строки на диск
+    по мере поступления, в памяти книга не собирается
+
+    :raise ImportError: openpyxl не установлен
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Транзакции')
+    sheet.append(EXPORT_COLUMNS)
+    for row in export_rows(transactions):
+        sheet.append(row)
+
+    file = tempfile.TemporaryFile()
+    workbook.save(file)
+    file.seek(0)
+    return file
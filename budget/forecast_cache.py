@@ -0,0 +1,10 @@
+from django.conf import settings
+
+from .cache import LRUCache
+
+# Результаты прогноза. Ключ включает версию LedgerVersion, поэтому изменения
+# транзакций делают старые записи недостижимыми
+forecast_cache = LRUCache(
+    maxsize=getattr(settings, 'FORECAST_CACHE_SIZE', 256),
+    ttl=getattr(settings, 'FORECAST_CACHE_TTL', 3600),
+)
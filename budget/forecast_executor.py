@@ -0,0 +1,118 @@
+import concurrent.futures
+import logging
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from .holtwinters import HoltWinters
+
+logger = logging.getLogger(__name__)
+
+
+def fit_exponential_smoothing(values, seasonal_periods, quantity, backend='numpy'):
+    """
+    Аддитивная модель Хольта-Винтерса и прогноз на quantity шагов.
+    backend: 'numpy' (budget.holtwinters) или 'statsmodels', если он установлен.
+    Выполняется в процессе пула, поэтому модуль не импортирует модели Django
+    """
+    model = None
+    if backend == 'statsmodels':
+        try:
+            from statsmodels.tsa.holtwinters import ExponentialSmoothing
+        except ImportError:
+            logger.warning('statsmodels is not installed, using the numpy Holt-Winters backend')
+        else:
+            model = ExponentialSmoothing(values, trend='add', seasonal='add', seasonal_periods=seasonal_periods).fit()
+    if model is None:
+        model = HoltWinters(values, seasonal_periods).fit()
+    return [round(float(value), 2) for value in model.forecast(quantity)]
+
+
+def naive_forecast(values, seasonal_periods, quantity):
+    """
+    Запасной прогноз: среднее за последний сезон, повторённое quantity раз
+    """
+    tail = [float(value) for value in list(values)[-seasonal_periods:]]
+    mean = round(sum(tail) / len(tail), 2) if tail else 0.0
+    return [mean] * quantity
+
+
+class ForecastExecutor:
+    """
+    Выполняет подгонку моделей в пуле процессов, не занимая поток запроса дольше timeout секунд.
+    При ошибке или превышении времени возвращается naive_forecast.
+    max_workers=0 выполняет задачи в текущем процессе (для разработки)
+    """
+
+    def __init__(self, max_workers=None, timeout=10, backend='numpy'):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.backend = backend
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers or os.cpu_count())
+            return self._pool
+
+    def _reset_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, jobs):
+        """
+        :param jobs: список (values, seasonal_periods, quantity)
+        :return: список (прогноз, True если модель подогнана, False если это запасной прогноз)
+        """
+        if self.max_workers == 0:
+            return [self._run_inline(*job) for job in jobs]
+
+        pool = self._get_pool()
+        try:
+            futures = [pool.submit(fit_exponential_smoothing, *job, self.backend) for job in jobs]
+        except BrokenProcessPool:
+            self._reset_pool(pool)
+            return [(naive_forecast(*job), False) for job in jobs]
+
+        done, _ = concurrent.futures.wait(futures, timeout=self.timeout)
+
+        results = []
+        for job, future in zip(jobs, futures):
+            if future not in done:
+                future.cancel()
+                logger.warning('Forecast fit timed out after %s s', self.timeout)
+                results.append((naive_forecast(*job), False))
+            elif future.exception() is not None:
+                if isinstance(future.exception(), BrokenProcessPool):
+                    self._reset_pool(pool)
+                logger.warning('Forecast fit failed: %r', future.exception())
+                results.append((naive_forecast(*job), False))
+            else:
+                results.append((future.result(), True))
+        return results
+
+    def _run_inline(self, values, seasonal_periods, quantity):
+        try:
+            return fit_exponential_smoothing(values, seasonal_periods, quantity, self.backend), True
+        except Exception as error:
+            logger.warning('Forecast fit failed: %r', error)
+            return naive_forecast(values, seasonal_periods, quantity), False
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+forecast_executor = ForecastExecutor(
+    max_workers=getattr(settings, 'FORECAST_POOL_SIZE', None),
+    timeout=getattr(settings, 'FORECAST_TIMEOUT', 10),
+    backend=getattr(settings, 'FORECAST_BACKEND', 'numpy'),
+)
@@ -0,0 +1,110 @@
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .forecast_cache import forecast_cache
+from .forecast_executor import forecast_executor
+from .ledger import get_version
+from .models import ForecastSnapshot
+from .series import build_daily_series, build_monthly_series
+
+# Сколько секунд снимок прогноза считается свежим
+SNAPSHOT_MAX_AGE = getattr(settings, 'FORECAST_SNAPSHOT_MAX_AGE', 24 * 60 * 60)
+
+
+def get_forecast(user, forecast_type, quantity):
+    """
+    Прогноз расходов и доходов: из кэша, из свежего ForecastSnapshot или расчётом на месте.
+    Кэш использует ключ (пользователь, тип, количество, версия итогов).
+    Запасные (наивные) прогнозы не кэшируются
+
+    :return: (прогноз расходов, прогноз доходов)
+    """
+    version = get_version(user)
+    key = (user.pk, forecast_type, quantity, version)
+    result = forecast_cache.get(key)
+    if result is not None:
+        return result
+
+    result = get_snapshot_forecast(user, forecast_type, quantity, version)
+    if result is not None:
+        forecast_cache.set(key, result)
+        return result
+
+    if forecast_type == 'days':
+        forecasted_expenses, forecasted_incomes, fitted = get_transactions_for_current_month(user, quantity)
+    else:
+        forecasted_expenses, forecasted_incomes, fitted = get_monthly_income_expense(user, quantity)
+    result = forecasted_expenses, forecasted_incomes
+    if fitted:
+        forecast_cache.set(key, result)
+    return result
+
+
+def get_snapshot_forecast(user, forecast_type, quantity, version):
+    """
+    Прогноз из ForecastSnapshot, если снимок построен по текущей версии итогов,
+    не старше SNAPSHOT_MAX_AGE и покрывает quantity шагов, иначе None
+    """
+    snapshot = ForecastSnapshot.objects.filter(
+        user=user,
+        forecast_type=forecast_type,
+        ledger_version=version,
+        horizon__gte=quantity,
+        fitted_at__gte=timezone.now() - datetime.timedelta(seconds=SNAPSHOT_MAX_AGE),
+    ).first()
+    if snapshot is None:
+        return None
+    return snapshot.expenses[:quantity], snapshot.incomes[:quantity]
+
+
+def get_daily_jobs(user, quantity):
+    """
+    Задачи для ForecastExecutor: дневные расходы и доходы за последние ~390 дней
+    """
+    today = datetime.date.today()
+    start_of_month = today.replace(day=1) - datetime.timedelta(days=360)
+
+    series = build_daily_series(user, start_of_month, today)
+
+    return [
+        (series.expenses, 50, quantity),
+        (series.incomes, 50, quantity),
+    ]
+
+
+def get_monthly_jobs(user, quantity):
+    """
+    Задачи для ForecastExecutor: помесячные расходы и доходы за всю историю по
+    последний полный месяц. Первый шаг прогноза - текущий месяц
+    """
+    series = build_monthly_series(user)
+
+    return [
+        (series.expenses, 4, quantity),
+        (series.incomes, 4, quantity),
+    ]
+
+
+FORECAST_JOBS = {
+    'days': get_daily_jobs,
+    'months': get_monthly_jobs,
+}
+
+
+def get_transactions_for_current_month(user, quantity):
+    """
+    :return: (прогноз расходов, прогноз доходов, подогнаны ли обе модели)
+    """
+    (list_exp, expenses_fitted), (list_inc, incomes_fitted) = forecast_executor.run(get_daily_jobs(user, quantity))
+    return list_exp, list_inc, expenses_fitted and incomes_fitted
+
+
+def get_monthly_income_expense(user, quantity):
+    """
+    :return: (прогноз расходов, прогноз доходов, подогнаны ли обе модели)
+    """
+    (expense_forecast, expense_fitted), (income_forecast, income_fitted) = \
+        forecast_executor.run(get_monthly_jobs(user, quantity))
+    return expense_forecast, income_forecast, expense_fitted and income_fitted
@@ -1,7 +1,7 @@
 from django import forms
 from django.utils.encoding import force_str
 from taggit.forms import TagWidget
-from .models import Transaction, Category, Account
+from .models import Transaction, Category, Account, Receipt
 from hwyd.models import Settings
 
 from django import forms
@@ -75,6 +75,10 @@ class TransferForm(forms.Form):
 
 
 class TransactionForm(forms.ModelForm):
+    # Чек, по которому заполнена форма (budget.views.checks): его позиции сохраняются вместе с транзакцией.
+    # Выбираются только чеки, которые пользователь сканировал сам
+    receipt = forms.ModelChoiceField(queryset=Receipt.objects.none(), required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = Transaction
         fields = ['category', 'account', 'date', 'amount', 'description', 'tags', 'frequency', 'notification_frequency', 'permanent']
@@ -115,6 +119,7 @@ class TransactionForm(forms.ModelForm):
                 categories = categories.filter(type='E')
             self.fields['category'].queryset = categories
             self.fields['account'].queryset = Account.objects.filter(user=user, account_type_id=2)
+            self.fields['receipt'].queryset = Receipt.objects.filter(users=user)
 
 
 class CategoryForm(forms.ModelForm):
@@ -277,3 +282,98 @@ class CurrencyForm(forms.ModelForm):
         labels = {
             'general_currency': 'Стандартная валюта',
         }
+
+
+class StatementImportForm(forms.Form):
+    ENCODING_CHOICES = [
+        ('utf-8-sig', 'UTF-8'),
+        ('cp1251', 'Windows-1251'),
+    ]
+
+    account = forms.ModelChoiceField(
+        queryset=Account.objects.none(),
+        label="Счёт",
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    file = forms.FileField(
+        label="Выписка (CSV или OFX)",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.ofx,.qfx,.txt'})
+    )
+    encoding = forms.ChoiceField(
+        choices=ENCODING_CHOICES,
+        label="Кодировка",
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+    def __init__(self, user, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['account'].queryset = Account.objects.filter(user=user)
+
+
+class ReceiptImportForm(forms.Form):
+    account = forms.ModelChoiceField(
+        queryset=Account.objects.none(),
+        label="Счёт",
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    codes = forms.CharField(
+        required=False,
+        label="Строки QR-кодов (по одной на строку)",
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 6})
+    )
+    file = forms.FileField(
+        required=False,
+        label="Или текстовый файл со строками QR-кодов",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.txt,.csv'})
+    )
+
+    def __init__(self, user, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['account'].queryset = Account.objects.filter(user=user)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('codes', '').strip() and not cleaned_data.get('file'):
+            raise forms.ValidationError("Добавьте строки QR-кодов или файл")
+        return cleaned_data
+
+
+class TransactionExportForm(forms.Form):
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)'),
+    ]
+
+    start_date = forms.DateField(
+        required=False,
+        label="С",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    end_date = forms.DateField(
+        required=False,
+        label="По",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    categories = forms.ModelMultipleChoiceField(
+        queryset=Category.objects.none(),
+        required=False,
+        label="Категории",
+        widget=forms.SelectMultiple(attrs={'class': 'form-control'})
+    )
+    tags = forms.CharField(
+        required=False,
+        label="Теги (через запятую)",
+        widget=forms.TextInput(attrs={'class': 'form-control'})
+    )
+    format = forms.ChoiceField(
+        choices=FORMAT_CHOICES,
+        label="Формат",
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+    def __init__(self, user, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['categories'].queryset = Category.objects.filter(user=user)
+
+    def clean_tags(self):
+        return [tag.strip() for tag in self.cleaned_data['tags'].split(',') if tag.strip()]
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+def initial_state(values, seasonal_periods):
+    """
+    Эвристика начального состояния по двум первым сезонам: уровень - среднее
+    первого сезона, тренд - средний прирост между сезонами, сезонность - отклонения от уровня
+    """
+    first = values[:seasonal_periods]
+    second = values[seasonal_periods:2 * seasonal_periods]
+    level = first.mean()
+    trend = (second.mean() - level) / seasonal_periods
+    season = first - level
+    return level, trend, season
+
+
+def smooth(values, seasonal_periods, alpha, beta, gamma):
+    """
+    Прогон сглаживания сразу для массива комбинаций параметров формы (G,)
+
+    :return: (сумма квадратов ошибок прогноза на шаг вперёд, уровень, тренд, сезонность (G, m))
+    """
+    level0, trend0, season0 = initial_state(values, seasonal_periods)
+    size = alpha.shape[0]
+    level = np.full(size, level0)
+    trend = np.full(size, trend0)
+    season = np.tile(season0, (size, 1))
+    sse = np.zeros(size)
+
+    for t, value in enumerate(values):
+        index = t % seasonal_periods
+        seasonal = season[:, index]
+        error = value - (level + trend + seasonal)
+        sse += error * error
+        new_level = alpha * (value - seasonal) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, index] = gamma * (value - new_level) + (1 - gamma) * seasonal
+        level = new_level
+
+    return sse, level, trend, season
+
+
+class HoltWinters:
+    """
+    Аддитивная модель Хольта-Винтерса (аддитивные тренд и сезонность) на NumPy.
+    Параметры сглаживания подбираются перебором по сетке: ошибки всех комбинаций
+    (alpha, beta, gamma) считаются векторно, затем сетка сужается вокруг лучшей точки.
+
+    Интерфейс как у statsmodels: HoltWinters(values, seasonal_periods).fit().forecast(steps)
+    """
+
+    def __init__(self, values, seasonal_periods, grid_size=8, refinements=3):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.seasonal_periods = seasonal_periods
+        self.grid_size = grid_size
+        self.refinements = refinements
+        if seasonal_periods < 1 or len(self.values) < 2 * seasonal_periods:
+            raise ValueError('Holt-Winters needs at least two full seasonal cycles')
+
+    def fit(self):
+        low = np.zeros(3)
+        high = np.ones(3)
+        best = None
+        for _ in range(self.refinements + 1):
+            axes = [np.linspace(low[i], high[i], self.grid_size) for i in range(3)]
+            alpha, beta, gamma = (axis.ravel() for axis in np.meshgrid(*axes, indexing='ij'))
+            sse, level, trend, season = smooth(self.values, self.seasonal_periods, alpha, beta, gamma)
+            index = int(np.argmin(sse))
+            best = (alpha[index], beta[index], gamma[index], sse[index], level[index], trend[index], season[index])
+
+            step = (high - low) / (self.grid_size - 1)
+            center = np.array(best[:3])
+            low = np.clip(center - step, 0, 1)
+            high = np.clip(center + step, 0, 1)
+
+        self.alpha, self.beta, self.gamma, self.sse, self.level, self.trend, self.season = best
+        return self
+
+    def forecast(self, steps):
+        horizon = np.arange(1, steps + 1)
+        season_index = (len(self.values) + horizon - 1) % self.seasonal_periods
+        return self.level + horizon * self.trend + self.season[season_index]
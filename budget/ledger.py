@@ -0,0 +1,138 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import DailyLedger, LedgerVersion, Transaction
+
+# Сколько дней пересчитывается за один запрос при массовых операциях
+REBUILD_CHUNK_SIZE = 500
+
+
+def bump_versions(user_ids, model=LedgerVersion):
+    """
+    Увеличивает LedgerVersion пользователей, чьи дневные итоги изменились
+    (или другой счётчик model с полями user и version)
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    with transaction.atomic():
+        updated = set(model.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        model.objects.filter(user_id__in=updated).update(version=F('version') + 1)
+        model.objects.bulk_create(
+            [model(user_id=user_id, version=1) for user_id in user_ids - updated],
+            ignore_conflicts=True,
+        )
+
+
+def get_version(user, model=LedgerVersion):
+    return model.objects.filter(user=user).values_list('version', flat=True).first() or 0
+
+
+def apply_delta(user_id, date, category_id, category_type, amount, count):
+    """
+    Атомарно прибавляет сумму и количество к строке DailyLedger.
+    Пустые строки удаляются, отрицательная дельта без строки игнорируется
+    (например, при каскадном удалении пользователя)
+    """
+    key = {
+        'user_id': user_id,
+        'date': date,
+        'category_id': category_id,
+        'type': category_type,
+    }
+    with transaction.atomic():
+        updated = DailyLedger.objects.filter(**key).update(total=F('total') + amount, count=F('count') + count)
+        if not updated:
+            if count <= 0:
+                return
+            DailyLedger.objects.create(total=amount, count=count, **key)
+        elif count < 0:
+            DailyLedger.objects.filter(count__lte=0, **key).delete()
+        bump_versions([user_id])
+
+
+def ledger_key(values):
+    """
+    Ключ строки DailyLedger из значений транзакции или None, если транзакция в итоги не входит
+    """
+    if values is None or values['permanent']:
+        return None
+    return values['user_id'], values['date'], values['category_id'], values['category__type']
+
+
+def transaction_values(instance):
+    """
+    Значения транзакции в том же виде, что и values() из базы (дата и сумма
+    могут быть присвоены строкой, datetime или float)
+    """
+    return {
+        'user_id': instance.user_id,
+        'date': Transaction._meta.get_field('date').to_python(instance.date),
+        'category_id': instance.category_id,
+        'category__type': instance.category.type,
+        'amount': Transaction._meta.get_field('amount').to_python(instance.amount),
+        'permanent': instance.permanent,
+    }
+
+
+def _aggregate_days(transactions):
+    return transactions.filter(permanent=False) \
+        .values('user_id', 'date', 'category_id', 'category__type') \
+        .annotate(total=Sum('amount'), count=Count('id')) \
+        .order_by()
+
+
+def _ledger_rows(aggregated):
+    for row in aggregated:
+        yield DailyLedger(
+            user_id=row['user_id'],
+            date=row['date'],
+            category_id=row['category_id'],
+            type=row['category__type'],
+            total=row['total'],
+            count=row['count'],
+        )
+
+
+def rebuild_days(days):
+    """
+    Пересчитывает DailyLedger для набора пар (user_id, date) по исходным транзакциям
+    """
+    days = list(days)
+    for start in range(0, len(days), REBUILD_CHUNK_SIZE):
+        chunk = days[start:start + REBUILD_CHUNK_SIZE]
+        condition = Q()
+        for user_id, date in chunk:
+            condition |= Q(user_id=user_id, date=date)
+
+        with transaction.atomic():
+            DailyLedger.objects.filter(condition).delete()
+            DailyLedger.objects.bulk_create(list(_ledger_rows(_aggregate_days(Transaction.objects.filter(condition)))))
+            bump_versions(user_id for user_id, _ in chunk)
+
+
+def rebuild_all(user=None, batch_size=1000):
+    """
+    Полностью пересобирает DailyLedger (для всех пользователей или одного)
+    """
+    ledger = DailyLedger.objects.all()
+    transactions = Transaction.objects.all()
+    if user is not None:
+        ledger = ledger.filter(user=user)
+        transactions = transactions.filter(user=user)
+
+    created = 0
+    with transaction.atomic():
+        user_ids = set(ledger.values_list('user_id', flat=True).distinct())
+        ledger.delete()
+        batch = []
+        for row in _ledger_rows(_aggregate_days(transactions).iterator(chunk_size=batch_size)):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                DailyLedger.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        DailyLedger.objects.bulk_create(batch)
+        created += len(batch)
+        bump_versions(user_ids | set(transactions.values_list('user_id', flat=True).distinct()))
+    return created
@@ -0,0 +1,68 @@
+import datetime
+import timeit
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+
+from budget.models import Transaction
+from budget.series import build_daily_series
+
+
+def legacy_daily_series(user, start_date, end_date):
+    """
+    Прежний способ: два aggregate-запроса на каждый день периода
+    """
+    transactions = Transaction.objects.filter(date__range=(start_date, end_date), user=user)
+    daily_expenses = []
+    daily_incomes = []
+
+    current_date = start_date
+    while current_date <= end_date:
+        day_transactions = transactions.filter(date=current_date)
+        total_expenses = day_transactions.filter(category__type='E').aggregate(total=Sum('amount'))['total'] or 0
+        total_incomes = day_transactions.filter(category__type='I').aggregate(total=Sum('amount'))['total'] or 0
+        daily_expenses.append(float(total_expenses))
+        daily_incomes.append(float(total_incomes))
+        current_date += datetime.timedelta(days=1)
+
+    return np.array(daily_incomes), np.array(daily_expenses)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает построение дневных рядов для прогноза: цикл по дням против build_daily_series'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', type=int, help='id пользователя')
+        parser.add_argument('--days', type=int, default=390, help='Длина окна в днях')
+        parser.add_argument('--repeat', type=int, default=5, help='Количество повторов')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(pk=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Пользователь {options['user']} не найден")
+
+        end_date = datetime.date.today()
+        start_date = end_date - datetime.timedelta(days=options['days'] - 1)
+
+        legacy_incomes, legacy_expenses = legacy_daily_series(user, start_date, end_date)
+        series = build_daily_series(user, start_date, end_date)
+        if not (np.allclose(legacy_incomes, series.incomes) and np.allclose(legacy_expenses, series.expenses)):
+            self.stdout.write(self.style.WARNING(
+                'Ряды различаются: build_daily_series не учитывает постоянные (шаблонные) транзакции'
+            ))
+
+        for name, func in (
+                ('legacy loop', lambda: legacy_daily_series(user, start_date, end_date)),
+                ('build_daily_series', lambda: build_daily_series(user, start_date, end_date)),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                func()
+            query_count = len(queries)
+            reset_queries()
+            best = min(timeit.repeat(func, number=1, repeat=options['repeat']))
+            self.stdout.write(f'{name:>20}: {best * 1000:9.2f} ms, запросов: {query_count}')
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from budget.holtwinters import HoltWinters
+
+
+def synthetic_series(rng, length, seasonal_periods, noise):
+    """
+    Уровень + линейный тренд + синусоидальная сезонность + нормальный шум
+    """
+    t = np.arange(length)
+    level = rng.uniform(500, 5000)
+    trend = rng.uniform(-2, 2)
+    amplitude = rng.uniform(0.1, 0.5) * level
+    season = amplitude * np.sin(2 * np.pi * t / seasonal_periods + rng.uniform(0, 2 * np.pi))
+    return level + trend * t + season + rng.normal(0, noise * level, length)
+
+
+def fit_statsmodels(values, seasonal_periods):
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    return ExponentialSmoothing(values, trend='add', seasonal='add', seasonal_periods=seasonal_periods).fit()
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает точность и скорость Хольта-Винтерса на NumPy и в statsmodels на синтетических рядах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--series', type=int, default=20, help='Количество рядов')
+        parser.add_argument('--length', type=int, default=390, help='Длина обучающей части ряда')
+        parser.add_argument('--seasonal-periods', type=int, default=50, help='Длина сезона')
+        parser.add_argument('--horizon', type=int, default=30, help='Длина проверочной части')
+        parser.add_argument('--noise', type=float, default=0.1, help='Шум как доля уровня')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        seasonal_periods = options['seasonal_periods']
+        horizon = options['horizon']
+
+        backends = {'numpy': lambda values: HoltWinters(values, seasonal_periods).fit()}
+        try:
+            import statsmodels  # noqa: F401
+        except ImportError:
+            self.stdout.write(self.style.WARNING('statsmodels не установлен, сравнение только для NumPy'))
+        else:
+            backends['statsmodels'] = lambda values: fit_statsmodels(values, seasonal_periods)
+
+        errors = {name: [] for name in backends}
+        timings = {name: [] for name in backends}
+        for _ in range(options['series']):
+            values = synthetic_series(rng, options['length'] + horizon, seasonal_periods, options['noise'])
+            train, test = values[:-horizon], values[-horizon:]
+            for name, fit in backends.items():
+                started = time.perf_counter()
+                forecast = np.asarray(fit(train).forecast(horizon))
+                timings[name].append(time.perf_counter() - started)
+                errors[name].append(np.mean(np.abs(forecast - test)) / np.mean(np.abs(test)))
+
+        for name in backends:
+            self.stdout.write(
+                f'{name:>12}: MAE/среднее {np.mean(errors[name]) * 100:6.2f}%, '
+                f'подгонка median {np.median(timings[name]) * 1000:8.2f} ms, '
+                f'max {np.max(timings[name]) * 1000:8.2f} ms'
+            )
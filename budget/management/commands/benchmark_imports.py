@@ -0,0 +1,75 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+# Код, который выполняется в новом интерпретаторе под python -X importtime
+CHILD_CODE = '''
+import os, sys
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+import django
+django.setup()
+for module in sys.argv[1:]:
+    __import__(module)
+try:
+    import resource
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+except ImportError:
+    print(0)
+'''
+
+
+def measure(modules):
+    """
+    Запускает новый интерпретатор с -X importtime, импортирует modules после django.setup()
+
+    :return: (сумма self-времени всех импортов в мкс, {модуль: cumulative мкс}, max RSS в КБ)
+    """
+    code = CHILD_CODE.format(settings_module=os.environ.get('DJANGO_SETTINGS_MODULE', 'my_site.settings'))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code, *modules],
+        cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    total = 0
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            total += int(match.group(1))
+            cumulative[match.group(4)] = int(match.group(2))
+    rss = int(completed.stdout.strip().splitlines()[-1] or 0)
+    return total, cumulative, rss
+
+
+class Command(BaseCommand):
+    help = 'Время импорта (python -X importtime) и память при холодном старте для каждого приложения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('apps', nargs='*', default=['general_app', 'hwyd', 'budget', 'todos'],
+                            help='Приложения, у которых импортируется <app>.urls')
+        parser.add_argument('--top', type=int, default=5, help='Сколько самых тяжёлых модулей показать')
+
+    def handle(self, *args, **options):
+        base_total, base_cumulative, base_rss = measure([])
+        self.stdout.write(f'{"django.setup()":>20}: {base_total / 1000:9.1f} ms, RSS {base_rss / 1024:7.1f} MB')
+
+        for app in options['apps']:
+            module = f'{app}.urls'
+            total, cumulative, rss = measure([module])
+            self.stdout.write(
+                f'{app:>20}: +{(total - base_total) / 1000:8.1f} ms, '
+                f'{module} cumulative {cumulative.get(module, 0) / 1000:8.1f} ms, '
+                f'RSS {rss / 1024:7.1f} MB'
+            )
+            heaviest = sorted(
+                ((value, name) for name, value in cumulative.items()
+                 if name not in base_cumulative and '.' not in name),
+                reverse=True,
+            )[:options['top']]
+            for value, name in heaviest:
+                self.stdout.write(f'{"":>22}{name}: {value / 1000:.1f} ms')
@@ -0,0 +1,153 @@
+import datetime
+import random
+import timeit
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q, QuerySet, Sum
+from django.db.models.functions import TruncMonth
+from taggit.models import Tag, TaggedItem
+
+from budget.models import Account, Category, Transaction
+
+
+class Rollback(Exception):
+    pass
+
+
+def hot_queries(user, today):
+    """
+    Запросы к Transaction в том виде, в каком их выполняют представления бюджета
+    """
+    middle = today - datetime.timedelta(days=365 * 5)
+    feed = Transaction.objects.filter(user=user, permanent=False, date__lte=today).order_by('-date', '-pk')
+    cursor = feed.filter(date__lte=middle).values_list('date', 'pk').first() or (middle, 0)
+    return {
+        'лента: первая страница': lambda: feed[:51],
+        'лента: страница по курсору': lambda: feed.filter(Q(date__lt=cursor[0]) | Q(date=cursor[0], pk__lt=cursor[1]))[:51],
+        'история за месяц': lambda: Transaction.objects.filter(
+            user=user, permanent=False, date__range=(today - datetime.timedelta(days=30), today),
+        ).select_related('category').order_by('-date'),
+        'планирование (будущие доходы)': lambda: Transaction.objects.filter(
+            category__type='I', user=user, date__gt=today,
+        ).order_by('-date'),
+        'постоянные для формы': lambda: Transaction.objects.filter(
+            user=user, permanent=True, category__type='E',
+        ).order_by('-date'),
+        'будущие суммы на главной': lambda: Transaction.objects.filter(
+            user=user, date__gt=today,
+        ).values('user').annotate(total=Sum('amount')),
+        'пересчёт дня DailyLedger': lambda: Transaction.objects.filter(
+            user=user, date=today - datetime.timedelta(days=10), permanent=False,
+        ).values('category_id').annotate(total=Sum('amount')),
+        'фильтр по тегу': lambda: Transaction.objects.filter(
+            user=user, permanent=False, tags__name='t0',
+        ).order_by('-date', '-pk')[:51],
+        'итоги по тегам': lambda: Transaction.objects.filter(
+            user=user, permanent=False, tags__isnull=False,
+        ).annotate(month=TruncMonth('date')).values('tags__name', 'category__type', 'month')
+        .annotate(total=Sum('amount'), count=Count('id')).order_by('tags__name', 'month'),
+    }
+
+
+def explain(queryset, label):
+    """
+    План запроса (EXPLAIN QUERY PLAN). Метка в комментарии делает текст запроса
+    уникальным: sqlite3 кэширует подготовленные запросы, и после удаления
+    индексов иначе показывался бы прежний план
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql} /* {label} */', params)
+        return '; '.join(str(row[-1]) for row in cursor.fetchall())
+
+
+class Command(BaseCommand):
+    help = ('Замеряет запросы представлений бюджета к Transaction на синтетических данных '
+            'с составными индексами и без них и выводит планы (EXPLAIN). '
+            'Данные создаются в транзакции и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Количество транзакций')
+        parser.add_argument('--users', type=int, default=200, help='Количество пользователей')
+        parser.add_argument('--days', type=int, default=3650, help='Глубина истории в днях')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=5, help='Количество повторов')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--tagged', type=float, default=0.1, help='Доля транзакций с тегами')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def populate(self, options, today):
+        rnd = random.Random(options['seed'])
+        users, categories, accounts = [], {}, {}
+        for number in range(options['users']):
+            user = get_user_model().objects.create(username=f'benchmark-index-{number}')
+            users.append(user)
+            categories[user.pk] = [
+                Category.objects.create(user=user, name=f'c{i}', type='IE'[i % 2], color='#ffffff', icon='gift')
+                for i in range(6)
+            ]
+            accounts[user.pk] = Account.objects.create(user=user, name='Стандарт', balance=0)
+
+        # Обычный QuerySet: пересчёт DailyLedger и проводок для откатываемых данных не нужен
+        plain = QuerySet(model=Transaction)
+        tags = Tag.objects.bulk_create([Tag(name=f't{i}', slug=f't{i}') for i in range(5)])
+        content_type = ContentType.objects.get_for_model(Transaction)
+        created = 0
+        while created < options['rows']:
+            batch = []
+            for _ in range(min(options['batch_size'], options['rows'] - created)):
+                user = rnd.choice(users)
+                batch.append(Transaction(
+                    user=user,
+                    category=rnd.choice(categories[user.pk]),
+                    account=accounts[user.pk],
+                    date=today - datetime.timedelta(days=rnd.randrange(-60, options['days'])),
+                    amount=rnd.randrange(1, 10_000),
+                    permanent=rnd.random() < 0.02,
+                ))
+            plain.bulk_create(batch)
+            TaggedItem.objects.bulk_create([
+                TaggedItem(tag=rnd.choice(tags), content_type=content_type, object_id=obj.pk)
+                for obj in batch if rnd.random() < options['tagged']
+            ])
+            created += len(batch)
+            self.stdout.write(f'\rсоздано транзакций: {created}', ending='')
+        self.stdout.write('')
+        return users[len(users) // 2]
+
+    def measure(self, queries, repeat, label):
+        results = {}
+        for name, query in queries.items():
+            best = min(timeit.repeat(lambda: list(query()), number=1, repeat=repeat))
+            results[name] = (best * 1000, explain(query(), label))
+        return results
+
+    def run(self, options):
+        today = datetime.date.today()
+        user = self.populate(options, today)
+        queries = hot_queries(user, today)
+
+        after = self.measure(queries, options['repeat'], 'after')
+
+        # Удаление индексов внутри откатываемой транзакции: замер "до"
+        schema_editor = connection.schema_editor(atomic=False)
+        with connection.cursor() as cursor:
+            for index in Transaction._meta.indexes:
+                cursor.execute(str(index.remove_sql(Transaction, schema_editor)))
+        before = self.measure(queries, options['repeat'], 'before')
+
+        self.stdout.write(f'{"запрос":>32} {"без индексов":>14} {"с индексами":>14}')
+        for name in queries:
+            self.stdout.write(f'{name:>32} {before[name][0]:11.2f} ms {after[name][0]:11.2f} ms')
+        for name in queries:
+            self.stdout.write(f'\n{name}\n  без индексов: {before[name][1]}\n  с индексами:  {after[name][1]}')
@@ -0,0 +1,191 @@
+import calendar
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from budget.balances import balance_field, post_entries
+from budget.models import Account, AccountEntry, AccountType, Category, Currency, Transaction
+from hwyd.models import Activities, Settings
+from todos.models import Todo
+
+ICONS = [icon for icon, _ in Category.ICON_CHOICES]
+FREQUENCIES = [frequency for frequency, _ in Transaction.FREQUENCY_CHOICES]
+NOTIFICATIONS = [notification for notification, _ in Transaction.NOTIFICATION_CHOICES]
+
+
+def months_back(end_date, count):
+    """
+    Первые числа count месяцев, заканчивая месяцем end_date, по возрастанию
+    """
+    year, month = end_date.year, end_date.month
+    months = []
+    for _ in range(count):
+        months.append(datetime.date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1]
+
+
+def color(rnd):
+    return '#%06x' % rnd.randrange(0x1000000)
+
+
+class Command(BaseCommand):
+    help = ('Создаёт воспроизводимый набор данных для нагрузочных замеров: пользователи с категориями, '
+            'счетами, транзакциями, активностями hwyd и задачами. Одинаковые --seed и --end-date дают одинаковые данные')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Количество пользователей')
+        parser.add_argument('--categories', type=int, default=10, help='Категорий на пользователя')
+        parser.add_argument('--accounts', type=int, default=3, help='Счетов на пользователя (первый - "Стандарт")')
+        parser.add_argument('--transactions-per-month', type=int, default=60, help='Транзакций на пользователя в месяц')
+        parser.add_argument('--permanent', type=int, default=3, help='Постоянных транзакций на пользователя')
+        parser.add_argument('--months', type=int, default=24, help='Глубина истории в месяцах')
+        parser.add_argument('--activities', type=int, default=10, help='Активностей hwyd на пользователя в месяц')
+        parser.add_argument('--todos', type=int, default=20, help='Задач на пользователя')
+        parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=datetime.date.today(),
+                            help='Последний день истории (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='load', help='Префикс имён пользователей')
+        parser.add_argument('--password', default='load', help='Пароль созданных пользователей')
+
+    def handle(self, *args, **options):
+        self.rnd = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        prefix = f"{options['prefix']}-{options['seed']}-"
+        User = get_user_model()
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'Пользователи с префиксом {prefix} уже есть: удалите их или смените --seed/--prefix')
+
+        self.currency, _ = Currency.objects.get_or_create(name='Рубль', defaults={'exchange_rate': 1})
+        AccountType.objects.get_or_create(pk=1, defaults={'name': 'Цель'})
+        AccountType.objects.get_or_create(pk=2, defaults={'name': 'Счет'})
+
+        password = make_password(options['password'])
+        months = months_back(options['end_date'], options['months'])
+        totals = {}
+        for start in range(0, options['users'], self.batch_size):
+            numbers = range(start, min(start + self.batch_size, options['users']))
+            with transaction.atomic():
+                User.objects.bulk_create([User(username=f'{prefix}{number}', password=password) for number in numbers])
+                users = list(User.objects.filter(username__in=[f'{prefix}{number}' for number in numbers]).order_by('pk'))
+                for name, count in self.populate(users, months, options).items():
+                    totals[name] = totals.get(name, 0) + count
+            self.stdout.write(f'\rпользователей: {start + len(users)}', ending='')
+        self.stdout.write('')
+        for name, count in totals.items():
+            self.stdout.write(f'{name}: {count}')
+
+    def bulk_create(self, model, objects):
+        """
+        Создаёт объекты из генератора пачками по batch_size
+        """
+        manager = model.objects
+        created, batch = 0, []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                manager.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        manager.bulk_create(batch)
+        return created + len(batch)
+
+    def populate(self, users, months, options):
+        rnd = self.rnd
+        counts = {'users': len(users)}
+        counts['settings'] = self.bulk_create(Settings, (
+            Settings(user=user, backgroundColor='#f0f0f0', tableHeadColorWeekend='#eeb3b3',
+                     tableHeadColor='#e6e4ce', tableHeadTextColor='#000000', showCalendar=True,
+                     showCreateActivity=True, showDeleteAllActivities=True,
+                     showDeleteActivity=True, showCreateActivityGroup=True, enableSortTable=True,
+                     enableOpenCloseGroups=False, onSounds=True, showRowColumnLight=True,
+                     showActivityDayLight=True, rowColumnLight='#e7e7e7', fontFamily='Inter',
+                     showOpenAllGroups=True, showTabs=True, selected=True, name='default',
+                     vanishing='off', general_currency=self.currency)
+            for user in users
+        ))
+
+        # Каждая четвёртая категория - доходная, остальные - расходные
+        categories = Category.objects.bulk_create([
+            Category(user=user, name=f'Категория {number}', type='I' if number % 4 == 0 else 'E',
+                     color=color(rnd), icon=rnd.choice(ICONS))
+            for user in users for number in range(options['categories'])
+        ])
+        counts['categories'] = len(categories)
+
+        accounts = Account.objects.bulk_create([
+            Account(user=user, currency=self.currency, name='Стандарт' if number == 0 else f'Счёт {number}',
+                    account_type_id=1 if number % 3 == 2 else 2,
+                    balance=Decimal(rnd.randrange(0, 100_000)),
+                    initial_balance=Decimal(rnd.randrange(0, 10_000)) if number % 3 == 2 else 0)
+            for user in users for number in range(options['accounts'])
+        ])
+        counts['accounts'] = len(accounts)
+        # bulk_create не вызывает сигналы: начальные остатки записываются проводками здесь
+        post_entries([
+            AccountEntry(account=account, kind=AccountEntry.OPENING,
+                         amount=getattr(account, balance_field(account.account_type_id)))
+            for account in accounts
+        ], update_balances=False)
+
+        by_user = {user.pk: {'I': [], 'E': [], 'accounts': []} for user in users}
+        for category in categories:
+            by_user[category.user_id][category.type].append(category)
+        for account in accounts:
+            if account.account_type_id != 1:
+                by_user[account.user_id]['accounts'].append(account)
+
+        # Транзакции создаются через Transaction.objects: DailyLedger и проводки обновляются по пачкам
+        counts['transactions'] = self.bulk_create(Transaction, self.transactions(users, by_user, months, options))
+
+        counts['activities'] = self.bulk_create(Activities, (
+            Activities(user=user, name=f'Активность {number}', date=month.strftime('%Y-%m'),
+                       backgroundColor=color(rnd), color='#000000',
+                       marks=''.join(rnd.choice(('True ', 'False ')) for _ in range(days)),
+                       number=number, isGroup=False, beginDay=0, endDay=days - 1, isOpen=False,
+                       cellsComments='*|' * days, onOffCells='True ' * days, hide=False)
+            for user in users for month in months
+            for days in [calendar.monthrange(month.year, month.month)[1]]
+            for number in range(options['activities'])
+        ))
+
+        counts['todos'] = self.bulk_create(Todo, (
+            Todo(user=user, title=f'Задача {number}', isCompleted=rnd.random() < 0.5)
+            for user in users for number in range(options['todos'])
+        ))
+        return counts
+
+    def transactions(self, users, by_user, months, options):
+        rnd = self.rnd
+        end_date = options['end_date']
+        for user in users:
+            related = by_user[user.pk]
+            if not related['accounts'] or not (related['I'] or related['E']):
+                continue
+            types = [category_type for category_type in ('I', 'E') if related[category_type]]
+
+            for _ in range(options['permanent']):
+                category = rnd.choice(related[rnd.choice(types)])
+                yield Transaction(user=user, category=category, account=rnd.choice(related['accounts']),
+                                  date=end_date, amount=Decimal(rnd.randrange(100, 5000)),
+                                  description=category.name, regular=True, permanent=True,
+                                  frequency=rnd.choice(FREQUENCIES), notification_frequency=rnd.choice(NOTIFICATIONS))
+
+            for month in months:
+                days = calendar.monthrange(month.year, month.month)[1]
+                if (month.year, month.month) == (end_date.year, end_date.month):
+                    days = end_date.day
+                for _ in range(options['transactions_per_month']):
+                    # Доходов примерно в пять раз меньше расходов, но они крупнее
+                    category_type = 'I' if 'I' in types and (rnd.random() < 0.15 or types == ['I']) else types[-1]
+                    category = rnd.choice(related[category_type])
+                    kopecks = rnd.randrange(500_000, 10_000_000) if category_type == 'I' else rnd.randrange(5_000, 500_000)
+                    yield Transaction(user=user, category=category, account=rnd.choice(related['accounts']),
+                                      date=month.replace(day=rnd.randrange(days) + 1),
+                                      amount=Decimal(kopecks) / 100, description=category.name)
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from budget.models import Account
+from budget.receipts import RECEIPT_API_URL, RECEIPT_IMPORT_WORKERS, ReceiptClient, import_receipts
+
+
+class Command(BaseCommand):
+    help = 'Импортирует чеки по строкам QR-кодов из файла (по одной на строку) в счёт пользователя'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', type=int, help='id пользователя')
+        parser.add_argument('account', type=int, help='id счёта')
+        parser.add_argument('path', help='Файл со строками QR-кодов')
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--workers', type=int, default=RECEIPT_IMPORT_WORKERS,
+                            help='Сколько чеков запрашивается одновременно')
+        parser.add_argument('--url', help='Адрес сервиса проверки чеков (по умолчанию RECEIPT_API_URL)')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(pk=options['user'])
+            account = Account.objects.get(pk=options['account'], user=user)
+        except (get_user_model().DoesNotExist, Account.DoesNotExist):
+            raise CommandError('Пользователь или его счёт не найден')
+
+        # Пул соединений не меньше числа одновременных запросов
+        client = ReceiptClient(url=options['url'] or RECEIPT_API_URL, pool_size=options['workers'])
+        try:
+            with open(options['path'], encoding=options['encoding']) as lines:
+                result = import_receipts(user, account, lines, client=client, workers=options['workers'])
+        finally:
+            client.close()
+        for code, error in result.errors:
+            self.stderr.write(f'{code}: {error}')
+        self.stdout.write(f'Добавлено: {result.created}, пропущено: {result.skipped}, ошибок: {len(result.errors)}')
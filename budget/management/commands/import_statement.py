@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from budget.models import Account
+from budget.statements import IMPORT_BATCH_SIZE, StatementError, detect_format, import_statement, parse_statement
+
+
+class Command(BaseCommand):
+    help = 'Импортирует банковскую выписку (CSV или OFX) в счёт пользователя'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', type=int, help='id пользователя')
+        parser.add_argument('account', type=int, help='id счёта')
+        parser.add_argument('path', help='Файл выписки')
+        parser.add_argument('--format', choices=('csv', 'ofx'), help='Формат (по умолчанию - по расширению)')
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(pk=options['user'])
+            account = Account.objects.get(pk=options['account'], user=user)
+        except (get_user_model().DoesNotExist, Account.DoesNotExist):
+            raise CommandError('Пользователь или его счёт не найден')
+
+        statement_format = options['format'] or detect_format(options['path'])
+        with open(options['path'], encoding=options['encoding'], newline='') as lines:
+            try:
+                result = import_statement(user, account, parse_statement(lines, statement_format),
+                                          batch_size=options['batch_size'])
+            except StatementError as error:
+                raise CommandError(str(error))
+        self.stdout.write(f'Добавлено: {result.created}, пропущено: {result.skipped}')
@@ -0,0 +1,19 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from budget.recurrence import materialize_due
+
+
+class Command(BaseCommand):
+    help = ('Создаёт записи для наступивших повторений регулярных транзакций '
+            '(запускать периодически, например раз в сутки)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='id пользователя (по умолчанию все пользователи)')
+        parser.add_argument('--date', type=datetime.date.fromisoformat, default=None,
+                            help='Дата, по которую создаются повторения (YYYY-MM-DD, по умолчанию сегодня)')
+
+    def handle(self, *args, **options):
+        created = materialize_due(options['user'], options['date'])
+        self.stdout.write(self.style.SUCCESS(f'Создано транзакций: {created}'))
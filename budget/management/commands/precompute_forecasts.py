@@ -0,0 +1,94 @@
+import datetime
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from budget.forecast_executor import ForecastExecutor, forecast_executor
+from budget.forecasting import FORECAST_JOBS
+from budget.ledger import get_version
+from budget.models import DailyLedger, ForecastSnapshot
+
+
+class Command(BaseCommand):
+    help = 'Заранее рассчитывает дневные и месячные прогнозы для активных пользователей (запуск по ночам)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--active-days', type=int, default=30,
+                            help='Пользователи с транзакциями за последние N дней')
+        parser.add_argument('--days-horizon', type=int, default=60, help='Горизонт дневного прогноза')
+        parser.add_argument('--months-horizon', type=int, default=12, help='Горизонт месячного прогноза')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Размер пула процессов')
+        parser.add_argument('--timeout', type=float, default=120, help='Таймаут на пачку пользователей, с')
+        parser.add_argument('--backend', choices=['numpy', 'statsmodels'], default=forecast_executor.backend,
+                            help='Реализация Хольта-Винтерса')
+
+    def handle(self, *args, **options):
+        since = datetime.date.today() - datetime.timedelta(days=options['active_days'])
+        user_ids = list(DailyLedger.objects.filter(date__gte=since)
+                        .values_list('user_id', flat=True).distinct().order_by('user_id'))
+        users = get_user_model().objects.filter(pk__in=user_ids).order_by('pk')
+        horizons = {
+            'days': options['days_horizon'],
+            'months': options['months_horizon'],
+        }
+
+        executor = ForecastExecutor(max_workers=options['workers'], timeout=options['timeout'],
+                                    backend=options['backend'])
+        batch_size = max(options['workers'] or 1, 1)
+        saved = failed = 0
+        try:
+            batch = []
+            for user in users.iterator():
+                batch.append(user)
+                if len(batch) >= batch_size:
+                    batch_saved, batch_failed = self.process_batch(executor, batch, horizons)
+                    saved += batch_saved
+                    failed += batch_failed
+                    batch = []
+            if batch:
+                batch_saved, batch_failed = self.process_batch(executor, batch, horizons)
+                saved += batch_saved
+                failed += batch_failed
+        finally:
+            executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(user_ids)}, снимков сохранено: {saved}, не удалось подогнать: {failed}'
+        ))
+
+    @staticmethod
+    def process_batch(executor, users, horizons):
+        """
+        Все модели пачки пользователей подгоняются параллельно одним вызовом executor.run
+        """
+        keys = []
+        jobs = []
+        for user in users:
+            version = get_version(user)
+            for forecast_type, horizon in horizons.items():
+                keys.append((user, forecast_type, horizon, version))
+                jobs.extend(FORECAST_JOBS[forecast_type](user, horizon))
+
+        results = executor.run(jobs)
+
+        saved = failed = 0
+        for index, (user, forecast_type, horizon, version) in enumerate(keys):
+            (expenses, expenses_fitted), (incomes, incomes_fitted) = results[2 * index:2 * index + 2]
+            if not (expenses_fitted and incomes_fitted):
+                failed += 1
+                continue
+            ForecastSnapshot.objects.update_or_create(
+                user=user,
+                forecast_type=forecast_type,
+                defaults={
+                    'horizon': horizon,
+                    'expenses': expenses,
+                    'incomes': incomes,
+                    'ledger_version': version,
+                    'fitted_at': timezone.now(),
+                },
+            )
+            saved += 1
+        return saved, failed
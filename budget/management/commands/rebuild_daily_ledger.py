@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from budget.ledger import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает таблицу дневных итогов DailyLedger по транзакциям'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='id пользователя (по умолчанию все пользователи)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки для bulk_create')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user'] is not None:
+            try:
+                user = get_user_model().objects.get(pk=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Пользователь {options['user']} не найден")
+
+        created = rebuild_all(user=user, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Создано строк DailyLedger: {created}'))
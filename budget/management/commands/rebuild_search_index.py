@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from budget.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс транзакций (FTS5) по описаниям, категориям и тегам'
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            self.stdout.write('Поисковый индекс FTS5 есть только в SQLite')
+            return
+        with transaction.atomic():
+            count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано транзакций: {count}'))
@@ -0,0 +1,115 @@
+import datetime
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from django.core.management.base import BaseCommand
+
+PRODUCTS = ['Молоко 2,5%', 'Хлеб бородинский', 'Сыр российский', 'Яблоки', 'Кофе молотый', 'Бананы',
+            'Макароны', 'Гречка', 'Масло сливочное', 'Яйца С1', 'Шоколад', 'Вода питьевая']
+
+
+def stub_receipt(qrraw):
+    """
+    Чек в формате proverkacheka, однозначно построенный по строке QR-кода
+    (t=...&s=...&fn=...&i=...&fp=...&n=...): сумма и реквизиты берутся из строки,
+    позиции выбираются псевдослучайно по ней же
+    """
+    fields = {key: values[0] for key, values in parse_qs(qrraw).items()}
+    when = datetime.datetime.strptime(fields['t'][:13], '%Y%m%dT%H%M')
+    total = round(float(fields['s']) * 100)
+
+    rnd = random.Random(qrraw)
+    names = rnd.sample(PRODUCTS, rnd.randint(1, 5))
+    sums = [total // len(names)] * len(names)
+    sums[-1] += total - sum(sums)
+    items = []
+    for name, item_sum in zip(names, sums):
+        quantity = rnd.choice([1, 1, 2, 3])
+        items.append({'name': name, 'price': item_sum // quantity, 'quantity': quantity, 'sum': item_sum})
+
+    return {
+        'dateTime': when.isoformat(),
+        'totalSum': total,
+        'fiscalDriveNumber': fields.get('fn'),
+        'fiscalDocumentNumber': int(fields.get('i', 0)),
+        'fiscalSign': int(fields.get('fp', 0)),
+        'operationType': int(fields.get('n', 1)),
+        'user': 'ООО "Тестовый магазин"',
+        'items': items,
+    }
+
+
+def make_server(host='127.0.0.1', port=8765, delay=0, fail_rate=0, fail_first=0, log=None):
+    """
+    HTTP-сервер заглушки (ещё не запущен). port=0 - свободный порт;
+    server.requests - число принятых запросов. Первые fail_first запросов
+    и доля fail_rate остальных получают 503
+    """
+    lock = threading.Lock()
+    rnd = random.Random(0)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8')
+            qrraw = parse_qs(body).get('qrraw', [''])[0]
+            with lock:
+                server.requests += 1
+                failed = server.requests <= fail_first or rnd.random() < fail_rate
+            if delay:
+                time.sleep(delay)
+
+            if failed:
+                status, payload = 503, {'code': 5, 'data': 'Сервис временно недоступен'}
+            else:
+                try:
+                    status, payload = 200, {'code': 1, 'data': {'json': stub_receipt(qrraw)}}
+                except (KeyError, ValueError):
+                    status, payload = 200, {'code': 0, 'data': 'Чек некорректен'}
+
+            content = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            try:
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+            except ConnectionError:
+                # Клиент не дождался ответа (таймаут)
+                pass
+
+        def log_message(self, format, *args):
+            if log is not None:
+                log(f'[{server.requests}] {format % args}')
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.requests = 0
+    return server
+
+
+class Command(BaseCommand):
+    help = ('Локальная заглушка сервиса проверки чеков для разработки, тестов и замеров: '
+            'отвечает как proverkacheka (RECEIPT_API_URL=http://127.0.0.1:<port>/api/v1/check/get)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--delay', type=float, default=0, help='Задержка ответа, с')
+        parser.add_argument('--fail-rate', type=float, default=0, help='Доля ответов 503')
+        parser.add_argument('--fail-first', type=int, default=0, help='Сколько первых запросов получают 503')
+
+    def handle(self, *args, **options):
+        server = make_server(options['host'], options['port'], delay=options['delay'],
+                             fail_rate=options['fail_rate'], fail_first=options['fail_first'],
+                             log=self.stdout.write)
+        self.stdout.write(f'Заглушка сервиса чеков: http://{options["host"]}:{options["port"]}/api/v1/check/get')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
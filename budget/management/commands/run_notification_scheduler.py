@@ -0,0 +1,52 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from budget.notifications import NOTIFICATION_BATCH_SIZE, NOTIFICATION_WINDOW_DAYS, Scheduler, get_backend
+
+BACKENDS = {
+    'console': 'budget.notifications.ConsoleBackend',
+    'file': 'budget.notifications.FileBackend',
+}
+
+
+class Command(BaseCommand):
+    help = ('Процесс-планировщик уведомлений о транзакциях (notification_frequency): '
+            'спит до ближайшего уведомления в очереди и отправляет его через бэкенд')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default=None,
+                            help='console, file или путь к классу (по умолчанию NOTIFICATION_BACKEND)')
+        parser.add_argument('--file', default=None, help='Файл для бэкенда file')
+        parser.add_argument('--since', type=datetime.datetime.fromisoformat, default=None,
+                            help='Отправить и пропущенные уведомления начиная с этого времени (YYYY-MM-DDTHH:MM)')
+        parser.add_argument('--batch-size', type=int, default=NOTIFICATION_BATCH_SIZE)
+        parser.add_argument('--window-days', type=int, default=NOTIFICATION_WINDOW_DAYS)
+        parser.add_argument('--poll-interval', type=float, default=60,
+                            help='Как часто проверять новые транзакции, с')
+        parser.add_argument('--reload-interval', type=float, default=3600,
+                            help='Как часто перечитывать очередь целиком (изменённые даты), с')
+        parser.add_argument('--once', action='store_true', help='Отправить наступившие уведомления и выйти')
+
+    def handle(self, *args, **options):
+        backend = options['backend']
+        backend = get_backend(BACKENDS.get(backend, backend), stream=self.stdout, path=options['file'])
+        scheduler = Scheduler(backend, since=options['since'], batch_size=options['batch_size'],
+                              window_days=options['window_days'])
+        if options['once']:
+            scheduler.run_pending()
+            self.stdout.write(self.style.SUCCESS(f'Отправлено уведомлений: {scheduler.sent}'))
+            return
+
+        reloaded = time.monotonic()
+        try:
+            while True:
+                scheduler.run_pending()
+                if time.monotonic() - reloaded >= options['reload_interval']:
+                    scheduler.reload(datetime.datetime.now())
+                    reloaded = time.monotonic()
+                delay = (scheduler.next_wakeup() - datetime.datetime.now()).total_seconds()
+                time.sleep(min(max(delay, 0), options['poll_interval']))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS(f'Отправлено уведомлений: {scheduler.sent}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from budget.balances import take_snapshot
+from budget.models import Account
+
+
+class Command(BaseCommand):
+    help = ('Сохраняет снимки балансов всех счетов и обновляет поле баланса '
+            '(запускать периодически, например раз в сутки)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='id пользователя (по умолчанию все пользователи)')
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.all()
+        if options['user'] is not None:
+            accounts = accounts.filter(user_id=options['user'])
+
+        count = 0
+        for account in accounts.iterator():
+            take_snapshot(account)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Снимков балансов: {count}'))
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_daily_ledger(apps, schema_editor):
+    Transaction = apps.get_model('budget', 'Transaction')
+    DailyLedger = apps.get_model('budget', 'DailyLedger')
+
+    rows = Transaction.objects.filter(permanent=False) \
+        .values('user_id', 'date', 'category_id', 'category__type') \
+        .annotate(total=models.Sum('amount'), count=models.Count('id')) \
+        .order_by()
+    DailyLedger.objects.bulk_create([
+        DailyLedger(
+            user_id=row['user_id'],
+            date=row['date'],
+            category_id=row['category_id'],
+            type=row['category__type'],
+            total=row['total'],
+            count=row['count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('budget', '0006_alter_category_icon'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='account',
+            options={'verbose_name': 'Счёт', 'verbose_name_plural': 'Счета'},
+        ),
+        migrations.AlterModelOptions(
+            name='accounttype',
+            options={'verbose_name': 'Тип счета', 'verbose_name_plural': 'Типы счетов'},
+        ),
+        migrations.AlterModelOptions(
+            name='category',
+            options={'verbose_name': 'Категория', 'verbose_name_plural': 'Категории'},
+        ),
+        migrations.AlterModelOptions(
+            name='currency',
+            options={'verbose_name': 'Валюта', 'verbose_name_plural': 'Валюты'},
+        ),
+        migrations.AlterModelOptions(
+            name='goal',
+            options={'verbose_name': 'Цель', 'verbose_name_plural': 'Цели'},
+        ),
+        migrations.AlterModelOptions(
+            name='transaction',
+            options={'verbose_name': 'Транзакция', 'verbose_name_plural': 'Транзакции'},
+        ),
+        migrations.AlterField(
+            model_name='accounttype',
+            name='name',
+            field=models.CharField(max_length=100, unique=True, verbose_name='Название'),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='icon',
+            field=models.CharField(choices=[('heartbeat', 'Уход'), ('money-bill-wave', 'Зарплата'), ('graduation-cap', 'Стипендия'), ('utensils', 'Еда'), ('tint', 'Вода'), ('gift', 'Подарок'), ('user-alt', 'Пенсия'), ('home', 'Аренда'), ('hand-holding-usd', 'Кэшбек'), ('bus', 'Транспорт'), ('building', 'Жилье'), ('phone', 'Связь'), ('tshirt', 'Одежда и обувь'), ('heartbeat', 'Здоровье'), ('film', 'Развлечение и досуг'), ('book', 'Образование'), ('paw', 'Домашние животные'), ('dumbbell', 'Спорт'), ('shopping-cart', 'Магазин'), ('money-bill', 'Банкнота'), ('wallet', 'Кошелек'), ('credit-card', 'Кредитная карта'), ('piggy-bank', 'Копилка'), ('coins', 'Монеты'), ('chart-line', 'Линейный график'), ('chart-bar', 'Гистограмма'), ('chart-pie', 'Круговая диаграмма'), ('balance-scale', 'Весы'), ('file-invoice-dollar', 'Счет-фактура в долларах'), ('receipt', 'Квитанция'), ('calculator', 'Калькулятор'), ('calendar-alt', 'Календарь'), ('hand-holding-usd', 'Рука, держащая доллар'), ('donate', 'Пожертвование'), ('file-alt', 'Документ'), ('shopping-cart', 'Корзина покупок'), ('exchange-alt', 'Обмен'), ('money-check-alt', 'Чек'), ('business-time', 'Рабочее время'), ('sack-dollar', 'Мешок с долларами'), ('cash-register', 'Кассовый аппарат'), ('handshake', 'Рукопожатие'), ('chart-area', 'Площадная диаграмма'), ('briefcase', 'Портфель'), ('clipboard', 'Блокнот'), ('file-contract', 'Договор'), ('cogs', 'Шестеренки'), ('chart-line', 'Линейный график'), ('comments-dollar', 'Комментарии в долларах'), ('gift', 'Подарок'), ('percent', 'Процент'), ('arrow-down', 'Стрелка вниз'), ('arrow-up', 'Стрелка вверх'), ('chart-pie', 'Круговая диаграмма'), ('arrow-left', 'Стрелка влево'), ('arrow-right', 'Стрелка вправо'), ('clipboard-list', 'Список дел'), ('tasks', 'Задачи'), ('lock', 'Замок'), ('unlock', 'Разблокировать'), ('users', 'Пользователи'), ('user', 'Пользователь'), ('user-tie', 'Пользователь с галстуком')], max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='currency',
+            name='exchange_rate',
+            field=models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Курс обмена'),
+        ),
+        migrations.AlterField(
+            model_name='currency',
+            name='name',
+            field=models.CharField(max_length=50, unique=True, verbose_name='Название'),
+        ),
+        migrations.CreateModel(
+            name='DailyLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('type', models.CharField(choices=[('I', 'Доход'), ('E', 'Расход'), ('T', 'Перевод')], max_length=1)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='budget.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Дневной итог',
+                'verbose_name_plural': 'Дневные итоги',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyledger',
+            constraint=models.UniqueConstraint(fields=('user', 'date', 'category', 'type'), name='unique_daily_ledger'),
+        ),
+        migrations.RunPython(fill_daily_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('budget', '0008_ledgerversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('forecast_type', models.CharField(choices=[('days', 'Дни'), ('months', 'Месяцы')], max_length=10)),
+                ('horizon', models.PositiveIntegerField()),
+                ('expenses', models.JSONField(default=list)),
+                ('incomes', models.JSONField(default=list)),
+                ('ledger_version', models.PositiveBigIntegerField(default=0)),
+                ('fitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Снимок прогноза',
+                'verbose_name_plural': 'Снимки прогнозов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='forecastsnapshot',
+            constraint=models.UniqueConstraint(fields=('user', 'forecast_type'), name='unique_forecast_snapshot'),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def fill_account_entries(apps, schema_editor):
+    """
+    Проводки по существующим транзакциям и начальный остаток, при котором
+    баланс по проводкам совпадает с текущим полем баланса счёта
+    """
+    import datetime
+    from decimal import Decimal
+
+    Account = apps.get_model('budget', 'Account')
+    AccountEntry = apps.get_model('budget', 'AccountEntry')
+    BalanceSnapshot = apps.get_model('budget', 'BalanceSnapshot')
+    Transaction = apps.get_model('budget', 'Transaction')
+
+    signs = {'I': 1, 'E': -1}
+    entries = [
+        AccountEntry(
+            account_id=row['account_id'],
+            transaction_id=row['pk'],
+            kind='transaction',
+            date=row['date'],
+            amount=signs[row['category__type']] * row['amount'],
+        )
+        for row in Transaction.objects.filter(permanent=False, category__type__in=signs)
+        .values('pk', 'account_id', 'date', 'amount', 'category__type')
+        .iterator()
+    ]
+    AccountEntry.objects.bulk_create(entries, batch_size=1000)
+
+    today = datetime.date.today()
+    for account in Account.objects.all().iterator():
+        current = account.initial_balance if account.account_type_id == 1 else account.balance
+        account_entries = AccountEntry.objects.filter(account=account)
+        posted = account_entries.filter(date__lte=today).aggregate(total=models.Sum('amount'))['total'] or Decimal(0)
+        first_date = account_entries.aggregate(first=models.Min('date'))['first'] or today
+        opening_date = min(first_date, account.opening_date or today, today)
+        AccountEntry.objects.create(account=account, kind='opening', date=opening_date, amount=(current or 0) - posted)
+        BalanceSnapshot.objects.create(
+            account=account,
+            date=today,
+            last_entry_id=account_entries.aggregate(last=models.Max('pk'))['last'],
+            balance=current or 0,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0009_forecastsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('last_entry_id', models.BigIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='budget.account')),
+            ],
+            options={
+                'verbose_name': 'Снимок баланса',
+                'verbose_name_plural': 'Снимки балансов',
+                'indexes': [models.Index(fields=['account', 'date'], name='budget_snapshot_account_date')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transfer_id', models.UUIDField(blank=True, null=True)),
+                ('kind', models.CharField(choices=[('opening', 'Начальный остаток'), ('transaction', 'Транзакция'), ('transfer', 'Перевод'), ('adjustment', 'Корректировка')], max_length=20)),
+                ('date', models.DateField(default=django.utils.timezone.now)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='budget.account')),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='budget.transaction')),
+            ],
+            options={
+                'verbose_name': 'Проводка',
+                'verbose_name_plural': 'Проводки',
+                'indexes': [models.Index(fields=['account', 'date'], name='budget_entry_account_date')],
+            },
+        ),
+        migrations.RunPython(fill_account_entries, migrations.RunPython.noop),
+    ]
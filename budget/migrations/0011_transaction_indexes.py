@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0010_accountentry_balancesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'date'], name='budget_tx_user_date'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('permanent', True)), fields=['user', 'date'], name='budget_tx_permanent_date'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('budget', '0011_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pattern', models.CharField(max_length=200, verbose_name='Подстрока описания')),
+                ('priority', models.PositiveIntegerField(default=100, verbose_name='Приоритет')),
+            ],
+            options={
+                'verbose_name': 'Правило категории',
+                'verbose_name_plural': 'Правила категорий',
+                'ordering': ['priority', 'pk'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='import_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('import_hash', ''), _negated=True), fields=('account', 'import_hash'), name='unique_transaction_import_hash'),
+        ),
+        migrations.AddField(
+            model_name='categoryrule',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='budget.category', verbose_name='Категория'),
+        ),
+        migrations.AddField(
+            model_name='categoryrule',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0012_categoryrule_transaction_import_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='materialized_until',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='recurrence',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='budget.transaction'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(fields=('recurrence', 'date'), name='unique_transaction_occurrence'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0013_transaction_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('notification_frequency', ''), _negated=True), fields=['date'], name='budget_tx_notify_date'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Поисковый индекс транзакций (budget.search). FTS5 есть только в SQLite,
+# на других базах поиск работает через icontains
+CREATE_SQL = '''
+    CREATE VIRTUAL TABLE budget_transaction_fts USING fts5(
+        description, category, tags,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+'''
+
+FILL_SQL = '''
+    INSERT INTO budget_transaction_fts (rowid, description, category, tags)
+    SELECT t.id, t.description, c.name, COALESCE(group_concat(tag.name, ' '), '')
+    FROM budget_transaction t
+    JOIN budget_category c ON c.id = t.category_id
+    LEFT JOIN taggit_taggeditem ti ON ti.object_id = t.id AND ti.content_type_id = %s
+    LEFT JOIN taggit_tag tag ON tag.id = ti.tag_id
+    GROUP BY t.id
+'''
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    content_type = apps.get_model('contenttypes', 'ContentType').objects \
+        .filter(app_label='budget', model='transaction').first()
+    schema_editor.execute(CREATE_SQL)
+    schema_editor.execute(FILL_SQL, [content_type.pk if content_type else None])
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE budget_transaction_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0014_transaction_notify_index'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
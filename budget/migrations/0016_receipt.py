@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0015_transaction_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Receipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qr_hash', models.CharField(max_length=40, unique=True)),
+                ('qrraw', models.TextField()),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Чек',
+                'verbose_name_plural': 'Чеки',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0016_receipt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('sum', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('receipt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='budget.receipt')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipt_items', to='budget.transaction')),
+            ],
+            options={
+                'verbose_name': 'Позиция чека',
+                'verbose_name_plural': 'Позиции чеков',
+                'indexes': [models.Index(fields=['name'], name='budget_receiptitem_name')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:20
+
+from urllib.parse import parse_qs
+
+from django.db import migrations, models
+
+
+def fill_fiscal_key(apps, schema_editor):
+    Receipt = apps.get_model('budget', 'Receipt')
+
+    seen = set()
+    receipts = []
+    for receipt in Receipt.objects.order_by('pk'):
+        fields = {key: values[0] for key, values in parse_qs(receipt.qrraw.strip()).items()}
+        try:
+            key = tuple(str(int(fields[name])) for name in ('fn', 'i', 'fp'))
+        except (KeyError, ValueError):
+            continue
+        # Повторные записи того же чека остаются без реквизитов
+        if key in seen:
+            continue
+        seen.add(key)
+        receipt.fn, receipt.i, receipt.fp = key
+        receipts.append(receipt)
+    Receipt.objects.bulk_update(receipts, ['fn', 'i', 'fp'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0017_receiptitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='fn',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='i',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='fp',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.RunPython(fill_fiscal_key, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='receipt',
+            constraint=models.UniqueConstraint(fields=('fn', 'i', 'fp'), name='unique_receipt_fiscal_key'),
+        ),
+    ]
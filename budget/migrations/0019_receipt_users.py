@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_receipt_users(apps, schema_editor):
+    ReceiptItem = apps.get_model('budget', 'ReceiptItem')
+    Receipt = apps.get_model('budget', 'Receipt')
+
+    # Владельцы чеков, уже привязанных к транзакциям
+    rows = ReceiptItem.objects.filter(receipt__isnull=False) \
+        .values_list('receipt_id', 'transaction__user_id') \
+        .distinct()
+    Receipt.users.through.objects.bulk_create([
+        Receipt.users.through(receipt_id=receipt_id, user_id=user_id) for receipt_id, user_id in rows
+    ], batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('budget', '0018_receipt_fiscal_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='users',
+            field=models.ManyToManyField(blank=True, related_name='receipts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(fill_receipt_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations
+
+# Поисковый индекс с токеном владельца ('u<id пользователя>'): запрос отбирает
+# строки пользователя по индексу FTS5, а не фильтрует все совпадения после ранжирования
+CREATE_SQL = '''
+    CREATE VIRTUAL TABLE budget_transaction_fts USING fts5(
+        description, category, tags, owner,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+'''
+
+FILL_SQL = '''
+    INSERT INTO budget_transaction_fts (rowid, description, category, tags, owner)
+    SELECT t.id, t.description, c.name, COALESCE(group_concat(tag.name, ' '), ''), 'u' || t.user_id
+    FROM budget_transaction t
+    JOIN budget_category c ON c.id = t.category_id
+    LEFT JOIN taggit_taggeditem ti ON ti.object_id = t.id AND ti.content_type_id = %s
+    LEFT JOIN taggit_tag tag ON tag.id = ti.tag_id
+    GROUP BY t.id
+'''
+
+OLD_CREATE_SQL = '''
+    CREATE VIRTUAL TABLE budget_transaction_fts USING fts5(
+        description, category, tags,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+'''
+
+OLD_FILL_SQL = '''
+    INSERT INTO budget_transaction_fts (rowid, description, category, tags)
+    SELECT t.id, t.description, c.name, COALESCE(group_concat(tag.name, ' '), '')
+    FROM budget_transaction t
+    JOIN budget_category c ON c.id = t.category_id
+    LEFT JOIN taggit_taggeditem ti ON ti.object_id = t.id AND ti.content_type_id = %s
+    LEFT JOIN taggit_tag tag ON tag.id = ti.tag_id
+    GROUP BY t.id
+'''
+
+
+def recreate_fts(create_sql, fill_sql):
+    def recreate(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        content_type = apps.get_model('contenttypes', 'ContentType').objects \
+            .filter(app_label='budget', model='transaction').first()
+        schema_editor.execute('DROP TABLE IF EXISTS budget_transaction_fts')
+        schema_editor.execute(create_sql)
+        schema_editor.execute(fill_sql, [content_type.pk if content_type else None])
+    return recreate
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0019_receipt_users'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_fts(CREATE_SQL, FILL_SQL), recreate_fts(OLD_CREATE_SQL, OLD_FILL_SQL)),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0020_transaction_fts_owner'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='budget_tx_notify_date',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(models.Q(('notification_frequency', ''), _negated=True), ('permanent', False)), fields=['date'], name='budget_tx_notify_date'),
+        ),
+    ]
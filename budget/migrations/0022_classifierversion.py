@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('budget', '0021_transaction_notify_index_permanent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassifierVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Версия классификатора',
+                'verbose_name_plural': 'Версии классификатора',
+            },
+        ),
+    ]
@@ -152,6 +152,62 @@ class Goal(models.Model):
         verbose_name_plural = "Цели"
 
 
+class TransactionQuerySet(models.QuerySet):
+    """
+    bulk_create, bulk_update и update не вызывают сигналы, поэтому после них
+    пересчитываются затронутые дни в DailyLedger, проводки по счетам, поисковый
+    индекс и сводка главной страницы (bulk_create и update пропускают это при sync=False).
+    delete() рассылает pre_delete/post_delete для каждой записи и отдельной обработки не требует
+    """
+
+    def sync_changes(self, days, pks):
+        """
+        Пересчёт производных данных для изменённых транзакций: days - пары
+        (user_id, date), pks - id транзакций. Вызывается сам после массовых
+        операций или явно после серии bulk_create(..., sync=False)
+        """
+        from .balances import sync_transaction_entries
+        from .dashboard import invalidate_dashboard
+        from .ledger import rebuild_days
+        from .search import index_transactions
+
+        rebuild_days(days)
+        sync_transaction_entries(pks)
+        index_transactions(pks)
+        invalidate_dashboard(user_id for user_id, _ in days)
+
+    def bulk_create(self, objs, *args, sync=True, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if sync:
+            self.sync_changes({(obj.user_id, obj.date) for obj in objs},
+                              [obj.pk for obj in objs if obj.pk is not None])
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        days = set(self.filter(pk__in=[obj.pk for obj in objs]).values_list('user_id', 'date'))
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        self.sync_changes(days | {(obj.user_id, obj.date) for obj in objs}, [obj.pk for obj in objs])
+        return rows
+
+    def update(self, *, sync=True, **kwargs):
+        """
+        sync=False - для служебных полей, не влияющих на итоги, проводки и поиск
+        (например, materialized_until): производные данные не пересчитываются
+        """
+        if not sync:
+            return super().update(**kwargs)
+        rows = list(self.values_list('pk', 'user_id', 'date'))
+        updated = super().update(**kwargs)
+        if updated:
+            days = {(user_id, date) for _, user_id, date in rows}
+            pks = [pk for pk, _, _ in rows]
+            if {'user', 'user_id', 'date'} & set(kwargs):
+                days |= set(self.model.objects.filter(pk__in=pks).values_list('user_id', 'date'))
+            self.sync_changes(days, pks)
+        return updated
+
+
 class Transaction(models.Model):
     DAILY = 'daily'
     WEEKLY = 'weekly'
@@ -186,6 +242,14 @@ class Transaction(models.Model):
     permanent = models.BooleanField(default=False)
     frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, blank=True)
     notification_frequency = models.CharField(max_length=20, choices=NOTIFICATION_CHOICES, blank=True)
+    # Отпечаток строки банковской выписки, из которой импортирована транзакция (budget.statements)
+    import_hash = models.CharField(max_length=40, blank=True, default='')
+    # Регулярная транзакция (с частотой), повторением которой создана эта запись (budget.recurrence)
+    recurrence = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='occurrences')
+    # Для регулярной транзакции: дата, по которую наступившие повторения уже созданы записями
+    materialized_until = models.DateField(null=True, blank=True)
+
+    objects = TransactionQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.user} {self.amount} on {self.date.strftime('%Y-%m-%d')}"
@@ -193,3 +257,233 @@ class Transaction(models.Model):
     class Meta:
         verbose_name = "Транзакция"
         verbose_name_plural = "Транзакции"
+        indexes = [
+            # Лента, история, планирование, будущие суммы на главной, пересчёт дней DailyLedger:
+            # user + диапазон дат, порядок (date, id) даёт сам индекс (в SQLite id - rowid)
+            models.Index(fields=['user', 'date'], name='budget_tx_user_date'),
+            # Постоянные транзакции. Частичный индекс: условие permanent Django
+            # выражает как "permanent"/NOT "permanent", и в составной индекс оно не попадает
+            models.Index(fields=['user', 'date'], condition=models.Q(permanent=True), name='budget_tx_permanent_date'),
+            # Очередь уведомлений (budget.notifications): окно дат по всем пользователям
+            models.Index(fields=['date'], condition=~models.Q(notification_frequency='') & models.Q(permanent=False),
+                         name='budget_tx_notify_date'),
+        ]
+        constraints = [
+            # Повторный импорт той же строки выписки в тот же счёт пропускается
+            models.UniqueConstraint(fields=['account', 'import_hash'], condition=~models.Q(import_hash=''),
+                                    name='unique_transaction_import_hash'),
+            # Повторение регулярной транзакции создаётся один раз
+            models.UniqueConstraint(fields=['recurrence', 'date'], name='unique_transaction_occurrence'),
+        ]
+
+
+class DailyLedger(models.Model):
+    """
+    Дневные итоги по непостоянным транзакциям пользователя в разрезе категории и типа.
+    Поддерживается сигналами и TransactionQuerySet, пересобирается командой rebuild_daily_ledger
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    type = models.CharField(max_length=1, choices=Category.TYPE_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} {self.category} {self.total} on {self.date.strftime('%Y-%m-%d')}"
+
+    class Meta:
+        verbose_name = "Дневной итог"
+        verbose_name_plural = "Дневные итоги"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date', 'category', 'type'], name='unique_daily_ledger'),
+        ]
+
+
+class LedgerVersion(models.Model):
+    """
+    Счётчик изменений DailyLedger пользователя, используется как часть ключа кэша прогнозов
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} v{self.version}"
+
+    class Meta:
+        verbose_name = "Версия итогов"
+        verbose_name_plural = "Версии итогов"
+
+
+class ClassifierVersion(models.Model):
+    """
+    Счётчик сбросов модели категорий пользователя (budget.classifier): модель
+    в кэше процесса со старой версией переобучается
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} v{self.version}"
+
+    class Meta:
+        verbose_name = "Версия классификатора"
+        verbose_name_plural = "Версии классификатора"
+
+
+class ForecastSnapshot(models.Model):
+    """
+    Заранее рассчитанный прогноз (команда precompute_forecasts).
+    Прогноз на horizon шагов, из него отдаются первые quantity значений
+    """
+    FORECAST_TYPE_CHOICES = [
+        ('days', 'Дни'),
+        ('months', 'Месяцы'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    forecast_type = models.CharField(max_length=10, choices=FORECAST_TYPE_CHOICES)
+    horizon = models.PositiveIntegerField()
+    expenses = models.JSONField(default=list)
+    incomes = models.JSONField(default=list)
+    ledger_version = models.PositiveBigIntegerField(default=0)
+    fitted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user} {self.forecast_type} x{self.horizon} at {self.fitted_at.strftime('%Y-%m-%d %H:%M')}"
+
+    class Meta:
+        verbose_name = "Снимок прогноза"
+        verbose_name_plural = "Снимки прогнозов"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'forecast_type'], name='unique_forecast_snapshot'),
+        ]
+
+
+class AccountEntry(models.Model):
+    """
+    Проводка по счёту. Баланс счёта - сумма его проводок с датой не позже текущей.
+    Проводки только добавляются: изменение или удаление транзакции записывается
+    обратной проводкой, перевод - парой проводок с общим transfer_id
+    """
+    OPENING = 'opening'
+    TRANSACTION = 'transaction'
+    TRANSFER = 'transfer'
+    ADJUSTMENT = 'adjustment'
+
+    KIND_CHOICES = [
+        (OPENING, 'Начальный остаток'),
+        (TRANSACTION, 'Транзакция'),
+        (TRANSFER, 'Перевод'),
+        (ADJUSTMENT, 'Корректировка'),
+    ]
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    transaction = models.ForeignKey(Transaction, on_delete=models.SET_NULL, null=True, blank=True)
+    transfer_id = models.UUIDField(null=True, blank=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    date = models.DateField(default=timezone.now)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.account} {self.amount} on {self.date.strftime('%Y-%m-%d')}"
+
+    class Meta:
+        verbose_name = "Проводка"
+        verbose_name_plural = "Проводки"
+        indexes = [
+            models.Index(fields=['account', 'date'], name='budget_entry_account_date'),
+        ]
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Баланс счёта на дату date по проводкам с id не больше last_entry_id.
+    Чтение баланса - последний снимок плюс сумма более поздних проводок
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    date = models.DateField()
+    last_entry_id = models.BigIntegerField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.account} {self.balance} on {self.date.strftime('%Y-%m-%d')}"
+
+    class Meta:
+        verbose_name = "Снимок баланса"
+        verbose_name_plural = "Снимки балансов"
+        indexes = [
+            models.Index(fields=['account', 'date'], name='budget_snapshot_account_date'),
+        ]
+
+
+class CategoryRule(models.Model):
+    """
+    Правило пользователя для импорта выписок: строка с подстрокой pattern в описании
+    попадает в category. Правила проверяются по возрастанию priority
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name="Категория")
+    pattern = models.CharField(max_length=200, verbose_name="Подстрока описания")
+    priority = models.PositiveIntegerField(default=100, verbose_name="Приоритет")
+
+    def __str__(self):
+        return f'{self.pattern} -> {self.category}'
+
+    class Meta:
+        verbose_name = "Правило категории"
+        verbose_name_plural = "Правила категорий"
+        ordering = ['priority', 'pk']
+
+
+class Receipt(models.Model):
+    """
+    Чек, полученный по строке QR-кода. Чек после выдачи не меняется, поэтому ответ
+    сервиса проверки хранится и повторно не запрашивается (budget.receipts)
+    """
+    qr_hash = models.CharField(max_length=40, unique=True)
+    qrraw = models.TextField()
+    # Фискальные реквизиты из QR-кода: номер ФН, номер документа и фискальный признак
+    fn = models.CharField(max_length=20, null=True, blank=True)
+    i = models.CharField(max_length=20, null=True, blank=True)
+    fp = models.CharField(max_length=20, null=True, blank=True)
+    data = models.JSONField()
+    # Пользователи, сканировавшие или импортировавшие чек: только они могут привязать его к своей транзакции
+    users = models.ManyToManyField(User, related_name='receipts', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.qrraw
+
+    class Meta:
+        verbose_name = "Чек"
+        verbose_name_plural = "Чеки"
+        constraints = [
+            # Один чек с разными записями строки QR-кода запрашивается и импортируется один раз
+            models.UniqueConstraint(fields=['fn', 'i', 'fp'], name='unique_receipt_fiscal_key'),
+        ]
+
+
+class ReceiptItem(models.Model):
+    """
+    Позиция чека, по которому создана транзакция. Суммы в рублях
+    """
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='receipt_items')
+    receipt = models.ForeignKey(Receipt, on_delete=models.SET_NULL, null=True, blank=True)
+    name = models.CharField(max_length=255)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    quantity = models.DecimalField(max_digits=12, decimal_places=3)
+    sum = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.name} x{self.quantity} = {self.sum}"
+
+    class Meta:
+        verbose_name = "Позиция чека"
+        verbose_name_plural = "Позиции чеков"
+        indexes = [
+            # Топ товаров и история цен группируют и фильтруют позиции по названию
+            models.Index(fields=['name'], name='budget_receiptitem_name'),
+        ]
@@ -0,0 +1,219 @@
+import datetime
+import heapq
+import json
+import sys
+from collections import namedtuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .models import Transaction
+from .recurrence import occurrence_dates, recurring
+
+# За сколько дней до транзакции отправляется уведомление
+NOTIFICATION_OFFSETS = {
+    Transaction.THREE_DAYS_BEFORE: 3,
+    Transaction.ONE_DAY_BEFORE: 1,
+    Transaction.ON_EVENT_DAY: 0,
+}
+MAX_OFFSET = max(NOTIFICATION_OFFSETS.values())
+
+# Час отправки уведомлений
+NOTIFICATION_HOUR = getattr(settings, 'NOTIFICATION_HOUR', 9)
+# Сколько транзакций читается из базы за одно пополнение очереди и на сколько дней вперёд
+NOTIFICATION_BATCH_SIZE = getattr(settings, 'NOTIFICATION_BATCH_SIZE', 1000)
+NOTIFICATION_WINDOW_DAYS = getattr(settings, 'NOTIFICATION_WINDOW_DAYS', 7)
+NOTIFICATION_BACKEND = getattr(settings, 'NOTIFICATION_BACKEND', 'budget.notifications.ConsoleBackend')
+
+# Запланированное уведомление в куче: сортируется по времени отправки.
+# date - дата транзакции или повторения регулярной транзакции
+Scheduled = namedtuple('Scheduled', ['when', 'transaction_id', 'date', 'kind'])
+Notification = namedtuple('Notification', ['when', 'user_id', 'username', 'transaction_id', 'date', 'text'])
+
+KIND_NAMES = dict(Transaction.NOTIFICATION_CHOICES)
+
+
+def notify_at(date, kind):
+    return datetime.datetime.combine(date - datetime.timedelta(days=NOTIFICATION_OFFSETS[kind]),
+                                     datetime.time(NOTIFICATION_HOUR))
+
+
+class ConsoleBackend:
+    """
+    Уведомления в консоль (для локального запуска)
+    """
+
+    def __init__(self, stream=None, **kwargs):
+        self.stream = stream or sys.stdout
+
+    def send(self, notifications):
+        for notification in notifications:
+            self.stream.write(f'[{notification.when:%Y-%m-%d %H:%M}] {notification.username}: {notification.text}\n')
+        self.stream.flush()
+
+
+class FileBackend:
+    """
+    Уведомления в файл, по строке JSON на уведомление
+    """
+
+    def __init__(self, path=None, **kwargs):
+        self.path = path or getattr(settings, 'NOTIFICATION_FILE_PATH', 'notifications.jsonl')
+
+    def send(self, notifications):
+        with open(self.path, 'a', encoding='utf-8') as file:
+            for notification in notifications:
+                file.write(json.dumps({**notification._asdict(), 'when': notification.when.isoformat(),
+                                       'date': notification.date.isoformat()}, ensure_ascii=False) + '\n')
+
+
+def get_backend(backend=None, **kwargs):
+    """
+    Бэкенд уведомлений по пути к классу (по умолчанию NOTIFICATION_BACKEND)
+    """
+    return import_string(backend or NOTIFICATION_BACKEND)(**kwargs)
+
+
+class Scheduler:
+    """
+    Очередь уведомлений по времени отправки (min-куча).
+
+    В куче лежат все уведомления транзакций с датой не позже loaded_until.
+    Уведомление транзакции с более поздней датой не может наступить раньше
+    horizon, поэтому вершину кучи до horizon можно отправлять, не заглядывая
+    в базу. Когда вершина доходит до horizon, очередь пополняется следующим окном
+    дат: не больше batch_size транзакций (по индексу budget_tx_notify_date)
+    и повторения регулярных транзакций в этом окне. Постоянные транзакции - шаблоны,
+    уведомления по ним не отправляются. Процесс спит до вершины кучи, а не опрашивает все транзакции
+    """
+
+    def __init__(self, backend, since=None, batch_size=NOTIFICATION_BATCH_SIZE, window_days=NOTIFICATION_WINDOW_DAYS):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.window = datetime.timedelta(days=window_days)
+        self.heap = []
+        self.sent = 0
+        self.reload(since or datetime.datetime.now())
+
+    def reload(self, since):
+        """
+        Сбрасывает очередь: уведомления раньше since считаются уже отправленными
+        """
+        self.since = since
+        self.heap = []
+        self.loaded_until = since.date() - datetime.timedelta(days=1)
+        self.last_pk = Transaction.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    @property
+    def horizon(self):
+        return datetime.datetime.combine(self.loaded_until + datetime.timedelta(days=1 - MAX_OFFSET),
+                                         datetime.time(NOTIFICATION_HOUR))
+
+    def push(self, transaction_id, date, kind):
+        when = notify_at(date, kind)
+        if when >= self.since:
+            heapq.heappush(self.heap, Scheduled(when, transaction_id, date, kind))
+
+    def refill(self):
+        """
+        Загружает следующее окно дат после loaded_until
+        """
+        start = self.loaded_until + datetime.timedelta(days=1)
+        end = start + self.window - datetime.timedelta(days=1)
+        notified = Transaction.objects.filter(permanent=False).exclude(notification_frequency='')
+        rows = list(notified.filter(date__range=(start, end))
+                    .order_by('date', 'pk')
+                    .values_list('pk', 'date', 'notification_frequency')[:self.batch_size])
+        if len(rows) == self.batch_size:
+            if rows[-1][1] > start:
+                # Окно сокращается до последнего полностью прочитанного дня
+                end = rows[-1][1] - datetime.timedelta(days=1)
+                rows = [row for row in rows if row[1] <= end]
+            else:
+                # Первый день окна читается целиком, даже если в нём больше batch_size транзакций
+                end = start
+                rows += notified.filter(date=end, pk__gt=rows[-1][0]) \
+                    .order_by('pk') \
+                    .values_list('pk', 'date', 'notification_frequency')
+
+        for pk, date, kind in rows:
+            self.push(pk, date, kind)
+        rules = recurring().exclude(notification_frequency='').filter(date__lt=end) \
+            .values_list('pk', 'date', 'frequency', 'notification_frequency')
+        for pk, anchor, frequency, kind in rules.iterator(chunk_size=self.batch_size):
+            for date in occurrence_dates(anchor, frequency, start, end):
+                self.push(pk, date, kind)
+        self.loaded_until = end
+
+    def load_new(self):
+        """
+        Добавляет транзакции, созданные после последней загрузки, если их дата
+        уже попала в загруженное окно (по первичному ключу, без просмотра остальных)
+        """
+        rows = Transaction.objects.filter(pk__gt=self.last_pk) \
+            .order_by('pk') \
+            .values_list('pk', 'date', 'notification_frequency', 'frequency', 'permanent')
+        for pk, date, kind, frequency, permanent in rows.iterator(chunk_size=self.batch_size):
+            self.last_pk = pk
+            if not kind or permanent:
+                continue
+            if date <= self.loaded_until:
+                self.push(pk, date, kind)
+            start = max(date + datetime.timedelta(days=1), self.since.date())
+            for occurrence in occurrence_dates(date, frequency, start, self.loaded_until):
+                self.push(pk, occurrence, kind)
+
+    def next_wakeup(self):
+        return min(self.heap[0].when, self.horizon) if self.heap else self.horizon
+
+    def run_pending(self, now=None):
+        """
+        Отправляет все уведомления со временем не позже now
+
+        :return: количество отправленных уведомлений
+        """
+        now = now or datetime.datetime.now()
+        self.load_new()
+        due = []
+        while True:
+            if not self.heap or self.heap[0].when >= self.horizon:
+                if self.horizon > now:
+                    break
+                self.refill()
+                continue
+            if self.heap[0].when > now:
+                break
+            due.append(heapq.heappop(self.heap))
+
+        notifications = self.check(due)
+        if notifications:
+            self.backend.send(notifications)
+        self.since = max(self.since, now)
+        self.sent += len(notifications)
+        return len(notifications)
+
+    def check(self, due):
+        """
+        Уведомления для наступивших записей очереди. Транзакция перечитывается
+        одним запросом на всю пачку: удалённые и изменённые после загрузки пропускаются
+        """
+        rows = {
+            row['pk']: row
+            for row in Transaction.objects.filter(pk__in={item.transaction_id for item in due}).values(
+                'pk', 'user_id', 'user__username', 'date', 'frequency', 'notification_frequency', 'permanent',
+                'amount', 'description', 'category__name',
+            )
+        }
+        notifications = []
+        for item in due:
+            row = rows.get(item.transaction_id)
+            if row is None or row['permanent'] or row['notification_frequency'] != item.kind:
+                continue
+            if row['date'] != item.date and not occurrence_dates(row['date'], row['frequency'], item.date, item.date):
+                continue
+            text = f'{item.date:%d.%m.%Y} {row["category__name"]} {row["amount"]} ₽'
+            if row['description']:
+                text += f' ({row["description"]})'
+            notifications.append(Notification(item.when, row['user_id'], row['user__username'], item.transaction_id,
+                                              item.date, f'{KIND_NAMES[item.kind]}: {text}'))
+        return notifications
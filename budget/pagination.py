@@ -0,0 +1,70 @@
+import datetime
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Q
+
+# Размер страницы ленты транзакций и верхняя граница для параметра limit
+TRANSACTION_PAGE_SIZE = getattr(settings, 'TRANSACTION_PAGE_SIZE', 50)
+TRANSACTION_PAGE_SIZE_MAX = getattr(settings, 'TRANSACTION_PAGE_SIZE_MAX', 200)
+
+# Страница ленты: записи и курсор следующей страницы (None - страница последняя)
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor'])
+
+
+def encode_cursor(date, pk):
+    return f'{date.isoformat()}_{pk}'
+
+
+def decode_cursor(cursor):
+    """
+    Курсор вида 'YYYY-MM-DD_id' - ключ последней показанной записи
+
+    :raise ValueError: курсор повреждён
+    """
+    date, _, pk = cursor.partition('_')
+    return datetime.date.fromisoformat(date), int(pk)
+
+
+def page_size(value):
+    """
+    Размер страницы из параметра запроса, ограниченный TRANSACTION_PAGE_SIZE_MAX
+    """
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return TRANSACTION_PAGE_SIZE
+    return min(max(size, 1), TRANSACTION_PAGE_SIZE_MAX)
+
+
+def keyset_page(queryset, cursor=None, size=TRANSACTION_PAGE_SIZE):
+    """
+    Страница записей по убыванию (date, id), начиная после курсора.
+
+    Вместо OFFSET используется условие на ключ последней записи предыдущей
+    страницы, поэтому стоимость запроса не зависит от того, насколько далеко
+    пролистана история. Берётся на одну запись больше, чтобы узнать, есть ли продолжение
+    """
+    queryset = queryset.order_by('-date', '-pk')
+    if cursor:
+        date, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(date__lt=date) | Q(date=date, pk__lt=pk))
+
+    items = list(queryset[:size + 1])
+    if len(items) <= size:
+        return KeysetPage(items, None)
+    items = items[:size]
+    return KeysetPage(items, encode_cursor(items[-1].date, items[-1].pk))
+
+
+def group_by_date(items):
+    """
+    Группы записей с одинаковой датой в порядке следования: [(date, [записи])]
+    """
+    groups = []
+    for item in items:
+        if groups and groups[-1][0] == item.date:
+            groups[-1][1].append(item)
+        else:
+            groups.append((item.date, [item]))
+    return groups
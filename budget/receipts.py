@@ -0,0 +1,338 @@
+import datetime
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import Receipt, ReceiptItem, Transaction
+from .statements import CategoryMatcher
+
+RECEIPT_API_URL = getattr(settings, 'RECEIPT_API_URL', 'https://proverkacheka.com/api/v1/check/get')
+RECEIPT_API_TOKEN = getattr(settings, 'RECEIPT_API_TOKEN', '26817.m8ytY4omnqvUob2Sq')
+# Таймауты соединения и чтения одной попытки, с
+RECEIPT_TIMEOUT = getattr(settings, 'RECEIPT_TIMEOUT', (3.05, 10))
+# Повторы при сетевых ошибках и ответах 429/5xx, пауза между ними растёт как backoff * 2^n
+RECEIPT_RETRIES = getattr(settings, 'RECEIPT_RETRIES', 2)
+RECEIPT_BACKOFF = getattr(settings, 'RECEIPT_BACKOFF', 0.5)
+RECEIPT_POOL_SIZE = getattr(settings, 'RECEIPT_POOL_SIZE', 10)
+# Сколько чеков пакетного импорта запрашивается одновременно (не больше пула соединений)
+RECEIPT_IMPORT_WORKERS = getattr(settings, 'RECEIPT_IMPORT_WORKERS', RECEIPT_POOL_SIZE)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Реквизиты чека из строки QR-кода; fn, i и fp - строки цифр без ведущих нулей
+QrCode = namedtuple('QrCode', ['qrraw', 'datetime', 'total', 'fn', 'i', 'fp', 'operation'])
+ReceiptImportResult = namedtuple('ReceiptImportResult', ['created', 'skipped', 'errors'])
+
+QR_FIELDS = ('t', 's', 'fn', 'i', 'fp', 'n')
+QR_TIME_FORMATS = ('%Y%m%dT%H%M%S', '%Y%m%dT%H%M')
+# Тип категории по признаку расчёта n: приход и возврат расхода - траты покупателя
+OPERATION_TYPES = {1: 'E', 2: 'I', 3: 'I', 4: 'E'}
+
+
+class ReceiptError(Exception):
+    pass
+
+
+def qr_hash(qrraw):
+    return hashlib.sha1(qrraw.encode('utf-8')).hexdigest()
+
+
+def parse_qr(qrraw):
+    """
+    Реквизиты чека из строки QR-кода (t=20240102T1706&s=200.00&fn=...&i=...&fp=...&n=1)
+    без обращения к сервису
+
+    :raise ReceiptError: строка пустая или не похожа на QR-код чека
+    """
+    qrraw = (qrraw or '').strip()
+    if not qrraw:
+        raise ReceiptError('Пустая строка QR-кода')
+    fields = {key: values[0] for key, values in parse_qs(qrraw).items()}
+    missing = [name for name in QR_FIELDS if name not in fields]
+    if missing:
+        raise ReceiptError(f'В QR-коде нет полей: {", ".join(missing)}')
+
+    for time_format in QR_TIME_FORMATS:
+        try:
+            when = datetime.datetime.strptime(fields['t'], time_format)
+            break
+        except ValueError:
+            continue
+    else:
+        raise ReceiptError(f'Некорректное время в QR-коде: {fields["t"]}')
+    try:
+        total = Decimal(fields['s'])
+    except InvalidOperation:
+        raise ReceiptError(f'Некорректная сумма в QR-коде: {fields["s"]}')
+    if not all(fields[name].isdigit() for name in ('fn', 'i', 'fp', 'n')) or int(fields['n']) not in OPERATION_TYPES:
+        raise ReceiptError('Некорректные фискальные реквизиты в QR-коде')
+    return QrCode(qrraw, when, total, str(int(fields['fn'])), str(int(fields['i'])), str(int(fields['fp'])),
+                  int(fields['n']))
+
+
+def fiscal_key(code):
+    return code.fn, code.i, code.fp
+
+
+def fiscal_hash(code):
+    """
+    Отпечаток чека для Transaction.import_hash: повторный импорт того же чека пропускается
+    """
+    return hashlib.sha1('receipt|{}|{}|{}'.format(*fiscal_key(code)).encode('utf-8')).hexdigest()
+
+
+class ReceiptClient:
+    """
+    Клиент сервиса проверки чеков: одна сессия requests с пулом соединений
+    на процесс, таймауты на каждую попытку и ограниченные повторы с паузой.
+    requests импортируется при первом запросе
+    """
+
+    def __init__(self, url=RECEIPT_API_URL, token=RECEIPT_API_TOKEN, timeout=RECEIPT_TIMEOUT,
+                 retries=RECEIPT_RETRIES, backoff=RECEIPT_BACKOFF, pool_size=RECEIPT_POOL_SIZE):
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                # Запрос чека идемпотентен, поэтому POST тоже повторяется
+                retry = Retry(total=self.retries, backoff_factor=self.backoff, status_forcelist=RETRY_STATUSES,
+                              allowed_methods=frozenset({'POST'}), raise_on_status=False)
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def fetch(self, qrraw):
+        """
+        Содержимое чека (data.json ответа сервиса)
+
+        :raise ReceiptError: сервис недоступен, не ответил вовремя или не нашёл чек
+        """
+        import requests
+
+        try:
+            response = self.session.post(self.url, data={'token': self.token, 'qrraw': qrraw}, timeout=self.timeout)
+        except requests.RequestException as error:
+            raise ReceiptError(f'Сервис проверки чеков недоступен: {error}')
+        if response.status_code != 200:
+            raise ReceiptError(f'Сервис проверки чеков ответил {response.status_code}')
+        try:
+            payload = response.json()
+        except ValueError:
+            raise ReceiptError('Сервис проверки чеков вернул не JSON')
+
+        data = payload.get('data') if isinstance(payload, dict) else None
+        if not isinstance(data, dict) or not isinstance(data.get('json'), dict):
+            raise ReceiptError(f'Чек не найден: {data}')
+        return data['json']
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+receipt_client = ReceiptClient()
+
+
+def get_receipt(qrraw, client=None, user=None):
+    """
+    Чек по строке QR-кода: из базы, а при первом сканировании - из сервиса
+    проверки. Ошибки сервиса не сохраняются, следующее сканирование повторит запрос.
+    Пользователь user записывается в сканировавшие чек
+
+    :raise ReceiptError: строка не похожа на QR-код чека или ошибка сервиса
+    """
+    code = parse_qr(qrraw)
+    fn, i, fp = fiscal_key(code)
+    receipt = Receipt.objects.filter(fn=fn, i=i, fp=fp).first()
+    if receipt is None:
+        data = (client or receipt_client).fetch(code.qrraw)
+        try:
+            with transaction.atomic():
+                receipt = Receipt.objects.create(qr_hash=qr_hash(code.qrraw), qrraw=code.qrraw,
+                                                 fn=fn, i=i, fp=fp, data=data)
+        except IntegrityError:
+            # Тот же чек параллельно сохранил другой запрос
+            receipt = Receipt.objects.get(fn=fn, i=i, fp=fp)
+    if user is not None:
+        receipt.users.add(user)
+    return receipt
+
+
+def stored_receipts(codes):
+    """
+    Сохранённые чеки по фискальным реквизитам одним запросом (индекс unique_receipt_fiscal_key)
+    """
+    keys = {fiscal_key(code) for code in codes}
+    if not keys:
+        return {}
+    receipts = Receipt.objects.filter(fn__in={fn for fn, _, _ in keys})
+    return {
+        (receipt.fn, receipt.i, receipt.fp): receipt
+        for receipt in receipts
+        if (receipt.fn, receipt.i, receipt.fp) in keys
+    }
+
+
+def fetch_receipts(codes, client=None, workers=RECEIPT_IMPORT_WORKERS):
+    """
+    Запрашивает чеки у сервиса пулом из workers потоков: ожидание ответов
+    сервиса идёт параллельно, а не по очереди. Потоки не обращаются к базе
+
+    :return: список (код, данные чека) и список ошибок (строка QR-кода, текст)
+    """
+    client = client or receipt_client
+    codes = list(codes)
+    fetched, errors = [], []
+    if not codes:
+        return fetched, errors
+    with ThreadPoolExecutor(max_workers=min(workers, len(codes))) as executor:
+        futures = [(code, executor.submit(client.fetch, code.qrraw)) for code in codes]
+        for code, future in futures:
+            try:
+                fetched.append((code, future.result()))
+            except ReceiptError as error:
+                errors.append((code.qrraw, str(error)))
+    return fetched, errors
+
+
+def receipt_total(data):
+    """
+    Сумма чека в рублях (в ответе сервиса суммы в копейках)
+    """
+    return sum(Decimal(item['sum']) for item in data.get('items', [])) / 100
+
+
+def receipt_description(data):
+    return ', '.join(item['name'] for item in data.get('items', []))
+
+
+def receipt_date(data):
+    return datetime.datetime.fromisoformat(data['dateTime']).date()
+
+
+def receipt_items(transaction_obj, receipt):
+    """
+    Позиции чека для транзакции (не сохранены); копейки сервиса переводятся в рубли
+    """
+    return [
+        ReceiptItem(
+            transaction=transaction_obj,
+            receipt=receipt,
+            name=item['name'].strip()[:ReceiptItem._meta.get_field('name').max_length],
+            price=Decimal(item.get('price', item['sum'])) / 100,
+            quantity=Decimal(str(item.get('quantity', 1))),
+            sum=Decimal(item['sum']) / 100,
+        )
+        for item in receipt.data.get('items', [])
+    ]
+
+
+def save_receipt_items(transaction_obj, receipt):
+    """
+    Записывает позиции чека транзакции одним bulk_create
+    """
+    return ReceiptItem.objects.bulk_create(receipt_items(transaction_obj, receipt))
+
+
+def import_receipts(user, account, lines, client=None, workers=RECEIPT_IMPORT_WORKERS, matcher=None):
+    """
+    Пакетный импорт чеков по строкам QR-кодов в счёт account.
+
+    Строки разбираются локально, некорректные попадают в ошибки без запроса
+    к сервису. Чеки, уже импортированные пользователем (по import_hash или по
+    позициям, сохранённым при сканировании), пропускаются. Из сервиса
+    параллельно запрашиваются только чеки, которых нет в базе; транзакции и
+    их позиции пишутся bulk_create, DailyLedger и проводки обновляются один раз
+    """
+    codes, errors, skipped = {}, [], 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            code = parse_qr(line)
+        except ReceiptError as error:
+            errors.append((line.strip(), str(error)))
+            continue
+        if fiscal_key(code) in codes:
+            skipped += 1
+        else:
+            codes[fiscal_key(code)] = code
+
+    stored = stored_receipts(codes.values())
+    hashes = {fiscal_hash(code): key for key, code in codes.items()}
+    imported = {hashes[import_hash] for import_hash in Transaction.objects.filter(
+        user=user, import_hash__in=list(hashes)).values_list('import_hash', flat=True)}
+    imported |= set(ReceiptItem.objects.filter(transaction__user=user, receipt__in=list(stored.values()))
+                    .values_list('receipt__fn', 'receipt__i', 'receipt__fp').distinct())
+    for key in imported:
+        del codes[key]
+    skipped += len(imported)
+
+    fetched, fetch_errors = fetch_receipts([code for key, code in codes.items() if key not in stored],
+                                           client=client, workers=workers)
+    errors += fetch_errors
+    if fetched:
+        Receipt.objects.bulk_create([
+            Receipt(qr_hash=qr_hash(code.qrraw), qrraw=code.qrraw, fn=code.fn, i=code.i, fp=code.fp, data=data)
+            for code, data in fetched
+        ], ignore_conflicts=True)
+        # id вставленных строк (и чеков, параллельно сохранённых другим запросом)
+        stored.update(stored_receipts(code for code, _ in fetched))
+
+    matcher = matcher or CategoryMatcher(user)
+    rows = []
+    for key, code in codes.items():
+        receipt = stored.get(key)
+        if receipt is None:
+            continue
+        description = receipt_description(receipt.data)
+        rows.append((receipt, Transaction(
+            user=user,
+            account=account,
+            category=matcher.match(description, OPERATION_TYPES[code.operation]),
+            date=code.datetime.date(),
+            amount=receipt_total(receipt.data) or code.total,
+            description=description,
+            import_hash=fiscal_hash(code),
+        )))
+    if not rows:
+        return ReceiptImportResult(0, skipped, errors)
+
+    with transaction.atomic():
+        objs = Transaction.objects.bulk_create([obj for _, obj in rows], sync=False)
+        if any(obj.pk is None for obj in objs):
+            # База не вернула id вставленных строк
+            pks = dict(Transaction.objects.filter(account=account, import_hash__in=[obj.import_hash for obj in objs])
+                       .values_list('import_hash', 'pk'))
+            for obj in objs:
+                obj.pk = pks[obj.import_hash]
+        ReceiptItem.objects.bulk_create([item for receipt, obj in rows for item in receipt_items(obj, receipt)])
+        Receipt.users.through.objects.bulk_create([
+            Receipt.users.through(receipt_id=receipt.pk, user_id=user.pk) for receipt, _ in rows
+        ], ignore_conflicts=True)
+        Transaction.objects.sync_changes({(user.pk, obj.date) for obj in objs}, [obj.pk for obj in objs])
+    return ReceiptImportResult(len(objs), skipped, errors)
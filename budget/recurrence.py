@@ -0,0 +1,160 @@
+import calendar
+import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+
+from .currency import converted_amount
+from .models import Transaction
+
+# На сколько дней вперёд повторения учитываются в планировании и в будущих суммах главной страницы
+RECURRENCE_HORIZON_DAYS = getattr(settings, 'RECURRENCE_HORIZON_DAYS', 90)
+# Сколько развёрнутых окон (правило, период) хранит кэш повторений
+RECURRENCE_CACHE_SIZE = getattr(settings, 'RECURRENCE_CACHE_SIZE', 4096)
+
+# Шаг повторения в днях или в месяцах
+DAY_STEPS = {Transaction.DAILY: 1, Transaction.WEEKLY: 7}
+MONTH_STEPS = {Transaction.MONTHLY: 1, Transaction.YEARLY: 12}
+
+
+class Occurrence:
+    """
+    Повторение регулярной транзакции на дату date, ещё не созданное записью.
+    Остальные атрибуты (категория, счёт, сумма, id для ссылок) берутся у правила
+    """
+
+    def __init__(self, rule, date):
+        self.rule = rule
+        self.date = date
+
+    def __getattr__(self, name):
+        return getattr(self.rule, name)
+
+    def __repr__(self):
+        return f'<Occurrence {self.rule.pk} {self.date}>'
+
+
+def add_months(date, months):
+    """
+    Дата через months месяцев с тем же числом; 31-е в коротком месяце становится последним днём
+    """
+    month = date.month - 1 + months
+    year, month = date.year + month // 12, month % 12 + 1
+    return date.replace(year=year, month=month, day=min(date.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence_date(anchor, frequency, number):
+    """
+    Дата повторения с номером number; повторение 0 - сама транзакция-правило
+    """
+    if frequency in DAY_STEPS:
+        return anchor + datetime.timedelta(days=DAY_STEPS[frequency] * number)
+    return add_months(anchor, MONTH_STEPS[frequency] * number)
+
+
+def first_number(anchor, frequency, day):
+    """
+    Номер первого повторения (не меньше 1) с датой не раньше day. Считается
+    арифметикой, без перебора повторений от даты правила
+    """
+    if frequency in DAY_STEPS:
+        number = -(-(day - anchor).days // DAY_STEPS[frequency])
+    else:
+        months = (day.year - anchor.year) * 12 + day.month - anchor.month
+        number = months // MONTH_STEPS[frequency]
+    number = max(number, 1)
+    while occurrence_date(anchor, frequency, number) < day:
+        number += 1
+    return number
+
+
+def count_between(anchor, frequency, start, end):
+    """
+    Количество повторений с датами в [start, end] без их развёртывания
+    """
+    if frequency not in DAY_STEPS and frequency not in MONTH_STEPS or start > end:
+        return 0
+    return first_number(anchor, frequency, end + datetime.timedelta(days=1)) - first_number(anchor, frequency, start)
+
+
+@lru_cache(maxsize=RECURRENCE_CACHE_SIZE)
+def occurrence_dates(anchor, frequency, start, end):
+    """
+    Даты повторений в [start, end]. Результат зависит только от аргументов,
+    поэтому кэшируется по значению и не требует сброса при изменении правил
+    """
+    if frequency not in DAY_STEPS and frequency not in MONTH_STEPS or start > end:
+        return ()
+    number = first_number(anchor, frequency, start)
+    last = first_number(anchor, frequency, end + datetime.timedelta(days=1))
+    return tuple(occurrence_date(anchor, frequency, n) for n in range(number, last))
+
+
+def recurring(user=None):
+    """
+    Регулярные транзакции (с заданной частотой) - правила повторений.
+    Постоянные транзакции - шаблоны, а не проводки, и не повторяются
+    """
+    rules = Transaction.objects.filter(permanent=False).exclude(frequency='')
+    if user is not None:
+        rules = rules.filter(user=user)
+    return rules
+
+
+def expand(rules, start, end):
+    """
+    Повторения правил rules с датами в [start, end] по одному, без записи в базу
+    """
+    for rule in rules:
+        for date in occurrence_dates(rule.date, rule.frequency, start, end):
+            yield Occurrence(rule, date)
+
+
+def future_totals(user, start, end):
+    """
+    Суммы ещё не созданных повторений в [start, end] в рублях по типам категорий:
+    {'I': доходы, 'E': расходы}. Повторения не разворачиваются - считается их количество
+    """
+    totals = {'I': 0, 'E': 0}
+    rules = recurring(user).values_list('date', 'frequency', 'category__type', converted_amount(None))
+    for anchor, frequency, category_type, amount in rules:
+        if category_type in totals:
+            totals[category_type] += count_between(anchor, frequency, start, end) * amount
+    return totals
+
+
+def materialize_due(user=None, today=None):
+    """
+    Создаёт записи для наступивших (по today включительно) повторений регулярных
+    транзакций. Записи создаются bulk_create, DailyLedger, проводки и сводка
+    главной страницы обновляются по ним один раз
+
+    :return: количество созданных транзакций
+    """
+    today = today or datetime.date.today()
+    rules = recurring(user).filter(date__lt=today).exclude(materialized_until__gte=today)
+    with transaction.atomic():
+        occurrences, materialized = [], []
+        for rule in rules.select_for_update():
+            since = max(rule.date, rule.materialized_until or rule.date) + datetime.timedelta(days=1)
+            dates = occurrence_dates(rule.date, rule.frequency, since, today)
+            if not dates:
+                continue
+            materialized.append(rule.pk)
+            occurrences += [
+                Transaction(user_id=rule.user_id, category_id=rule.category_id, account_id=rule.account_id,
+                            date=date, amount=rule.amount, description=rule.description,
+                            regular=True, recurrence=rule)
+                for date in dates
+            ]
+        if occurrences:
+            Transaction.objects.bulk_create(occurrences, sync=False)
+            pks = [obj.pk for obj in occurrences]
+            if None in pks:
+                # База не вернула id вставленных строк
+                pks = Transaction.objects.filter(recurrence__in=materialized, date__lte=today) \
+                    .values_list('pk', flat=True)
+            Transaction.objects.sync_changes({(obj.user_id, obj.date) for obj in occurrences}, pks)
+            Transaction.objects.filter(pk__in=materialized).update(materialized_until=today, sync=False)
+    return len(occurrences)
@@ -0,0 +1,172 @@
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Q
+from taggit.models import Tag, TaggedItem
+
+from .balances import SYNC_CHUNK_SIZE
+from .models import Category, Transaction
+from .pagination import TRANSACTION_PAGE_SIZE, KeysetPage
+
+# Виртуальная таблица FTS5 (миграции 0015, 0020): rowid - id транзакции,
+# колонки - описание, название категории, теги через пробел и токен владельца ('u<id>')
+FTS_TABLE = 'budget_transaction_fts'
+FTS_COLUMNS = ('description', 'category', 'tags')
+# Веса колонок в bm25: совпадение в категории или теге важнее совпадения в длинном описании,
+# токен владельца на ранг не влияет
+FTS_WEIGHTS = (1.0, 4.0, 2.0, 0.0)
+
+WORD = re.compile(r'\w+')
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def _index_sql(where=''):
+    return f'''
+        INSERT INTO {FTS_TABLE} (rowid, description, category, tags, owner)
+        SELECT t.id, t.description, c.name, COALESCE(group_concat(tag.name, ' '), ''), 'u' || t.user_id
+        FROM {Transaction._meta.db_table} t
+        JOIN {Category._meta.db_table} c ON c.id = t.category_id
+        LEFT JOIN {TaggedItem._meta.db_table} ti ON ti.object_id = t.id AND ti.content_type_id = %s
+        LEFT JOIN {Tag._meta.db_table} tag ON tag.id = ti.tag_id
+        {where}
+        GROUP BY t.id
+    '''
+
+
+def _content_type_id():
+    return ContentType.objects.get_for_model(Transaction).pk
+
+
+def index_transactions(transaction_ids):
+    """
+    Переписывает строки поискового индекса для транзакций. Строки собираются
+    одним INSERT ... SELECT на пачку, без загрузки транзакций в Python
+    """
+    if not fts_enabled():
+        return
+    transaction_ids = list(transaction_ids)
+    content_type_id = _content_type_id()
+    with connection.cursor() as cursor:
+        for start in range(0, len(transaction_ids), SYNC_CHUNK_SIZE):
+            chunk = transaction_ids[start:start + SYNC_CHUNK_SIZE]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', chunk)
+            cursor.execute(_index_sql(f'WHERE t.id IN ({placeholders})'), [content_type_id, *chunk])
+
+
+def remove_transactions(transaction_ids):
+    if not fts_enabled():
+        return
+    transaction_ids = list(transaction_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(transaction_ids), SYNC_CHUNK_SIZE):
+            chunk = transaction_ids[start:start + SYNC_CHUNK_SIZE]
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({", ".join(["%s"] * len(chunk))})', chunk)
+
+
+def rebuild_index():
+    """
+    Полностью пересобирает поисковый индекс
+
+    :return: количество проиндексированных транзакций
+    """
+    if not fts_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(_index_sql(), [_content_type_id()])
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def match_query(text):
+    """
+    Запрос FTS5 из строки пользователя: каждое слово - префикс, все слова обязательны.
+    Слова берутся в кавычки, поэтому операторы FTS5 во вводе не работают и не ломают запрос
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(text.lower()))
+
+
+def user_match_query(user_id, text):
+    """
+    Запрос FTS5 по транзакциям одного пользователя: токен владельца отбирается
+    по индексу, поэтому bm25 считается только для строк пользователя
+    """
+    query = match_query(text)
+    if not query:
+        return ''
+    columns = ' '.join(FTS_COLUMNS)
+    return f'owner:u{user_id} AND {{{columns}}}: ({query})'
+
+
+def encode_cursor(offset):
+    return str(offset)
+
+
+def decode_cursor(cursor):
+    """
+    :raise ValueError: курсор повреждён
+    """
+    offset = int(cursor)
+    if offset < 0:
+        raise ValueError(cursor)
+    return offset
+
+
+def search_transactions(user, text, cursor=None, size=TRANSACTION_PAGE_SIZE):
+    """
+    Страница транзакций пользователя, подходящих под text, по убыванию
+    релевантности (bm25, затем id). Курсор - смещение в выдаче: ранг bm25
+    зависит от статистики всего индекса и меняется между запросами, поэтому
+    сравнение с рангом последней записи ненадёжно. Выдача всё равно целиком
+    ранжируется на каждом запросе, смещение почти не добавляет работы
+
+    :raise ValueError: курсор повреждён
+    """
+    if not match_query(text):
+        return KeysetPage([], None)
+    if not fts_enabled():
+        return _search_icontains(user, text, cursor, size)
+
+    offset = decode_cursor(cursor) if cursor else 0
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(f'''
+            SELECT rowid FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY bm25({FTS_TABLE}, {weights}), rowid
+            LIMIT %s OFFSET %s
+        ''', [user_match_query(user.pk, text), size + 1, offset])
+        ranked = [pk for pk, in db_cursor.fetchall()]
+
+    has_next = len(ranked) > size
+    ranked = ranked[:size]
+    transactions = Transaction.objects.filter(user=user, pk__in=ranked) \
+        .select_related('category') \
+        .prefetch_related('tags') \
+        .in_bulk()
+    items = [transactions[pk] for pk in ranked if pk in transactions]
+    return KeysetPage(items, encode_cursor(offset + size) if has_next else None)
+
+
+def _search_icontains(user, text, cursor, size):
+    """
+    Поиск без FTS5 (не SQLite): все слова в описании, категории или тегах, по убыванию id
+    """
+    transactions = Transaction.objects.filter(user=user)
+    for word in WORD.findall(text):
+        transactions = transactions.filter(
+            Q(description__icontains=word) | Q(category__name__icontains=word) | Q(tags__name__icontains=word)
+        )
+    if cursor:
+        # Без ранга курсор - id последней записи
+        transactions = transactions.filter(pk__lt=decode_cursor(cursor))
+    items = list(transactions.distinct().select_related('category').prefetch_related('tags').order_by('-pk')[:size + 1])
+    if len(items) <= size:
+        return KeysetPage(items, None)
+    return KeysetPage(items[:size], encode_cursor(items[size - 1].pk))
@@ -0,0 +1,93 @@
+import datetime
+from collections import namedtuple
+
+import numpy as np
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import DailyLedger
+
+# Плотные ряды по дням: элемент i соответствует дате start + i дней
+DailySeries = namedtuple('DailySeries', ['start', 'incomes', 'expenses'])
+# Помесячные ряды: элемент i соответствует i-му месяцу после start (первое число месяца)
+MonthlySeries = namedtuple('MonthlySeries', ['start', 'incomes', 'expenses'])
+
+
+def build_daily_series(user, start_date, end_date):
+    """
+    Плотные ряды доходов и расходов по дням за период [start_date, end_date].
+
+    Данные за весь период берутся одним запросом к DailyLedger и раскладываются
+    по индексу (ординал даты - ординал начала) через np.bincount; дни без
+    транзакций остаются нулями.
+    """
+    if isinstance(start_date, datetime.datetime):
+        start_date = start_date.date()
+    if isinstance(end_date, datetime.datetime):
+        end_date = end_date.date()
+
+    length = max((end_date - start_date).days + 1, 0)
+    rows = DailyLedger.objects.filter(
+        user=user,
+        date__range=(start_date, end_date),
+        type__in=('I', 'E'),
+    ).values_list('date', 'type', 'total')
+
+    start_ordinal = start_date.toordinal()
+    indexes = {'I': [], 'E': []}
+    amounts = {'I': [], 'E': []}
+    for date, category_type, total in rows:
+        indexes[category_type].append(date.toordinal() - start_ordinal)
+        amounts[category_type].append(float(total))
+
+    def dense(category_type):
+        return np.bincount(
+            np.asarray(indexes[category_type], dtype=np.intp),
+            weights=np.asarray(amounts[category_type], dtype=np.float64),
+            minlength=length,
+        )
+
+    return DailySeries(start_date, dense('I'), dense('E'))
+
+
+def build_monthly_series(user, today=None, include_current=False):
+    """
+    Непрерывные помесячные ряды доходов и расходов от первого месяца с данными
+    до текущего месяца.
+
+    Группировка по месяцу (TruncMonth) и условные суммы по типу считаются в базе,
+    месяцы разных лет не смешиваются, месяцы без транзакций (и в середине, и в конце
+    истории) заполняются нулями. Текущий месяц неполный, поэтому по умолчанию
+    не включается: для модели прогноза он выглядел бы как резкое падение.
+    Транзакции с датой после последнего месяца ряда не учитываются.
+    """
+    today = today or datetime.date.today()
+    current_month = today.replace(day=1)
+    if include_current:
+        end_month = current_month
+    else:
+        end_month = (current_month - datetime.timedelta(days=1)).replace(day=1)
+    next_month = (end_month + datetime.timedelta(days=31)).replace(day=1)
+
+    rows = DailyLedger.objects.filter(user=user, type__in=('I', 'E'), date__lt=next_month) \
+        .annotate(month=TruncMonth('date')) \
+        .values('month') \
+        .annotate(incomes=Sum('total', filter=Q(type='I')), expenses=Sum('total', filter=Q(type='E'))) \
+        .order_by('month')
+    rows = list(rows)
+    if not rows:
+        return MonthlySeries(next_month, np.zeros(0), np.zeros(0))
+
+    def month_index(month):
+        return month.year * 12 + month.month - 1
+
+    start = rows[0]['month']
+    length = month_index(end_month) - month_index(start) + 1
+    incomes = np.zeros(length)
+    expenses = np.zeros(length)
+    for row in rows:
+        index = month_index(row['month']) - month_index(start)
+        incomes[index] = float(row['incomes'] or 0)
+        expenses[index] = float(row['expenses'] or 0)
+
+    return MonthlySeries(start, incomes, expenses)
@@ -0,0 +1,156 @@
+from django.db.models import QuerySet
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import m2m_changed, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+
+from .balances import balance_field, post_entries, sync_transaction_entries
+from .classifier import forget_classifier
+from .dashboard import invalidate_dashboard
+from .ledger import apply_delta, bump_versions, ledger_key, transaction_values
+from .models import Account, AccountEntry, Category, Currency, DailyLedger, Transaction
+from .search import index_transactions, remove_transactions
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_transaction(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает сохранённое состояние транзакции, чтобы вычесть его из DailyLedger
+    """
+    instance._ledger_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._ledger_previous = Transaction.objects.filter(pk=instance.pk) \
+        .values('user_id', 'date', 'category_id', 'category__type', 'amount', 'permanent') \
+        .first()
+
+
+@receiver(post_save, sender=Transaction)
+def update_ledger_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_ledger_previous', None)
+    current = transaction_values(instance)
+
+    sync_transaction_entries([instance.pk])
+    index_transactions([instance.pk])
+    invalidate_dashboard([instance.user_id, previous and previous['user_id']])
+    if previous is not None:
+        # Новые транзакции классификатор дообучает сам, изменённые требуют переобучения
+        forget_classifier([instance.user_id, previous['user_id']])
+
+    previous_key = ledger_key(previous)
+    current_key = ledger_key(current)
+    if previous_key is not None:
+        if previous_key == current_key:
+            if current['amount'] != previous['amount']:
+                apply_delta(*current_key, current['amount'] - previous['amount'], 0)
+            return
+        apply_delta(*previous_key, -previous['amount'], -1)
+    if current_key is not None:
+        apply_delta(*current_key, current['amount'], 1)
+
+
+@receiver(pre_delete, sender=Transaction)
+def reverse_entries_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Сторнирует проводки удаляемой транзакции. При каскадном удалении счёта
+    или пользователя проводки удаляются вместе со счётом
+    """
+    if isinstance(origin, Transaction) or (isinstance(origin, QuerySet) and origin.model is Transaction):
+        sync_transaction_entries([instance.pk], deleted=True)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_ledger_on_delete(sender, instance, **kwargs):
+    invalidate_dashboard([instance.user_id])
+    remove_transactions([instance.pk])
+    forget_classifier([instance.user_id])
+    values = transaction_values(instance)
+    key = ledger_key(values)
+    if key is not None:
+        apply_delta(*key, -values['amount'], -1)
+
+
+@receiver(pre_save, sender=Category)
+def remember_previous_category_name(sender, instance, raw=False, **kwargs):
+    instance._previous_name = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_name = Category.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def update_search_category_name(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created and getattr(instance, '_previous_name', None) != instance.name:
+        index_transactions(Transaction.objects.filter(category=instance).values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def update_search_tags(sender, instance, action, **kwargs):
+    """
+    Теги транзакции изменены через tags.add/remove/set/clear
+    """
+    if isinstance(instance, Transaction) and action in ('post_add', 'post_remove', 'post_clear'):
+        index_transactions([instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+def update_search_tag_name(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        content_type = ContentType.objects.get_for_model(Transaction)
+        index_transactions(TaggedItem.objects.filter(tag=instance, content_type=content_type)
+                           .values_list('object_id', flat=True))
+
+
+@receiver(post_save, sender=Category)
+def update_ledger_category_type(sender, instance, raw=False, **kwargs):
+    if not raw:
+        if DailyLedger.objects.filter(category=instance).exclude(type=instance.type).update(type=instance.type):
+            bump_versions([instance.user_id])
+            sync_transaction_entries(Transaction.objects.filter(category=instance).values_list('pk', flat=True))
+            invalidate_dashboard([instance.user_id])
+            forget_classifier([instance.user_id])
+
+
+@receiver(pre_save, sender=Account)
+def remember_previous_balance(sender, instance, raw=False, **kwargs):
+    instance._previous_balance = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_balance = Account.objects.filter(pk=instance.pk) \
+        .values_list(balance_field(instance.account_type_id), flat=True) \
+        .first()
+
+
+@receiver(post_save, sender=Account)
+def record_balance_change(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Баланс, введённый в форме счёта, записывается проводкой: начальным остатком
+    при создании и корректировкой при изменении. Поле уже содержит новое значение
+    """
+    if raw:
+        return
+    invalidate_dashboard([instance.user_id])
+    field = balance_field(instance.account_type_id)
+    balance = Account._meta.get_field(field).to_python(getattr(instance, field)) or 0
+    previous = getattr(instance, '_previous_balance', None)
+    if created or previous is None:
+        kind, amount = AccountEntry.OPENING, balance
+    else:
+        kind, amount = AccountEntry.ADJUSTMENT, balance - previous
+    post_entries([AccountEntry(account=instance, kind=kind, amount=amount)], update_balances=False)
+
+
+@receiver(post_delete, sender=Account)
+def invalidate_dashboard_on_account_delete(sender, instance, **kwargs):
+    invalidate_dashboard([instance.user_id])
+
+
+@receiver(post_save, sender=Currency)
+def invalidate_dashboard_on_rate_change(sender, instance, raw=False, **kwargs):
+    """
+    Сводки хранятся в рублях: смена курса влияет на пользователей со счетами в этой валюте
+    """
+    if not raw:
+        invalidate_dashboard(Account.objects.filter(currency=instance).values_list('user_id', flat=True).distinct())
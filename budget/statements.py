@@ -0,0 +1,309 @@
+import csv
+import datetime
+import hashlib
+import re
+from collections import Counter, namedtuple
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+
+from .classifier import get_classifier
+from .models import Category, CategoryRule, Transaction
+
+# Строка выписки: сумма со знаком, отрицательная - расход
+StatementRow = namedtuple('StatementRow', ['date', 'amount', 'description'])
+ImportResult = namedtuple('ImportResult', ['created', 'skipped'])
+
+# Возможные заголовки колонок CSV (в нижнем регистре)
+CSV_COLUMNS = {
+    'date': ('date', 'дата', 'дата операции', 'дата платежа', 'дата транзакции'),
+    'amount': ('amount', 'сумма', 'сумма операции', 'сумма платежа', 'сумма в валюте счёта', 'сумма в валюте счета'),
+    'description': ('description', 'описание', 'описание операции', 'назначение платежа', 'комментарий'),
+    'type': ('type', 'тип', 'тип операции'),
+}
+# Значения колонки типа, при которых сумма без знака - расход
+EXPENSE_TYPES = ('расход', 'списание', 'expense', 'debit')
+CSV_DELIMITERS = (';', ',', '\t')
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d.%m.%y', '%d/%m/%Y', '%Y%m%d')
+
+# Категории для строк, не подошедших ни под одно правило
+FALLBACK_CATEGORIES = {
+    'I': {'name': 'Прочие доходы', 'color': '#8fd694', 'icon': 'coins'},
+    'E': {'name': 'Прочие расходы', 'color': '#f28b82', 'icon': 'receipt'},
+}
+
+IMPORT_BATCH_SIZE = 1000
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+class StatementError(ValueError):
+    pass
+
+
+def parse_date(value):
+    # Время после даты ('05.01.2024 12:30') отбрасывается
+    value = value.strip().split(' ')[0]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise StatementError(f'Не удалось разобрать дату: {value!r}')
+
+
+def parse_amount(value):
+    value = value.strip().replace('\xa0', '').replace(' ', '').replace(',', '.')
+    if value.startswith('+'):
+        value = value[1:]
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise StatementError(f'Не удалось разобрать сумму: {value!r}')
+
+
+def decoded_lines(lines):
+    """
+    Строки файла; ошибка декодирования (файл не в выбранной кодировке) становится StatementError
+    """
+    try:
+        yield from lines
+    except UnicodeDecodeError as error:
+        raise StatementError(f'Не удалось прочитать файл в кодировке {error.encoding}: {error.reason}')
+
+
+def csv_rows(lines, delimiter, first_line=1):
+    """
+    Значения строк CSV; ошибка разбора (например, незакрытая кавычка) становится
+    StatementError с номером строки файла (first_line - номер первой из lines)
+    """
+    reader = csv.reader(lines, delimiter=delimiter)
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            raise StatementError(f'Строка {first_line + reader.line_num - 1}: {error}')
+        yield values
+
+
+def parse_csv(lines, delimiter=None):
+    """
+    Строки выписки из CSV по одной: файл читается построчно, заголовок
+    сопоставляется с CSV_COLUMNS, разделитель определяется по первой строке.
+    Если есть колонка типа, положительная сумма с типом 'Расход' считается расходом
+    """
+    lines = decoded_lines(lines)
+    header = next(lines, '')
+    if delimiter is None:
+        delimiter = max(CSV_DELIMITERS, key=header.count)
+    columns = [name.strip().strip('"').lower() for name in next(csv_rows([header], delimiter), [])]
+
+    indexes = {}
+    for field, names in CSV_COLUMNS.items():
+        for name in names:
+            if name in columns:
+                indexes[field] = columns.index(name)
+                break
+    missing = {'date', 'amount'} - indexes.keys()
+    if missing:
+        raise StatementError(f'В заголовке нет колонок: {", ".join(sorted(missing))}')
+
+    for line_number, values in enumerate(csv_rows(lines, delimiter, 2), 2):
+        if not any(value.strip() for value in values):
+            continue
+        try:
+            amount = parse_amount(values[indexes['amount']])
+            if amount > 0 and 'type' in indexes and values[indexes['type']].strip().lower() in EXPENSE_TYPES:
+                amount = -amount
+            yield StatementRow(
+                date=parse_date(values[indexes['date']]),
+                amount=amount,
+                description=values[indexes['description']].strip() if 'description' in indexes else '',
+            )
+        except (StatementError, IndexError) as error:
+            raise StatementError(f'Строка {line_number}: {error}')
+
+
+def parse_ofx(lines):
+    """
+    Транзакции (STMTTRN) из OFX по одной. Подходит и для SGML-версии 1.x
+    без закрывающих тегов, и для XML-версии 2.x
+    """
+    current = None
+    for line in decoded_lines(lines):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag in ('STMTTRN', 'BANKTRANLIST'):
+                # В SGML закрывающих тегов может не быть: транзакция заканчивается там, где начинается следующая
+                if current:
+                    yield ofx_row(current)
+                current = {} if tag == 'STMTTRN' and not closing else None
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+    if current:
+        yield ofx_row(current)
+
+
+def ofx_row(fields):
+    if 'DTPOSTED' not in fields or 'TRNAMT' not in fields:
+        raise StatementError(f'В транзакции OFX нет даты или суммы: {fields}')
+    description = ' '.join(fields[tag] for tag in ('NAME', 'MEMO') if fields.get(tag))
+    return StatementRow(
+        date=parse_date(fields['DTPOSTED'][:8]),
+        amount=parse_amount(fields['TRNAMT']),
+        description=description,
+    )
+
+
+def detect_format(filename):
+    return 'ofx' if filename.lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+
+def parse_statement(lines, statement_format):
+    if statement_format == 'ofx':
+        return parse_ofx(lines)
+    return parse_csv(lines)
+
+
+def row_key(account_id, row):
+    return f'{account_id}|{row.date.isoformat()}|{row.amount}|{row.description}'
+
+
+def row_hash(account_id, row, occurrence):
+    """
+    Отпечаток строки выписки. occurrence - номер одинаковой строки в выписке,
+    чтобы две одинаковые покупки за день не считались повтором
+    """
+    return hashlib.sha1(f'{row_key(account_id, row)}|{occurrence}'.encode('utf-8')).hexdigest()
+
+
+class OccurrenceCounter:
+    """
+    Номера одинаковых строк выписки. Строка хранится как 20-байтный sha1 с датой,
+    а не целиком. Пока выписка упорядочена по дате (в любую сторону), после
+    каждой пачки остаются только счётчики последней даты: одинаковые строки
+    за прошедшие даты больше не встретятся
+    """
+
+    def __init__(self, account_id):
+        self.account_id = account_id
+        self.counts = Counter()
+        self.last_date = None
+        self.direction = 0
+        self.sorted = True
+
+    def next(self, row):
+        if self.last_date is not None and row.date != self.last_date and self.sorted:
+            direction = 1 if row.date > self.last_date else -1
+            if self.direction and direction != self.direction:
+                self.sorted = False
+            self.direction = direction
+        self.last_date = row.date
+        key = (row.date, hashlib.sha1(row_key(self.account_id, row).encode('utf-8')).digest())
+        self.counts[key] += 1
+        return self.counts[key]
+
+    def end_batch(self):
+        if self.sorted:
+            self.counts = Counter({key: count for key, count in self.counts.items() if key[0] == self.last_date})
+
+
+class CategoryMatcher:
+    """
+    Подбор категории: первое по приоритету правило пользователя, чья подстрока
+    есть в описании и чья категория совпадает по типу со знаком суммы, иначе
+    категория, предсказанная классификатором по истории пользователя
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.rules = [
+            (rule.pattern.lower(), rule.category)
+            for rule in CategoryRule.objects.filter(user=user).select_related('category')
+        ]
+        self.classifier = get_classifier(user)
+        self.categories = Category.objects.filter(user=user).in_bulk()
+        self.fallback = {}
+
+    def match(self, description, category_type):
+        lowered = description.lower()
+        for pattern, category in self.rules:
+            if category.type == category_type and pattern in lowered:
+                return category
+        category = self.categories.get(self.classifier.predict(description, category_type))
+        if category is not None and category.type == category_type:
+            return category
+        return self.fallback_category(category_type)
+
+    def fallback_category(self, category_type):
+        if category_type not in self.fallback:
+            defaults = FALLBACK_CATEGORIES[category_type]
+            self.fallback[category_type], _ = Category.objects.get_or_create(
+                user=self.user, name=defaults['name'], type=category_type,
+                defaults={'color': defaults['color'], 'icon': defaults['icon']},
+            )
+        return self.fallback[category_type]
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def import_statement(user, account, rows, batch_size=IMPORT_BATCH_SIZE, matcher=None):
+    """
+    Импорт строк выписки в счёт account одной транзакцией БД.
+
+    Строки читаются из генератора пачками по batch_size: для пачки одним
+    запросом находятся уже импортированные отпечатки, новые строки пишутся
+    bulk_create без пересчёта. DailyLedger, проводки и баланс счёта
+    обновляются один раз в конце
+    """
+    matcher = matcher or CategoryMatcher(user)
+    occurrences = OccurrenceCounter(account.pk)
+    days, pks = set(), []
+    skipped = 0
+
+    with transaction.atomic():
+        for batch in batched(rows, batch_size):
+            hashed = []
+            for row in batch:
+                if not row.amount:
+                    skipped += 1
+                    continue
+                hashed.append((row_hash(account.pk, row, occurrences.next(row)), row))
+            occurrences.end_batch()
+
+            existing = set(Transaction.objects.filter(account=account, import_hash__in=[key for key, _ in hashed])
+                           .values_list('import_hash', flat=True))
+            objs = [
+                Transaction(
+                    user=user,
+                    account=account,
+                    category=matcher.match(row.description, 'I' if row.amount > 0 else 'E'),
+                    date=row.date,
+                    amount=abs(row.amount),
+                    description=row.description,
+                    import_hash=key,
+                )
+                for key, row in hashed if key not in existing
+            ]
+            skipped += len(hashed) - len(objs)
+            if not objs:
+                continue
+
+            Transaction.objects.bulk_create(objs, sync=False)
+            if any(obj.pk is None for obj in objs):
+                # База не вернула id вставленных строк
+                pks += Transaction.objects.filter(account=account, import_hash__in=[obj.import_hash for obj in objs]) \
+                    .values_list('pk', flat=True)
+            else:
+                pks += [obj.pk for obj in objs]
+            days |= {(user.pk, obj.date) for obj in objs}
+
+        Transaction.objects.sync_changes(days, pks)
+    return ImportResult(len(pks), skipped)
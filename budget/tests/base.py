@@ -0,0 +1,92 @@
+import datetime
+import threading
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, modify_settings
+
+from .. import receipts
+from ..balances import get_balance
+from ..ledger import rebuild_all
+from ..management.commands.receipt_stub_server import make_server
+from ..models import Account, AccountType, Category, Currency, DailyLedger, Transaction
+
+QR = 't=20240102T1706&s=200.00&fn=9961440300945084&i=71497&fp=846649988&n=1'
+
+# debug_toolbar подключается только как middleware, без приложения, и не загружается в тестах
+without_debug_toolbar = modify_settings(MIDDLEWARE={'remove': 'debug_toolbar.middleware.DebugToolbarMiddleware'})
+
+
+def qr_code(number, total='150.00', day=1):
+    return f't=202401{day:02d}T1200&s={total}&fn=9961440300945084&i={number}&fp=1234567&n=1'
+
+
+class BudgetTestCase(TestCase):
+    """
+    Пользователь со счётом (начальный остаток 1000) и категориями дохода и расхода
+    """
+
+    def setUp(self):
+        self.user = self.make_user('owner')
+        self.account = self.make_account(self.user)
+        self.income = Category.objects.create(user=self.user, name='Зарплата', type='I', color='#00ff00',
+                                              icon='coins')
+        self.expense = Category.objects.create(user=self.user, name='Еда', type='E', color='#ff0000',
+                                               icon='utensils')
+
+    @staticmethod
+    def make_user(username):
+        return User.objects.create_user(username, password='password')
+
+    @staticmethod
+    def make_account(user, balance=1000, name='Стандарт', currency=None):
+        AccountType.objects.get_or_create(id=1, defaults={'name': 'Цель'})
+        account_type, _ = AccountType.objects.get_or_create(id=2, defaults={'name': 'Счёт'})
+        if currency is None:
+            currency, _ = Currency.objects.get_or_create(name='Рубль', defaults={'exchange_rate': 1})
+        return Account.objects.create(user=user, account_type=account_type, currency=currency, name=name,
+                                      balance=balance)
+
+    def add(self, amount, category=None, date=None, account=None, **kwargs):
+        return Transaction.objects.create(user=self.user, category=category or self.expense,
+                                          account=account or self.account, date=date or datetime.date.today(),
+                                          amount=amount, **kwargs)
+
+    def ledger(self):
+        return sorted(DailyLedger.objects.filter(user=self.user).values_list('date', 'category_id', 'type', 'total',
+                                                                            'count'))
+
+    def assertLedgerConsistent(self):
+        """
+        Инкрементально обновлённый DailyLedger совпадает с пересчитанным с нуля
+        """
+        incremental = self.ledger()
+        rebuild_all(self.user)
+        self.assertEqual(incremental, self.ledger())
+
+    def assertBalance(self, account, expected):
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal(expected))
+        self.assertEqual(get_balance(account), Decimal(expected))
+
+
+class StubServerMixin:
+    """
+    Заглушка сервиса проверки чеков (команда receipt_stub_server) в потоке на свободном порту
+    """
+
+    def start_stub(self, **kwargs):
+        server = make_server(port=0, **kwargs)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def client_for(self, server, **kwargs):
+        kwargs.setdefault('backoff', 0)
+        client = receipts.ReceiptClient(url=f'http://127.0.0.1:{server.server_address[1]}/api/v1/check/get',
+                                        **kwargs)
+        self.addCleanup(client.close)
+        return client
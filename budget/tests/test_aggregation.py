@@ -0,0 +1,33 @@
+import datetime
+
+from ..aggregation import summarize_transactions
+from ..models import Category
+from .base import BudgetTestCase
+
+
+class SummaryTests(BudgetTestCase):
+    def add_categories(self, count):
+        for number in range(count):
+            category = Category.objects.create(user=self.user, name=f'Категория {number}', type='E',
+                                               color='#000000', icon='gift')
+            self.add(10, category=category, date=datetime.date(2024, 1, number % 28 + 1))
+
+    def test_totals(self):
+        self.add(100, date=datetime.date(2024, 1, 2))
+        self.add(50, date=datetime.date(2024, 1, 2))
+        self.add(300, category=self.income, date=datetime.date(2024, 1, 3))
+        self.add(20, date=datetime.date(2023, 12, 31))
+        summary = summarize_transactions(self.user, datetime.date(2024, 1, 1), datetime.date(2024, 1, 31))
+        self.assertEqual(summary['expenses'], [{'date': '2024-01-02', 'amount': 150.0}])
+        self.assertEqual(summary['incomes'], [{'date': '2024-01-03', 'amount': 300.0}])
+        self.assertEqual(sorted((category['name'], category['total']) for category in summary['categories']),
+                         [('Еда', 150.0), ('Зарплата', 300.0)])
+
+    def test_query_count_does_not_depend_on_categories(self):
+        self.add_categories(3)
+        with self.assertNumQueries(1):
+            summarize_transactions(self.user)
+        self.add_categories(30)
+        with self.assertNumQueries(1):
+            summary = summarize_transactions(self.user)
+        self.assertEqual(len(summary['categories']), 33)
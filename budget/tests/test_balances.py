@@ -0,0 +1,54 @@
+import datetime
+from decimal import Decimal
+
+from ..balances import transfer
+from ..models import AccountEntry
+from .base import BudgetTestCase
+
+
+class BalanceConsistencyTests(BudgetTestCase):
+    def test_opening_balance(self):
+        self.assertBalance(self.account, 1000)
+        self.assertEqual(AccountEntry.objects.filter(account=self.account, kind=AccountEntry.OPENING).count(), 1)
+
+    def test_create_edit_delete(self):
+        expense = self.add(100)
+        self.add(250, category=self.income)
+        self.assertBalance(self.account, 1150)
+
+        expense.amount = 40
+        expense.save()
+        self.assertBalance(self.account, 1210)
+
+        expense.category = self.income
+        expense.save()
+        self.assertBalance(self.account, 1290)
+
+        expense.delete()
+        self.assertBalance(self.account, 1250)
+
+    def test_move_between_accounts(self):
+        other = self.make_account(self.user, balance=0, name='Карта')
+        transaction = self.add(100)
+        transaction.account = other
+        transaction.save()
+        self.assertBalance(self.account, 1000)
+        self.assertBalance(other, -100)
+
+    def test_future_and_permanent_transactions(self):
+        self.add(100, date=datetime.date.today() + datetime.timedelta(days=10))
+        self.add(100, permanent=True)
+        self.assertBalance(self.account, 1000)
+
+    def test_transfer(self):
+        other = self.make_account(self.user, balance=0, name='Карта')
+        transfer(self.account, other, Decimal(300))
+        self.assertBalance(self.account, 700)
+        self.assertBalance(other, 300)
+
+    def test_entries_are_append_only(self):
+        transaction = self.add(100)
+        transaction.amount = 60
+        transaction.save()
+        self.assertEqual(list(AccountEntry.objects.filter(transaction=transaction).order_by('pk')
+                              .values_list('amount', flat=True)), [Decimal(-100), Decimal(40)])
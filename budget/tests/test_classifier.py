@@ -0,0 +1,48 @@
+from ..classifier import classifier_cache, forget_classifier, get_classifier, suggest_category
+from ..ledger import bump_versions
+from ..models import ClassifierVersion
+from .base import BudgetTestCase
+
+
+class ClassifierTests(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        classifier_cache.clear()
+        self.addCleanup(classifier_cache.clear)
+        for description in ('Молоко и хлеб', 'хлеб, сыр', 'молоко'):
+            self.add(100, description=description)
+        for description in ('Зарплата за март', 'аванс', 'зарплата'):
+            self.add(100, category=self.income, description=description)
+
+    def test_prediction(self):
+        self.assertEqual(suggest_category(self.user, 'купил молока'), self.expense.pk)
+        self.assertEqual(suggest_category(self.user, 'зарплата за апрель'), self.income.pk)
+        self.assertEqual(suggest_category(self.user, 'молоко', 'I'), self.income.pk)
+        self.assertIsNone(suggest_category(self.user, 'молоко', 'T'))
+        self.assertIsNone(suggest_category(self.user, '123'))
+
+    def test_new_transactions_update_cached_model(self):
+        classifier = get_classifier(self.user)
+        self.add(100, category=self.income, description='премия')
+        self.assertIs(get_classifier(self.user), classifier)
+        self.assertEqual(classifier.predict('премия'), self.income.pk)
+
+    def test_forget_classifier(self):
+        classifier = get_classifier(self.user)
+        forget_classifier([self.user.pk])
+        self.assertIsNone(classifier_cache.get(self.user.pk))
+        self.assertEqual(ClassifierVersion.objects.get(user=self.user).version, 1)
+        self.assertIsNot(get_classifier(self.user), classifier)
+
+    def test_version_change_from_another_process_retrains(self):
+        classifier = get_classifier(self.user)
+        # Сброс в другом процессе меняет только версию в базе
+        bump_versions([self.user.pk], ClassifierVersion)
+        self.assertIsNot(get_classifier(self.user), classifier)
+
+    def test_edited_transaction_is_relearned(self):
+        get_classifier(self.user)
+        for transaction in self.user.transaction_set.filter(description__in=['Молоко и хлеб', 'молоко']):
+            transaction.category = self.income
+            transaction.save()
+        self.assertEqual(suggest_category(self.user, 'молоко'), self.income.pk)
@@ -0,0 +1,91 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.db import DatabaseCache
+
+from .. import dashboard
+from ..dashboard import compute_summary, get_dashboard_summary
+from ..models import Currency, Transaction
+from .base import BudgetTestCase
+
+
+class DashboardTestCase(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.dollar = Currency.objects.create(name='Доллар', exchange_rate=90)
+
+
+class ConvertedTotalsTests(DashboardTestCase):
+    def test_totals_are_converted_to_roubles(self):
+        card = self.make_account(self.user, balance=10, name='Карта', currency=self.dollar)
+        self.add(1, account=card, date=datetime.date.today() + datetime.timedelta(days=5))
+        self.add(500, category=self.income, date=datetime.date.today() + datetime.timedelta(days=5))
+        summary = compute_summary(self.user)
+        self.assertEqual(summary['acc_amount'], Decimal(1000))
+        self.assertEqual(summary['savings'], Decimal(900))
+        self.assertEqual(summary['all_savings'], Decimal(1900))
+        self.assertEqual(summary['planning'], Decimal(410))
+
+    def test_summary_in_general_currency(self):
+        self.add(2000, date=datetime.date.today() + datetime.timedelta(days=5))
+        summary = get_dashboard_summary(self.user, self.dollar)
+        self.assertEqual(summary['acc_amount'], round(Decimal(1000) / 90, 2))
+        self.assertEqual(summary['planning'], round(Decimal(-2000) / 90, 2))
+        self.assertEqual(summary['free'], round(Decimal(-1000) / 90, 2))
+        self.assertEqual(summary['account_id'], self.account.pk)
+
+
+class DashboardCacheTests(DashboardTestCase):
+    def assertCachedPlanning(self, expected):
+        self.assertEqual(get_dashboard_summary(self.user)['planning'], Decimal(expected))
+
+    def test_summary_is_cached_in_shared_cache(self):
+        get_dashboard_summary(self.user)
+        self.assertIsInstance(caches['default'], DatabaseCache)
+        with self.assertNumQueries(1):
+            get_dashboard_summary(self.user)
+
+    def test_transaction_changes_invalidate_summary(self):
+        self.assertCachedPlanning(0)
+        transaction = self.add(100, date=datetime.date.today() + datetime.timedelta(days=5))
+        self.assertCachedPlanning(-100)
+        transaction.amount = 40
+        transaction.save()
+        self.assertCachedPlanning(-40)
+        transaction.delete()
+        self.assertCachedPlanning(0)
+
+    def test_account_changes_invalidate_summary(self):
+        self.assertEqual(get_dashboard_summary(self.user)['acc_amount'], 1000)
+        self.account.balance = 700
+        self.account.save()
+        self.assertEqual(get_dashboard_summary(self.user)['acc_amount'], 700)
+        card = self.make_account(self.user, balance=10, name='Карта', currency=self.dollar)
+        self.assertEqual(get_dashboard_summary(self.user)['savings'], 900)
+        self.dollar.exchange_rate = 100
+        self.dollar.save()
+        self.assertEqual(get_dashboard_summary(self.user)['savings'], 1000)
+        card.delete()
+        self.assertEqual(get_dashboard_summary(self.user)['savings'], 0)
+
+    def test_due_occurrences_are_materialized_on_cache_miss_only(self):
+        self.add(100, date=datetime.date.today() - datetime.timedelta(days=7), frequency=Transaction.WEEKLY)
+        self.assertEqual(get_dashboard_summary(self.user)['acc_amount'], 800)
+        with mock.patch.object(dashboard, 'materialize_due') as materialize:
+            get_dashboard_summary(self.user)
+        materialize.assert_not_called()
+
+
+class FutureTotalsTests(DashboardTestCase):
+    def test_tomorrow_counts_once_for_transactions_and_recurrences(self):
+        today = datetime.date.today()
+        self.add(100)
+        self.add(10, date=today + datetime.timedelta(days=1))
+        self.assertEqual(compute_summary(self.user)['planning'], -10)
+        self.add(1, date=today - datetime.timedelta(days=6), frequency=Transaction.WEEKLY)
+        # Повторение правила приходится на завтра и считается вместе с разовой транзакцией
+        self.assertEqual(compute_summary(self.user)['planning'], -10 - 13)
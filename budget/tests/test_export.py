@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+from ..export import csv_stream, export_queryset, export_rows
+from ..statements import parse_csv
+from .base import BudgetTestCase
+
+
+class ExportTests(BudgetTestCase):
+    def export(self):
+        return ''.join(csv_stream(export_queryset(self.user))).lstrip('﻿')
+
+    def test_export_reimports_with_signs(self):
+        self.add(100)
+        self.add(250, category=self.income)
+        self.assertEqual(sorted(row.amount for row in parse_csv(self.export().splitlines())),
+                         [Decimal(-100), Decimal(250)])
+
+    def test_formulas_are_escaped(self):
+        self.expense.name = '=HYPERLINK("http://example.com")'
+        self.expense.save()
+        transaction = self.add(100, description='+1+cmd|calc')
+        transaction.tags.add('@tag')
+        [row] = export_rows(export_queryset(self.user))
+        self.assertEqual(row[2], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(row[5:], ["'+1+cmd|calc", "'@tag"])
+        self.assertEqual(row[4], Decimal(-100))
+
+    def test_permanent_templates_are_not_exported(self):
+        self.add(100, permanent=True)
+        kept = self.add(50)
+        self.assertEqual(list(export_queryset(self.user)), [kept])
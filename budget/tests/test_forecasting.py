@@ -0,0 +1,104 @@
+import concurrent.futures
+import datetime
+import threading
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from .. import forecast_executor, forecasting
+from ..forecast_cache import forecast_cache
+from ..forecast_executor import ForecastExecutor, naive_forecast
+from ..ledger import get_version
+from ..models import ForecastSnapshot
+from .base import BudgetTestCase
+
+
+class ForecastCacheTests(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        forecast_cache.clear()
+        self.addCleanup(forecast_cache.clear)
+
+    def test_cache_key_follows_ledger_version(self):
+        with mock.patch.object(forecasting, 'get_monthly_income_expense',
+                               return_value=([1.0], [2.0], True)) as fit:
+            self.assertEqual(forecasting.get_forecast(self.user, 'months', 1), ([1.0], [2.0]))
+            forecasting.get_forecast(self.user, 'months', 1)
+            self.assertEqual(fit.call_count, 1)
+
+            version = get_version(self.user)
+            self.add(100)
+            self.assertGreater(get_version(self.user), version)
+            forecasting.get_forecast(self.user, 'months', 1)
+            self.assertEqual(fit.call_count, 2)
+
+    def test_fallback_is_not_cached(self):
+        with mock.patch.object(forecasting, 'get_monthly_income_expense',
+                               return_value=([0.0], [0.0], False)) as fit:
+            forecasting.get_forecast(self.user, 'months', 1)
+            forecasting.get_forecast(self.user, 'months', 1)
+        self.assertEqual(fit.call_count, 2)
+
+
+class ForecastSnapshotTests(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        forecast_cache.clear()
+        self.addCleanup(forecast_cache.clear)
+        self.add(100)
+
+    def snapshot(self, **kwargs):
+        return ForecastSnapshot.objects.create(**{
+            'user': self.user, 'forecast_type': 'days', 'horizon': 5, 'expenses': [1, 2, 3, 4, 5],
+            'incomes': [5, 4, 3, 2, 1], 'ledger_version': get_version(self.user), **kwargs,
+        })
+
+    def test_fresh_snapshot_is_reused(self):
+        self.snapshot()
+        with mock.patch.object(forecasting, 'get_transactions_for_current_month') as fit:
+            self.assertEqual(forecasting.get_forecast(self.user, 'days', 3), ([1, 2, 3], [5, 4, 3]))
+        fit.assert_not_called()
+
+    def test_outdated_snapshot_is_ignored(self):
+        self.snapshot(ledger_version=get_version(self.user) - 1)
+        self.assertIsNone(forecasting.get_snapshot_forecast(self.user, 'days', 3, get_version(self.user)))
+        self.assertIsNone(forecasting.get_snapshot_forecast(self.user, 'days', 10, get_version(self.user) - 1))
+        ForecastSnapshot.objects.update(fitted_at=datetime.datetime(2000, 1, 1))
+        self.assertIsNone(forecasting.get_snapshot_forecast(self.user, 'days', 3, get_version(self.user) - 1))
+
+    def test_precompute_command(self):
+        call_command('precompute_forecasts', workers=0, days_horizon=7, stdout=mock.Mock())
+        snapshot = ForecastSnapshot.objects.get(user=self.user, forecast_type='days')
+        self.assertEqual((snapshot.horizon, snapshot.ledger_version), (7, get_version(self.user)))
+        self.assertEqual(forecasting.get_forecast(self.user, 'days', 7), (snapshot.expenses, snapshot.incomes))
+
+
+class ForecastExecutorTests(SimpleTestCase):
+    values = [float(day % 7 + day // 7) for day in range(120)]
+
+    def thread_executor(self, timeout):
+        """
+        Исполнитель с пулом потоков вместо процессов: подгонку можно подменить в том же процессе
+        """
+        executor = ForecastExecutor(max_workers=1, timeout=timeout)
+        executor._pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        return executor
+
+    def test_timeout_falls_back_to_naive_forecast(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        executor = self.thread_executor(timeout=0.05)
+        with mock.patch.object(forecast_executor, 'fit_exponential_smoothing',
+                               side_effect=lambda *args: release.wait()):
+            self.assertEqual(executor.run([(self.values, 7, 3)]), [(naive_forecast(self.values, 7, 3), False)])
+
+    def test_failed_fit_falls_back_to_naive_forecast(self):
+        executor = ForecastExecutor(max_workers=0)
+        self.assertEqual(executor.run([([1.0, 2.0, 3.0], 7, 2)]), [([2.0, 2.0], False)])
+
+    def test_pool_fit(self):
+        [(forecast, fitted)] = self.thread_executor(timeout=30).run([(self.values, 7, 3)])
+        self.assertTrue(fitted)
+        self.assertEqual(len(forecast), 3)
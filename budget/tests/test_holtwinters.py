@@ -0,0 +1,25 @@
+from django.test import SimpleTestCase
+
+from ..holtwinters import HoltWinters
+
+SEASON = [3, -1, -4, 2]
+
+
+def series(start, stop):
+    return [10 + 0.5 * t + SEASON[t % 4] for t in range(start, stop)]
+
+
+class HoltWintersTests(SimpleTestCase):
+    def test_forecast_continues_trend_and_season(self):
+        model = HoltWinters(series(0, 24), 4).fit()
+        for forecast, expected in zip(model.forecast(8), series(24, 32)):
+            self.assertAlmostEqual(forecast, expected, places=1)
+
+    def test_parameters_stay_in_unit_interval(self):
+        model = HoltWinters(series(0, 24), 4).fit()
+        for value in (model.alpha, model.beta, model.gamma):
+            self.assertTrue(0 <= value <= 1)
+
+    def test_short_series_is_rejected(self):
+        with self.assertRaises(ValueError):
+            HoltWinters(series(0, 7), 4)
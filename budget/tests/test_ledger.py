@@ -0,0 +1,50 @@
+import datetime
+from decimal import Decimal
+
+from ..models import Transaction
+from .base import BudgetTestCase
+
+
+class LedgerConsistencyTests(BudgetTestCase):
+    def test_create(self):
+        self.add(100)
+        self.add(50)
+        self.add(300, category=self.income)
+        self.assertEqual(self.ledger(), [
+            (datetime.date.today(), self.income.pk, 'I', Decimal(300), 1),
+            (datetime.date.today(), self.expense.pk, 'E', Decimal(150), 2),
+        ])
+        self.assertLedgerConsistent()
+
+    def test_edit_amount_date_and_category(self):
+        transaction = self.add(100)
+        transaction.amount = 70
+        transaction.date = datetime.date.today() - datetime.timedelta(days=3)
+        transaction.category = self.income
+        transaction.save()
+        self.assertEqual(self.ledger(), [(transaction.date, self.income.pk, 'I', Decimal(70), 1)])
+        self.assertLedgerConsistent()
+
+    def test_delete(self):
+        kept = self.add(100)
+        self.add(40).delete()
+        self.assertEqual(self.ledger(), [(kept.date, self.expense.pk, 'E', Decimal(100), 1)])
+        kept.delete()
+        self.assertEqual(self.ledger(), [])
+
+    def test_bulk_operations(self):
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, category=self.expense, account=self.account, amount=10,
+                        date=datetime.date.today() - datetime.timedelta(days=day))
+            for day in range(5)
+        ])
+        Transaction.objects.filter(user=self.user).update(amount=20)
+        self.assertEqual(sum(row[3] for row in self.ledger()), Decimal(100))
+        self.assertLedgerConsistent()
+
+    def test_category_type_change(self):
+        self.add(100)
+        self.expense.type = 'I'
+        self.expense.save()
+        self.assertEqual([row[2] for row in self.ledger()], ['I'])
+        self.assertLedgerConsistent()
@@ -0,0 +1,62 @@
+import datetime
+
+from ..models import Transaction
+from ..notifications import Scheduler
+from .base import BudgetTestCase
+
+SINCE = datetime.datetime(2024, 1, 1)
+
+
+class CollectingBackend:
+    def __init__(self):
+        self.notifications = []
+
+    def send(self, notifications):
+        self.notifications += notifications
+
+
+class SchedulerTests(BudgetTestCase):
+    def notify(self, day, kind=Transaction.ONE_DAY_BEFORE, **kwargs):
+        return self.add(10, date=datetime.date(2024, 1, day), notification_frequency=kind, **kwargs)
+
+    def scheduler(self, **kwargs):
+        return Scheduler(CollectingBackend(), since=SINCE, **kwargs)
+
+    def sent(self, scheduler):
+        return [(notification.when, notification.date.day) for notification in scheduler.backend.notifications]
+
+    def test_notifications_are_sent_in_time_order(self):
+        self.notify(10, Transaction.THREE_DAYS_BEFORE)
+        self.notify(5)
+        self.notify(3, Transaction.ON_EVENT_DAY)
+        scheduler = self.scheduler()
+        self.assertEqual(scheduler.run_pending(datetime.datetime(2024, 1, 4, 8)), 1)
+        self.assertEqual(scheduler.run_pending(datetime.datetime(2024, 1, 20)), 2)
+        self.assertEqual(self.sent(scheduler), [
+            (datetime.datetime(2024, 1, 3, 9), 3),
+            (datetime.datetime(2024, 1, 4, 9), 5),
+            (datetime.datetime(2024, 1, 7, 9), 10),
+        ])
+
+    def test_refill_in_small_batches_sends_each_notification_once(self):
+        for day in (2, 2, 2, 3, 9, 15, 16, 16, 30):
+            self.notify(day)
+        scheduler = self.scheduler(batch_size=2, window_days=7)
+        scheduler.run_pending(datetime.datetime(2024, 2, 1))
+        self.assertEqual([day for _, day in self.sent(scheduler)], [2, 2, 2, 3, 9, 15, 16, 16, 30])
+        self.assertGreaterEqual(scheduler.loaded_until, datetime.date(2024, 1, 30))
+
+    def test_recurrences_and_new_transactions(self):
+        self.notify(1, frequency=Transaction.WEEKLY)
+        scheduler = self.scheduler()
+        scheduler.run_pending(datetime.datetime(2024, 1, 2))
+        self.notify(5)
+        scheduler.run_pending(datetime.datetime(2024, 1, 16))
+        self.assertEqual([day for _, day in self.sent(scheduler)], [5, 8, 15])
+
+    def test_permanent_templates_are_not_notified(self):
+        self.notify(5, permanent=True)
+        self.notify(6, permanent=True, frequency=Transaction.WEEKLY)
+        scheduler = self.scheduler()
+        self.notify(7, permanent=True)
+        self.assertEqual(scheduler.run_pending(datetime.datetime(2024, 2, 1)), 0)
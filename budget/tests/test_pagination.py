@@ -0,0 +1,20 @@
+import datetime
+
+from ..models import Transaction
+from ..pagination import keyset_page
+from .base import BudgetTestCase
+
+
+class PaginationTests(BudgetTestCase):
+    def test_keyset_pages_cover_feed_once(self):
+        for day in range(30):
+            self.add(day + 1, date=datetime.date.today() - datetime.timedelta(days=day % 7))
+        feed = Transaction.objects.filter(user=self.user)
+        seen, cursor = [], None
+        while True:
+            page = keyset_page(feed, cursor, size=7)
+            seen += [transaction.pk for transaction in page.items]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(feed.order_by('-date', '-pk').values_list('pk', flat=True)))
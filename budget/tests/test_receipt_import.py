@@ -0,0 +1,33 @@
+from .. import receipts
+from ..models import Receipt, Transaction
+from .base import BudgetTestCase, StubServerMixin, qr_code
+
+
+class ReceiptImportTests(StubServerMixin, BudgetTestCase):
+    def test_batch_import(self):
+        server = self.start_stub()
+        client = self.client_for(server)
+        codes = [qr_code(number, day=number % 28 + 1) for number in range(12)]
+        lines = codes + [codes[0], 'garbage', '']
+        result = receipts.import_receipts(self.user, self.account, lines, client=client, workers=4)
+        self.assertEqual((result.created, result.skipped), (12, 1))
+        self.assertEqual([code for code, _ in result.errors], ['garbage'])
+        self.assertEqual(server.requests, 12)
+
+        for transaction in Transaction.objects.filter(user=self.user).prefetch_related('receipt_items'):
+            self.assertEqual(sum(item.sum for item in transaction.receipt_items.all()), transaction.amount)
+        self.assertBalance(self.account, 1000 - 12 * 150)
+        self.assertLedgerConsistent()
+        self.assertEqual(Receipt.objects.filter(users=self.user).count(), 12)
+
+        result = receipts.import_receipts(self.user, self.account, codes, client=client)
+        self.assertEqual((result.created, result.skipped), (0, 12))
+        self.assertEqual(server.requests, 12)
+
+    def test_fetch_errors_are_reported(self):
+        server = self.start_stub(fail_first=100)
+        result = receipts.import_receipts(self.user, self.account, [qr_code(1)],
+                                          client=self.client_for(server, retries=0))
+        self.assertEqual(result.created, 0)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 0)
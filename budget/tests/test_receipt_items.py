@@ -0,0 +1,34 @@
+from .. import receipts
+from ..management.commands.receipt_stub_server import stub_receipt
+from ..models import Receipt, ReceiptItem
+from .base import QR, BudgetTestCase, without_debug_toolbar
+
+
+@without_debug_toolbar
+class ReceiptOwnershipTests(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.receipt = Receipt.objects.create(qr_hash=receipts.qr_hash(QR), qrraw=QR, fn='9961440300945084',
+                                              i='71497', fp='846649988', data=stub_receipt(QR))
+        self.client.force_login(self.user)
+
+    def post_transaction(self):
+        return self.client.post('/budget/transactions/create/?type=expense', {
+            'category': self.expense.pk, 'account': self.account.pk, 'date': '2024-01-02', 'amount': 200,
+            'description': 'Покупки', 'receipt': self.receipt.pk, 'permanent': 'False',
+        })
+
+    def test_foreign_receipt_is_rejected(self):
+        self.receipt.users.add(self.make_user('scanner'))
+        response = self.post_transaction()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('receipt', response.context['form'].errors)
+        self.assertEqual(ReceiptItem.objects.count(), 0)
+
+    def test_own_receipt_items_are_saved(self):
+        self.receipt.users.add(self.user)
+        self.assertEqual(self.post_transaction().status_code, 302)
+        self.assertEqual(ReceiptItem.objects.filter(transaction__user=self.user).count(),
+                         len(self.receipt.data['items']))
+        response = self.client.get('/budget/history/products/')
+        self.assertEqual(len(response.json()['products']), len(self.receipt.data['items']))
@@ -0,0 +1,86 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .. import receipts
+from ..management.commands.receipt_stub_server import stub_receipt
+from ..models import Receipt
+from .base import QR, StubServerMixin, without_debug_toolbar
+
+
+class ReceiptClientTests(StubServerMixin, TestCase):
+    def test_fetch(self):
+        server = self.start_stub()
+        data = self.client_for(server).fetch(QR)
+        self.assertEqual(data, stub_receipt(QR))
+        self.assertEqual(receipts.receipt_total(data), Decimal(200))
+
+    def test_retry_after_server_errors(self):
+        server = self.start_stub(fail_first=2)
+        self.assertEqual(self.client_for(server, retries=2).fetch(QR), stub_receipt(QR))
+        self.assertEqual(server.requests, 3)
+
+    def test_retries_exhausted(self):
+        server = self.start_stub(fail_first=5)
+        with self.assertRaises(receipts.ReceiptError):
+            self.client_for(server, retries=1).fetch(QR)
+        self.assertEqual(server.requests, 2)
+
+    def test_timeout(self):
+        server = self.start_stub(delay=1)
+        client = self.client_for(server, timeout=(1, 0.2), retries=0)
+        started = time.monotonic()
+        with self.assertRaises(receipts.ReceiptError):
+            client.fetch(QR)
+        self.assertLess(time.monotonic() - started, 0.9)
+
+    def test_connection_refused(self):
+        server = self.start_stub()
+        client = self.client_for(server, retries=0)
+        server.shutdown()
+        server.server_close()
+        with self.assertRaises(receipts.ReceiptError):
+            client.fetch(QR)
+
+    def test_receipt_not_found(self):
+        server = self.start_stub()
+        with self.assertRaises(receipts.ReceiptError):
+            self.client_for(server).fetch('t=bad&s=1&fn=1&i=1&fp=1&n=1')
+
+    def test_invalid_qr_is_rejected_locally(self):
+        server = self.start_stub()
+        for qrraw in ('', 'garbage', 't=20240102T1706&s=1&fn=1&i=x&fp=1&n=1', 't=2024&s=1&fn=1&i=1&fp=1&n=1'):
+            with self.assertRaises(receipts.ReceiptError):
+                receipts.get_receipt(qrraw, client=self.client_for(server))
+        self.assertEqual(server.requests, 0)
+
+    def test_cache_hit(self):
+        server = self.start_stub()
+        client = self.client_for(server)
+        user = User.objects.create_user('scanner')
+        first = receipts.get_receipt(QR, client=client, user=user)
+        # Тот же чек с другой записью строки QR-кода берётся из базы
+        second = receipts.get_receipt(QR.replace('i=71497', 'i=071497') + ' ', client=client)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(list(first.users.all()), [user])
+
+    def test_failed_fetch_is_not_cached(self):
+        server = self.start_stub(fail_first=1)
+        client = self.client_for(server, retries=0)
+        with self.assertRaises(receipts.ReceiptError):
+            receipts.get_receipt(QR, client=client)
+        self.assertEqual(Receipt.objects.count(), 0)
+        receipts.get_receipt(QR, client=client)
+        self.assertEqual(Receipt.objects.count(), 1)
+
+
+@without_debug_toolbar
+class ChecksViewTests(TestCase):
+    def test_login_required(self):
+        response = self.client.post('/budget/checks/', '{"result": ""}', content_type='application/json')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/entry/', response['Location'])
+        self.assertEqual(Receipt.objects.count(), 0)
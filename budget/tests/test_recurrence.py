@@ -0,0 +1,46 @@
+import datetime
+from unittest import mock
+
+from ..models import Transaction, TransactionQuerySet
+from ..recurrence import future_totals, materialize_due, occurrence_date, occurrence_dates
+from .base import BudgetTestCase
+
+
+class RecurrenceTests(BudgetTestCase):
+    def test_occurrence_dates_match_stepping(self):
+        anchor = datetime.date(2024, 1, 31)
+        for frequency in (Transaction.DAILY, Transaction.WEEKLY, Transaction.MONTHLY, Transaction.YEARLY):
+            expected = [occurrence_date(anchor, frequency, number) for number in range(1, 800)]
+            start, end = datetime.date(2024, 3, 1), datetime.date(2026, 2, 28)
+            self.assertEqual(list(occurrence_dates(anchor, frequency, start, end)),
+                             [date for date in expected if start <= date <= end], frequency)
+
+    def test_month_end_is_clamped(self):
+        self.assertEqual(occurrence_dates(datetime.date(2024, 1, 31), Transaction.MONTHLY,
+                                          datetime.date(2024, 2, 1), datetime.date(2024, 4, 30)),
+                         (datetime.date(2024, 2, 29), datetime.date(2024, 3, 31), datetime.date(2024, 4, 30)))
+
+    def test_materialize_due_is_idempotent(self):
+        today = datetime.date.today()
+        rule = self.add(10, date=today - datetime.timedelta(days=14), frequency=Transaction.WEEKLY)
+        self.assertEqual(materialize_due(self.user, today), 2)
+        self.assertEqual(materialize_due(self.user, today), 0)
+        self.assertEqual(rule.occurrences.count(), 2)
+        self.assertBalance(self.account, 970)
+        self.assertLedgerConsistent()
+
+    def test_permanent_rules_do_not_recur(self):
+        today = datetime.date.today()
+        self.add(100, date=today - datetime.timedelta(days=62), frequency=Transaction.MONTHLY, permanent=True)
+        self.assertEqual(materialize_due(self.user, today), 0)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(future_totals(self.user, today, today + datetime.timedelta(days=90)), {'I': 0, 'E': 0})
+        self.assertBalance(self.account, 1000)
+
+    def test_materialized_until_does_not_resync_rules(self):
+        today = datetime.date.today()
+        self.add(10, date=today - datetime.timedelta(days=7), frequency=Transaction.WEEKLY)
+        with mock.patch.object(TransactionQuerySet, 'sync_changes', autospec=True) as sync:
+            materialize_due(self.user, today)
+        self.assertEqual(sync.call_count, 1)
+        self.assertEqual(len(sync.call_args.args[2]), 1)
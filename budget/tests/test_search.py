@@ -0,0 +1,38 @@
+import datetime
+
+from ..models import Category, Transaction
+from ..search import search_transactions
+from .base import BudgetTestCase
+
+
+class SearchTests(BudgetTestCase):
+    def test_search_is_scoped_to_user(self):
+        mine = self.add(10, description='Молоко и хлеб')
+        other = self.make_user('other')
+        other_category = Category.objects.create(user=other, name='Еда', type='E', color='#fff', icon='gift')
+        Transaction.objects.create(user=other, category=other_category, account=self.make_account(other),
+                                   amount=5, date=datetime.date.today(), description='молоко')
+        self.assertEqual([transaction.pk for transaction in search_transactions(self.user, 'мол').items], [mine.pk])
+
+    def test_search_follows_edits(self):
+        transaction = self.add(10, description='кофе')
+        transaction.description = 'чай'
+        transaction.save()
+        self.assertEqual(search_transactions(self.user, 'кофе').items, [])
+        self.assertEqual([item.pk for item in search_transactions(self.user, 'чай').items], [transaction.pk])
+        self.expense.name = 'Напитки'
+        self.expense.save()
+        self.assertEqual([item.pk for item in search_transactions(self.user, 'напит').items], [transaction.pk])
+
+    def test_pages_cover_matches_once(self):
+        for number in range(25):
+            self.add(1, description='магазин ' * (number % 4 + 1))
+        seen, cursor = [], None
+        while True:
+            page = search_transactions(self.user, 'магазин', cursor=cursor, size=10)
+            seen += [transaction.pk for transaction in page.items]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
@@ -0,0 +1,15 @@
+import datetime
+
+from ..series import build_monthly_series
+from .base import BudgetTestCase
+
+
+class MonthlySeriesTests(BudgetTestCase):
+    def test_trailing_months_are_zero_filled_and_current_month_excluded(self):
+        self.add(100, category=self.income, date=datetime.date(2024, 3, 5))
+        self.add(100, category=self.income, date=datetime.date(2024, 6, 5))
+        series = build_monthly_series(self.user, today=datetime.date(2024, 6, 20))
+        self.assertEqual(series.start, datetime.date(2024, 3, 1))
+        self.assertEqual(list(series.incomes), [100, 0, 0])
+        series = build_monthly_series(self.user, today=datetime.date(2024, 9, 20), include_current=True)
+        self.assertEqual(list(series.incomes), [100, 0, 0, 100, 0, 0, 0])
@@ -0,0 +1,47 @@
+import io
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from ..models import Transaction
+from ..statements import StatementError, import_statement, parse_csv, parse_statement
+from .base import BudgetTestCase, without_debug_toolbar
+
+
+class StatementParseTests(BudgetTestCase):
+    def test_unsigned_amount_with_expense_type(self):
+        rows = list(parse_csv(['Дата;Тип;Сумма', '2024-01-02;Расход;100', '2024-01-03;Доход;50']))
+        self.assertEqual([row.amount for row in rows], [Decimal(-100), Decimal(50)])
+
+    def test_csv_error_becomes_statement_error(self):
+        with self.assertRaisesMessage(StatementError, 'Строка 3'):
+            list(parse_csv(['Дата;Сумма', '2024-01-02;1', '2024-01-03;' + 'x' * 200000]))
+
+    def test_decode_error_becomes_statement_error(self):
+        for statement_format in ('csv', 'ofx'):
+            lines = io.TextIOWrapper(io.BytesIO('Дата;Сумма\n'.encode('cp1251')), encoding='utf-8', newline='')
+            with self.assertRaises(StatementError):
+                list(parse_statement(lines, statement_format))
+
+    def test_reimport_skips_duplicates(self):
+        rows = list(parse_csv(['Дата;Сумма;Описание', '02.01.2024;-10;кофе', '02.01.2024;-10;кофе']))
+        self.assertEqual(import_statement(self.user, self.account, rows, batch_size=1).created, 2)
+        self.assertEqual(import_statement(self.user, self.account, rows, batch_size=1).skipped, 2)
+        self.assertBalance(self.account, 980)
+
+
+@without_debug_toolbar
+class StatementImportViewTests(BudgetTestCase):
+    def upload(self, content):
+        self.client.force_login(self.user)
+        return self.client.post('/budget/import/', {
+            'account': self.account.pk, 'encoding': 'utf-8-sig',
+            'file': SimpleUploadedFile('statement.csv', content),
+        })
+
+    def test_unreadable_file_is_reported_in_form(self):
+        for content in ('Дата;Сумма\n'.encode('cp1251'), 'Дата;Сумма\n2024-01-02;"1\n'.encode() + b'x' * 200000):
+            response = self.upload(content)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('file', response.context['form'].errors)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 0)
@@ -0,0 +1,53 @@
+import datetime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..aggregation import summarize_tags
+from .base import BudgetTestCase, without_debug_toolbar
+
+
+class TagAnalyticsTests(BudgetTestCase):
+    def add_tagged(self, count, *tags, **kwargs):
+        for number in range(count):
+            self.add(10, date=datetime.date(2024, number % 3 + 1, 5), **kwargs).tags.add(*tags)
+
+    def test_totals_and_trend(self):
+        self.add_tagged(3, 'отпуск', 'еда')
+        self.add_tagged(1, 'отпуск', category=self.income)
+        self.add(10, date=datetime.date(2024, 1, 5))
+        tags = summarize_tags(self.user)
+        self.assertEqual([(tag['name'], tag['count'], tag['expenses'], tag['incomes']) for tag in tags],
+                         [('отпуск', 4, 30.0, 10.0), ('еда', 3, 30.0, 0.0)])
+        self.assertEqual([(month['month'], month['count']) for month in tags[0]['trend']],
+                         [('2024-01', 2), ('2024-02', 1), ('2024-03', 1)])
+        self.assertEqual(summarize_tags(self.user, end_date=datetime.date(2024, 1, 31))[0]['count'], 2)
+
+    def test_query_count_does_not_depend_on_tags(self):
+        self.add_tagged(2, 'a')
+        with self.assertNumQueries(1):
+            summarize_tags(self.user)
+        for number in range(20):
+            self.add_tagged(2, f'tag{number}', 'b')
+        with self.assertNumQueries(1):
+            self.assertEqual(len(summarize_tags(self.user)), 22)
+
+
+@without_debug_toolbar
+class TransactionFeedTagsTests(BudgetTestCase):
+    def feed_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/budget/transactions/feed/?limit=50')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_feed_tags_without_n_plus_one(self):
+        self.client.force_login(self.user)
+        self.add(10).tags.add('a')
+        few, _ = self.feed_queries()
+        for number in range(10):
+            self.add(10).tags.add(f'tag{number}', 'b')
+        many, data = self.feed_queries()
+        self.assertEqual(few, many)
+        self.assertEqual(sum(len(group['transactions']) for group in data['groups']), 11)
+        self.assertIn(['b', 'tag9'], [sorted(item['tags']) for item in data['groups'][0]['transactions']])
@@ -2,7 +2,8 @@ from django.urls import path
 from .views import start, process_audio, TransactionListView, TransactionCreateView, TransactionUpdateView, \
     TransactionDeleteView, CategoryCreate, CategoryUpdate, CategoryDelete, CategoryList, PermanentTransactionListView, \
     transaction_chart, AccountListView, AccountDetailView, AccountCreateView, AccountUpdateView, AccountDeleteView, \
-    planning, transfer_funds, checks, prediction, LoginRegisterView
+    planning, transfer_funds, checks, prediction, LoginRegisterView, transaction_feed, \
+    import_statement, export_transactions, tag_analytics, search_transactions, product_analytics, import_receipts
 
 app_name = 'budget'
 urlpatterns = [
@@ -11,6 +12,9 @@ urlpatterns = [
 
     path('transactions/', TransactionListView.as_view(), name='transaction-list'),
     path('transactions/permanent', PermanentTransactionListView.as_view(), name='permanent-transaction-list'),
+    path('transactions/feed/', transaction_feed, name='transaction-feed'),
+    path('transactions/search/', search_transactions, name='transaction-search'),
+    path('transactions/export/', export_transactions, name='transaction-export'),
     path('transactions/create/', TransactionCreateView.as_view(), name='transaction-create'),
     path('transaction/<int:pk>/edit/', TransactionUpdateView.as_view(), name='transaction-edit'),
     path('transaction/<int:pk>/delete/', TransactionDeleteView.as_view(), name='transaction-delete'),
@@ -21,6 +25,8 @@ urlpatterns = [
     path('category/<int:pk>/delete/', CategoryDelete.as_view(), name='category-delete'),
 
     path('history/', transaction_chart, name='history-finance'),
+    path('history/tags/', tag_analytics, name='tag-analytics'),
+    path('history/products/', product_analytics, name='product-analytics'),
 
     path('planning/', planning, name='planning'),
 
@@ -33,6 +39,8 @@ urlpatterns = [
     path('accounts/<int:pk>/delete/', AccountDeleteView.as_view(), name='account_delete'),
 
     path('transfer-funds/', transfer_funds, name='transfer_funds'),
+    path('import/', import_statement, name='statement-import'),
+    path('receipts/import/', import_receipts, name='receipt-import'),
 
     path('checks/', checks, name='checks'),
 
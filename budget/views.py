@@ -1,31 +1,36 @@
 import calendar
 import datetime
+import io
+from itertools import chain
 
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.forms import modelformset_factory
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
-import numpy as np
-
-import pandas as pd
-import requests
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import models
-from django.http import JsonResponse, HttpResponseRedirect, HttpResponseBadRequest
+from django.http import JsonResponse, HttpResponseRedirect, HttpResponseBadRequest, StreamingHttpResponse, \
+    FileResponse, HttpResponse
 from django.shortcuts import render, redirect
+from django.utils.dateparse import parse_date
+from django.utils.formats import date_format
 from django.utils.timezone import now
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy, reverse
-from django.db.models import Sum
 from django.contrib.auth.decorators import login_required
 
 from general_app.forms import CustomUserCreationForm
-from .forms import CategoryForm, TransactionForm, AccountForm, GoalForm, CurrencyForm, TransferForm, ForecastForm
-from .models import Category, Transaction, Account, Currency
+from . import export, receipts, search, statements
+from .aggregation import price_history, summarize_tags, summarize_transactions, top_products, TYPE_KEYS
+from .balances import transfer
+from .classifier import suggest_category
+from .dashboard import STANDARD_ACCOUNT_NAME, get_dashboard_summary
+from .forms import CategoryForm, TransactionForm, AccountForm, GoalForm, CurrencyForm, TransferForm, ForecastForm, \
+    StatementImportForm, ReceiptImportForm, TransactionExportForm
+from .models import Category, Transaction, Account
+from .pagination import group_by_date, keyset_page, page_size
+from .recurrence import RECURRENCE_HORIZON_DAYS, expand, materialize_due, recurring
 from hwyd.models import Settings
 from django.views import View
 
-from functions.voice_input import voice_to_json as vtj
 from decimal import Decimal
 import json
 
@@ -94,17 +99,8 @@ def transfer_funds(request):
             to_account = form.cleaned_data['to_account']
             amount = form.cleaned_data['amount']
 
-            if from_account.account_type_id == 1:
-                from_account.initial_balance -= amount
-            else:
-                from_account.balance -= amount
-            if to_account.account_type_id == 1:
-                to_account.initial_balance += amount
-            else:
-                to_account.balance += amount
-
-            from_account.save()
-            to_account.save()
+            # Пара проводок; балансы обоих счетов обновляются атомарно через F()
+            transfer(from_account, to_account, amount)
 
             return redirect('budget:account_list')
     else:
@@ -113,6 +109,71 @@ def transfer_funds(request):
     return render(request, 'budget/transfer_funds.html', {'form': form})
 
 
+@login_required(login_url='entry')
+def import_statement(request):
+    """
+    Импорт банковской выписки: файл читается построчно, без загрузки целиком в память
+    """
+    result = None
+    if request.method == 'POST':
+        form = StatementImportForm(request.user, request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            lines = io.TextIOWrapper(upload.file, encoding=form.cleaned_data['encoding'], newline='')
+            try:
+                result = statements.import_statement(
+                    request.user,
+                    form.cleaned_data['account'],
+                    statements.parse_statement(lines, statements.detect_format(upload.name)),
+                )
+            except statements.StatementError as error:
+                form.add_error('file', str(error))
+    else:
+        form = StatementImportForm(request.user)
+
+    return render(request, 'budget/statement_import.html', {'form': form, 'result': result})
+
+
+@login_required(login_url='entry')
+def import_receipts(request):
+    """
+    Пакетный импорт чеков по строкам QR-кодов из формы или файла. JSON-запрос
+    ({"codes": [...], "account": id}) получает итоги импорта в ответе
+    """
+    if request.content_type == 'application/json':
+        if request.method != 'POST':
+            return JsonResponse({'error': 'Invalid request method'}, status=405)
+        try:
+            body_data = json.loads(request.body.decode('utf-8'))
+            codes = [str(code) for code in body_data['codes']]
+        except (ValueError, KeyError, TypeError):
+            return HttpResponseBadRequest("Invalid body")
+        accounts = Account.objects.filter(user=request.user)
+        account = accounts.filter(pk=body_data['account']).first() if body_data.get('account') else \
+            accounts.filter(name=STANDARD_ACCOUNT_NAME).first()
+        if account is None:
+            return HttpResponseBadRequest("Invalid account")
+        result = receipts.import_receipts(request.user, account, codes)
+        return JsonResponse({'created': result.created, 'skipped': result.skipped,
+                             'errors': [{'code': code, 'error': error} for code, error in result.errors]})
+
+    result = None
+    if request.method == 'POST':
+        form = ReceiptImportForm(request.user, request.POST, request.FILES)
+        if form.is_valid():
+            lines = form.cleaned_data['codes'].splitlines()
+            if form.cleaned_data['file']:
+                lines = chain(lines, io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig'))
+            try:
+                result = receipts.import_receipts(request.user, form.cleaned_data['account'], lines)
+            except UnicodeDecodeError as error:
+                form.add_error('file', str(error))
+    else:
+        form = ReceiptImportForm(request.user)
+
+    return render(request, 'budget/receipt_import.html', {'form': form, 'result': result})
+
+
 class AccountListView(LoginRequiredMixin, ListView):
     model = Account
     context_object_name = 'accounts'
@@ -179,14 +240,11 @@ class AccountDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy('budget:account_list')
 
 
-@login_required(login_url='entry')
-def transaction_chart(request):
-    filter_kwargs = {
-        'user': request.user,
-        'permanent': False
-    }
-
-    # Проверка, есть ли данные POST и они содержат даты
+def get_date_range(request):
+    """
+    Период для истории и прогноза: по умолчанию с начала месяца по сегодня,
+    либо даты из POST-формы
+    """
     today = datetime.datetime.today()
     start_date = today.replace(day=1)
     end_date = today.replace(hour=23, minute=59, second=59, microsecond=999999)
@@ -195,64 +253,39 @@ def transaction_chart(request):
         start_date = request.POST['start-date']
         end_date = request.POST['end-date']
 
+    return start_date, end_date
+
+
+@login_required(login_url='entry')
+def transaction_chart(request):
+    start_date, end_date = get_date_range(request)
+
+    # Все суммы по датам и категориям одним запросом
+    summary = summarize_transactions(request.user, start_date, end_date)
+
+    filter_kwargs = {
+        'user': request.user,
+        'permanent': False
+    }
     if start_date:
         filter_kwargs['date__gte'] = start_date
     if end_date:
         filter_kwargs['date__lte'] = end_date
 
-    # Получение фильтрованных данных
-    incomes = Transaction.objects.filter(category__type='I', **filter_kwargs) \
-        .values('date').annotate(total_amount=Sum('amount')).order_by('date')
-    expenses = Transaction.objects.filter(category__type='E', **filter_kwargs) \
-        .values('date').annotate(total_amount=Sum('amount')).order_by('date')
-    transfers = Transaction.objects.filter(category__type='T', **filter_kwargs) \
-        .values('date').annotate(total_amount=Sum('amount')).order_by('date')
-
-    # Форматирование данных
-    incomes_data = [{'date': income['date'].strftime('%Y-%m-%d'), 'amount': float(income['total_amount'])} for income in
-                    incomes]
-    expenses_data = [{'date': expense['date'].strftime('%Y-%m-%d'), 'amount': float(expense['total_amount'])} for
-                     expense in expenses]
-    transfers_data = [{'date': transfer['date'].strftime('%Y-%m-%d'), 'amount': float(transfer['total_amount'])} for
-                      transfer in transfers]
-
-    incomes_json = json.dumps(incomes_data, ensure_ascii=False, cls=DecimalEncoder)
-    expenses_json = json.dumps(expenses_data, ensure_ascii=False, cls=DecimalEncoder)
-    transfers_json = json.dumps(transfers_data, ensure_ascii=False, cls=DecimalEncoder)
-
-    incomes = Transaction.objects.filter(category__type='I', **filter_kwargs).order_by('-date')
-    expenses = Transaction.objects.filter(category__type='E', **filter_kwargs).order_by('-date')
-    transfers = Transaction.objects.filter(category__type='T', **filter_kwargs).order_by('-date')
-
-    # Собираем только используемые категории
-    if start_date and end_date:
-        used_categories = Category.objects.filter(
-            transaction__user=request.user,
-            transaction__date__range=(start_date, end_date)
-        ).distinct()
-    else:
-        used_categories = Category.objects.filter(
-            transaction__user=request.user
-        ).distinct()
-
-    categories_data = [
-        {
-            'name': category.name,
-            'total': Transaction.objects.filter(category=category, **filter_kwargs).aggregate(total=Sum('amount'))[
-                'total'],
-            'color': category.color,
-        }
-        for category in used_categories
-    ]
+    # Списки транзакций по типам одним запросом
+    transactions_by_type = {category_type: [] for category_type in TYPE_KEYS}
+    transactions = Transaction.objects.filter(**filter_kwargs).select_related('category').order_by('-date')
+    for transaction in transactions:
+        transactions_by_type[transaction.category.type].append(transaction)
 
     return render(request, 'budget/history_finance.html', {
-        'incomes_json': incomes_json,
-        'expenses_json': expenses_json,
-        'transfers_json': transfers_json,
-        'incomes': incomes,
-        'expenses': expenses,
-        'transfers': transfers,
-        'categories_json': json.dumps(categories_data, ensure_ascii=False, cls=DecimalEncoder),
+        'incomes_json': json.dumps(summary['incomes'], ensure_ascii=False, cls=DecimalEncoder),
+        'expenses_json': json.dumps(summary['expenses'], ensure_ascii=False, cls=DecimalEncoder),
+        'transfers_json': json.dumps(summary['transfers'], ensure_ascii=False, cls=DecimalEncoder),
+        'incomes': transactions_by_type['I'],
+        'expenses': transactions_by_type['E'],
+        'transfers': transactions_by_type['T'],
+        'categories_json': json.dumps(summary['categories'], ensure_ascii=False, cls=DecimalEncoder),
     })
 
 
@@ -271,83 +304,19 @@ def prediction(request):
     else:
         form = ForecastForm()
 
-    filter_kwargs = {
-        'user': request.user,
-        'permanent': False
-    }
+    start_date, end_date = get_date_range(request)
+    summary = summarize_transactions(request.user, start_date, end_date)
 
-    # Проверка, есть ли данные POST и они содержат даты
-    today = datetime.datetime.today()
-    start_date = today.replace(day=1)
-    end_date = today.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-    if request.method == 'POST' and 'start-date' in request.POST and 'end-date' in request.POST:
-        start_date = request.POST['start-date']
-        end_date = request.POST['end-date']
+    # numpy и модели прогноза загружаются при первом обращении, а не при старте воркера
+    from .forecasting import get_forecast
 
-    if start_date:
-        filter_kwargs['date__gte'] = start_date
-    if end_date:
-        filter_kwargs['date__lte'] = end_date
-
-    # Получение фильтрованных данных
-    incomes = Transaction.objects.filter(category__type='I', **filter_kwargs) \
-        .values('date').annotate(total_amount=Sum('amount')).order_by('date')
-    expenses = Transaction.objects.filter(category__type='E', **filter_kwargs) \
-        .values('date').annotate(total_amount=Sum('amount')).order_by('date')
-    transfers = Transaction.objects.filter(category__type='T', **filter_kwargs) \
-        .values('date').annotate(total_amount=Sum('amount')).order_by('date')
-
-    # Форматирование данных
-    incomes_data = [{'date': income['date'].strftime('%Y-%m-%d'), 'amount': float(income['total_amount'])} for income in
-                    incomes]
-    expenses_data = [{'date': expense['date'].strftime('%Y-%m-%d'), 'amount': float(expense['total_amount'])} for
-                     expense in expenses]
-    transfers_data = [{'date': transfer['date'].strftime('%Y-%m-%d'), 'amount': float(transfer['total_amount'])} for
-                      transfer in transfers]
-
-    incomes_json = json.dumps(incomes_data, ensure_ascii=False, cls=DecimalEncoder)
-    expenses_json = json.dumps(expenses_data, ensure_ascii=False, cls=DecimalEncoder)
-    transfers_json = json.dumps(transfers_data, ensure_ascii=False, cls=DecimalEncoder)
-
-    incomes = Transaction.objects.filter(category__type='I', **filter_kwargs).order_by('-date')
-    expenses = Transaction.objects.filter(category__type='E', **filter_kwargs).order_by('-date')
-    transfers = Transaction.objects.filter(category__type='T', **filter_kwargs).order_by('-date')
-
-    # Собираем только используемые категории
-    if start_date and end_date:
-        used_categories = Category.objects.filter(
-            transaction__user=request.user,
-            transaction__date__range=(start_date, end_date)
-        ).distinct()
-    else:
-        used_categories = Category.objects.filter(
-            transaction__user=request.user
-        ).distinct()
-
-    categories_data = [
-        {
-            'name': category.name,
-            'total': Transaction.objects.filter(category=category, **filter_kwargs).aggregate(total=Sum('amount'))[
-                'total'],
-            'color': category.color,
-        }
-        for category in used_categories
-    ]
-
-    if forecast_type == 'days':
-        forecasted_expenses, forecasted_incomes = get_transactions_for_current_month(request.user, quantity)
-    else:
-        forecasted_expenses, forecasted_incomes = get_monthly_income_expense(request.user, quantity)
+    forecasted_expenses, forecasted_incomes = get_forecast(request.user, forecast_type, quantity)
 
     return render(request, 'budget/prediction.html', {
-        'incomes_json': incomes_json,
-        'expenses_json': expenses_json,
-        'transfers_json': transfers_json,
-        'incomes': incomes,
-        'expenses': expenses,
-        'transfers': transfers,
-        'categories_json': json.dumps(categories_data, ensure_ascii=False, cls=DecimalEncoder),
+        'incomes_json': json.dumps(summary['incomes'], ensure_ascii=False, cls=DecimalEncoder),
+        'expenses_json': json.dumps(summary['expenses'], ensure_ascii=False, cls=DecimalEncoder),
+        'transfers_json': json.dumps(summary['transfers'], ensure_ascii=False, cls=DecimalEncoder),
+        'categories_json': json.dumps(summary['categories'], ensure_ascii=False, cls=DecimalEncoder),
         'forecasted_expenses': json.dumps(forecasted_expenses, ensure_ascii=False, cls=DecimalEncoder),
         'forecasted_incomes': json.dumps(forecasted_incomes, ensure_ascii=False, cls=DecimalEncoder),
         'form': form,
@@ -358,23 +327,27 @@ def prediction(request):
 
 @login_required(login_url='entry')
 def planning(request):
+    """
+    Будущие транзакции и повторения регулярных на RECURRENCE_HORIZON_DAYS дней вперёд.
+    Повторения разворачиваются в памяти, наступившие перед этим создаются записями
+    """
     today = now().date()
+    materialize_due(request.user, today)
 
-    incomes = Transaction.objects.filter(
-        category__type='I',
+    transactions = list(Transaction.objects.filter(
         user=request.user,
         date__gt=today
-    ).order_by('-date')
-
-    expenses = Transaction.objects.filter(
-        category__type='E',
-        user=request.user,
-        date__gt=today
-    ).order_by('-date')
+    ).select_related('category'))
+    transactions += expand(
+        recurring(request.user).select_related('category'),
+        today + datetime.timedelta(days=1),
+        today + datetime.timedelta(days=RECURRENCE_HORIZON_DAYS),
+    )
+    transactions.sort(key=lambda transaction: transaction.date, reverse=True)
 
     return render(request, 'budget/planning.html', {
-        'incomes': incomes,
-        'expenses': expenses,
+        'incomes': [transaction for transaction in transactions if transaction.category.type == 'I'],
+        'expenses': [transaction for transaction in transactions if transaction.category.type == 'E'],
     })
 
 
@@ -454,29 +427,171 @@ class TransactionUpdateView(LoginRequiredMixin, UpdateView):
         return kwargs
 
 
-class TransactionListView(LoginRequiredMixin, ListView):
+def transaction_feed_queryset(user, permanent=False):
+    """
+    Транзакции ленты: постоянные или совершённые не позже сегодняшнего дня
+    """
+    transactions = Transaction.objects.filter(user=user, permanent=permanent) \
+        .select_related('category') \
+        .prefetch_related('tags')
+    if not permanent:
+        transactions = transactions.filter(date__lte=now().date())
+    return transactions
+
+
+class TransactionFeedMixin:
+    """
+    Первая страница ленты рендерится на сервере, следующие подгружаются
+    при прокрутке из transaction_feed по курсору next_cursor
+    """
     model = Transaction
     context_object_name = 'transactions'
     template_name = 'budget/transaction_list.html'
+    permanent = False
 
     def get_queryset(self):
-        today = datetime.datetime.today()
-        end_of_today = today.replace(hour=23, minute=59, second=59, microsecond=999999)
+        self.page = keyset_page(transaction_feed_queryset(self.request.user, self.permanent),
+                                size=page_size(self.request.GET.get('limit')))
+        return self.page.items
 
-        return Transaction.objects.filter(
-            user=self.request.user,
-            permanent=False,
-            date__lte=end_of_today
-        ).order_by('-date')
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.page.next_cursor
+        context['permanent'] = self.permanent
+        return context
 
 
-class PermanentTransactionListView(LoginRequiredMixin, ListView):
-    model = Transaction
-    context_object_name = 'transactions'
-    template_name = 'budget/transaction_list.html'
+class TransactionListView(LoginRequiredMixin, TransactionFeedMixin, ListView):
+    pass
 
-    def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user, permanent=True).order_by('-date')
+
+class PermanentTransactionListView(LoginRequiredMixin, TransactionFeedMixin, ListView):
+    permanent = True
+
+
+@login_required(login_url='entry')
+def transaction_feed(request):
+    """
+    Следующая страница ленты транзакций в JSON, сгруппированная по датам
+    """
+    permanent = request.GET.get('permanent') == '1'
+    try:
+        page = keyset_page(transaction_feed_queryset(request.user, permanent),
+                           cursor=request.GET.get('cursor'), size=page_size(request.GET.get('limit')))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor")
+
+    groups = []
+    for date, transactions in group_by_date(page.items):
+        groups.append({
+            'date': date.isoformat(),
+            'title': date_format(date),
+            'transactions': [transaction_json(transaction) for transaction in transactions],
+        })
+    return JsonResponse({'groups': groups, 'next_cursor': page.next_cursor})
+
+
+def transaction_json(transaction):
+    """
+    Карточка транзакции для JS (transactionCard в transaction_list.html)
+    """
+    return {
+        'id': transaction.id,
+        'amount': str(transaction.amount),
+        'description': transaction.description,
+        'date': date_format(transaction.date),
+        'tags': [tag.name for tag in transaction.tags.all()],
+        'category': {
+            'name': transaction.category.name,
+            'type': transaction.category.type,
+            'color': transaction.category.color,
+            'icon': transaction.category.icon,
+        },
+        'edit_url': reverse('budget:transaction-edit', args=[transaction.id]),
+        'delete_url': reverse('budget:transaction-delete', args=[transaction.id]),
+    }
+
+
+@login_required(login_url='entry')
+def search_transactions(request):
+    """
+    Поиск по описаниям, категориям и тегам (параметр q), по убыванию релевантности.
+    Следующая страница - по курсору next_cursor
+    """
+    try:
+        page = search.search_transactions(request.user, request.GET.get('q', ''),
+                                          cursor=request.GET.get('cursor'), size=page_size(request.GET.get('limit')))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor")
+    return JsonResponse({
+        'transactions': [transaction_json(transaction) for transaction in page.items],
+        'next_cursor': page.next_cursor,
+    })
+
+
+@login_required(login_url='entry')
+def export_transactions(request):
+    """
+    Выгрузка транзакций в CSV (потоком) или XLSX. Без параметра format показывается форма фильтров
+    """
+    if 'format' not in request.GET:
+        return render(request, 'budget/transaction_export.html', {'form': TransactionExportForm(request.user)})
+
+    form = TransactionExportForm(request.user, request.GET)
+    if not form.is_valid():
+        return render(request, 'budget/transaction_export.html', {'form': form})
+
+    transactions = export.export_queryset(
+        request.user,
+        start_date=form.cleaned_data['start_date'],
+        end_date=form.cleaned_data['end_date'],
+        categories=form.cleaned_data['categories'],
+        tags=form.cleaned_data['tags'],
+    )
+    filename = f'transactions-{now().date().isoformat()}'
+
+    if form.cleaned_data['format'] == 'xlsx':
+        try:
+            file = export.xlsx_file(transactions)
+        except ImportError:
+            return HttpResponse("Выгрузка в XLSX недоступна: не установлен openpyxl", status=501)
+        return FileResponse(file, as_attachment=True, filename=f'{filename}.xlsx')
+
+    response = StreamingHttpResponse(export.csv_stream(transactions), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+@login_required(login_url='entry')
+def tag_analytics(request):
+    """
+    Суммы, количество и помесячная динамика транзакций по тегам за период
+    (параметры start-date и end-date, по умолчанию - вся история)
+    """
+    try:
+        start_date = parse_date(request.GET.get('start-date', ''))
+        end_date = parse_date(request.GET.get('end-date', ''))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid date")
+    return JsonResponse({'tags': summarize_tags(request.user, start_date, end_date)})
+
+
+@login_required(login_url='entry')
+def product_analytics(request):
+    """
+    Товары из чеков за период (start-date, end-date) по убыванию суммы, а с
+    параметром name - история цены этого товара
+    """
+    try:
+        start_date = parse_date(request.GET.get('start-date', ''))
+        end_date = parse_date(request.GET.get('end-date', ''))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid date")
+    name = request.GET.get('name')
+    if name:
+        return JsonResponse({'name': name, 'history': price_history(request.user, name, start_date, end_date)})
+    return JsonResponse({'products': top_products(request.user, start_date, end_date,
+                                                  limit=page_size(request.GET.get('limit')))})
 
 
 class TransactionCreateView(LoginRequiredMixin, CreateView):
@@ -486,19 +601,11 @@ class TransactionCreateView(LoginRequiredMixin, CreateView):
     success_url = reverse_lazy('budget:transaction-list')
 
     def form_valid(self, form):
+        # Баланс счёта обновляется проводкой при сохранении транзакции (budget.signals)
         form.instance.user = self.request.user
         response = super().form_valid(form)
-
-        account = form.instance.account
-
-        today = now().date()
-        if form.instance.date <= today:
-            if self.request.GET.get('type', 'income') == 'income':
-                account.balance += form.instance.amount
-            else:
-                account.balance -= form.instance.amount
-            account.save()
-
+        if form.cleaned_data.get('receipt'):
+            receipts.save_receipt_items(self.object, form.cleaned_data['receipt'])
         return response
 
     def get_context_data(self, **kwargs):
@@ -543,63 +650,18 @@ class TransactionCreateView(LoginRequiredMixin, CreateView):
 
 @login_required(login_url='entry')
 def start(request):
-    user_profile = Settings.objects.get(user=request.user)
+    user_profile = Settings.objects.select_related('general_currency').get(user=request.user)
     if request.method == 'POST':
         form = CurrencyForm(request.POST, instance=user_profile)
         if form.is_valid():
             form.save()
-
-            transactions = Transaction.objects.filter(user=request.user)
-            target_currency = Currency.objects.get(name=user_profile.general_currency.name)
-            target_exchange_rate = target_currency.exchange_rate
-
-            converted_transactions = []
-
-            for transaction in transactions:
-                original_currency = transaction.account.currency
-                if original_currency != target_currency:
-                    converted_amount = (transaction.amount / original_currency.exchange_rate) * target_exchange_rate
-                else:
-                    converted_amount = transaction.amount
-
-                converted_transactions.append({
-                    'amount': converted_amount,
-                    'old_amount': transaction.amount,
-                })
-
             return redirect('budget:index')
     else:
         form = CurrencyForm(instance=user_profile)
 
-    acc = Account.objects.get(name='Стандарт')
-    today = now().date() + datetime.timedelta(days=1)
-    future_transactions_i = Transaction.objects.filter(date__gt=today, category__type='I', user=request.user)
-    future_transactions_e = Transaction.objects.filter(date__gt=today, category__type='E', user=request.user)
-    total_future_amount_i = future_transactions_i.aggregate(total=models.Sum('amount'))['total'] or 0
-    total_future_amount_e = future_transactions_e.aggregate(total=models.Sum('amount'))['total'] or 0
-    total = total_future_amount_i - total_future_amount_e
-    if total < 0:
-        free = total + acc.balance
-    else:
-        free = acc.balance
-    savings = Account.objects.filter(user=request.user, account_type_id=2).exclude(name='Стандарт').aggregate(
-        total=models.Sum('balance'))['total'] or 0
-    savings += Account.objects.filter(user=request.user, account_type_id=1).exclude(name='Стандарт').aggregate(
-        total=models.Sum('initial_balance'))['total'] or 0
-    all_savings = Account.objects.filter(user=request.user, account_type_id=2).aggregate(total=models.Sum('balance'))[
-                      'total'] or 0
-
-    acc_amount = acc.balance
-    if user_profile.general_currency.name != 'Рубль':
-        all_savings = all_savings / user_profile.general_currency.exchange_rate
-        total = total / user_profile.general_currency.exchange_rate
-        free = free / user_profile.general_currency.exchange_rate
-        savings = savings / user_profile.general_currency.exchange_rate
-        acc_amount = acc.balance / user_profile.general_currency.exchange_rate
-
+    summary = get_dashboard_summary(request.user, user_profile.general_currency)
     return render(request, 'budget/budget_home.html',
-                  {'form': form, 'account': acc, 'all_savings': round(all_savings, 2), 'general_currency': user_profile.general_currency.name,
-                   'planning': round(total, 2), 'free': round(free, 2), 'savings': round(savings, 2), 'acc_amount': round(acc_amount, 2)})
+                  {'form': form, 'general_currency': user_profile.general_currency.name, **summary})
 
 
 def process_audio(request):
@@ -607,13 +669,14 @@ def process_audio(request):
     Создание карточки траты/дохода с помощью голоса
     """
 
+    from functions.voice_input import voice_to_json as vtj
+
     file = request.FILES.get('audio')
     if not file:
         return HttpResponseBadRequest("No audio file provided")
 
     res = vtj.wav_to_json(file, request.user)
     res = res.lower()
-    print(res)
     if 'перейди' in res:
         if 'доход' in res:
             redirect_url = reverse('budget:transaction-create') + '?type=income'
@@ -638,7 +701,12 @@ def process_audio(request):
 
     amount, category_name, description, type_trans, date_trans = vtj.wav_to_json(file, request.user, True)
 
-    category_instance = Category.objects.filter(name=category_name.capitalize(), user=request.user).first()
+    # Категория подбирается локальным классификатором по описанию, названная категория - если такой нет
+    category_type = type_trans.upper() if type_trans and type_trans.upper() in ('I', 'E') else None
+    category_id = suggest_category(request.user, description, category_type)
+    category_instance = Category.objects.filter(pk=category_id).first() if category_id else None
+    if category_instance is None and category_name:
+        category_instance = Category.objects.filter(name=category_name.capitalize(), user=request.user).first()
 
     # Преобразование даты в объект datetime.date
     if isinstance(date_trans, str):
@@ -672,102 +740,40 @@ def process_audio(request):
 
         return view.form_valid(form)
     else:
-        redirect_url = reverse('budget:transaction-create') + ('?type=incomee' if category_instance.type == 'I' else '?type=expensee')
+        # Категория не найдена - тип формы берётся из ответа модели
+        is_income = category_instance.type == 'I' if category_instance else category_type == 'I'
+        redirect_url = reverse('budget:transaction-create') + ('?type=incomee' if is_income else '?type=expensee')
         return JsonResponse({'redirect_url': redirect_url})
 
 
+@login_required(login_url='entry')
 def checks(request):
+    """
+    Форма транзакции, заполненная по строке QR-кода чека. Чек запрашивается
+    у сервиса проверки один раз, повторное сканирование берёт его из базы
+    """
     if request.method == 'POST':
-        body_unicode = request.body.decode('utf-8')
-        body_data = json.loads(body_unicode)
-        result = body_data.get('result')
-        token_acc = "26817.m8ytY4omnqvUob2Sq"
-        url = "https://proverkacheka.com/api/v1/check/get"
-        data = {"token": token_acc, "qrraw": result}
-        r = requests.post(url, data=data)
-
-        if r.status_code != 200 or 'json' not in r.json().get('data', {}):
+        body_data = json.loads(request.body.decode('utf-8'))
+        try:
+            receipt = receipts.get_receipt(body_data.get('result'), user=request.user)
+        except receipts.ReceiptError:
             return JsonResponse({'error': 'Failed to retrieve data from API'}, status=400)
 
-        products = r.json()['data']['json']['items']
-        total_sum = sum(product['sum'] / 100 for product in products)
-        description = ', '.join(product['name'] for product in products)
-
-        date_str = r.json()['data']['json']['dateTime']
-        date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%dT%H:%M:%S')
-        formatted_date = date_obj.strftime('%Y-%m-%d')
+        description = receipts.receipt_description(receipt.data)
+        category_id = suggest_category(request.user, description, 'E')
+        category = Category.objects.filter(pk=category_id).first() if category_id else \
+            Category.objects.filter(user=request.user, name='Магазин').first()
 
         # Создаем экземпляр формы и заполняем ее данными
         form = TransactionForm(initial={
-            'category': Category.objects.get(name='Магазин'),
-            'account': Account.objects.get(name='Стандарт'),
-            'date': formatted_date,
-            'amount': total_sum,
+            'category': category,
+            'account': Account.objects.filter(user=request.user, name=STANDARD_ACCOUNT_NAME).first(),
+            'date': receipts.receipt_date(receipt.data).strftime('%Y-%m-%d'),
+            'amount': receipts.receipt_total(receipt.data),
             'description': description,
-        })
+            'receipt': receipt.pk,
+        }, user=request.user, type='expense')
 
         return render(request, 'budget/transaction_form.html', {'form': form})
 
     return JsonResponse({'error': 'Invalid request method'}, status=405)
-
-
-def get_transactions_for_current_month(user, quantity):
-    today = datetime.datetime.today()
-    start_of_month = today.replace(day=1) - datetime.timedelta(days=360)
-    end_of_month = today.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-    transactions = Transaction.objects.filter(date__range=(start_of_month, end_of_month), user=user)
-
-    daily_expenses = []
-    daily_incomes = []
-
-    current_date = start_of_month
-    while current_date <= end_of_month:
-        day_transactions = transactions.filter(date=current_date, user=user)
-        total_expenses = day_transactions.filter(category__type='E').aggregate(total=Sum('amount'))['total'] or 0
-        total_incomes = day_transactions.filter(category__type='I').aggregate(total=Sum('amount'))['total'] or 0
-
-        daily_expenses.append(float(total_expenses))
-        daily_incomes.append(float(total_incomes))
-
-        current_date += datetime.timedelta(days=1)
-
-    periods_to_forecast = quantity
-    expenses_model = ExponentialSmoothing(daily_expenses, trend='add', seasonal='add', seasonal_periods=50).fit()
-    incomes_model = ExponentialSmoothing(daily_incomes, trend='add', seasonal='add', seasonal_periods=50).fit()
-
-    forecasted_expenses = expenses_model.forecast(periods_to_forecast)
-    forecasted_incomes = incomes_model.forecast(periods_to_forecast)
-
-    list_exp = [round(float(e), 2) for e in forecasted_expenses]
-    list_inc = [round(float(i), 2) for i in forecasted_incomes]
-
-    return list_exp, list_inc
-
-
-def get_monthly_income_expense(user, quantity):
-    transactions = Transaction.objects.filter(user=user)
-
-    income_per_month = {month: 0 for month in range(1, 13)}
-    expense_per_month = {month: 0 for month in range(1, 13)}
-
-    for transaction in transactions:
-        month = transaction.date.month
-        if transaction.category.type == 'I':
-            income_per_month[month] += transaction.amount
-        elif transaction.category.type == 'E':
-            expense_per_month[month] += abs(transaction.amount)
-
-    income = [float(income_per_month[month]) for month in range(1, 13) if float(income_per_month[month]) != 0.0]
-    expense = [float(expense_per_month[month]) for month in range(1, 13) if float(expense_per_month[month]) != 0.0]
-
-    income_series = pd.Series(income)
-    expense_series = pd.Series(expense)
-
-    income_model = ExponentialSmoothing(income_series, trend='add', seasonal='add', seasonal_periods=4).fit()
-    expense_model = ExponentialSmoothing(expense_series, trend='add', seasonal='add', seasonal_periods=4).fit()
-
-    income_forecast = income_model.forecast(quantity).tolist()
-    expense_forecast = expense_model.forecast(quantity).tolist()
-
-    return income_forecast, expense_forecast
@@ -7,6 +7,7 @@ import json
 import tempfile
 from pathlib import Path
 import speech_recognition as sr
+from budget.classifier import get_classifier
 from budget.models import Category
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,13 +35,16 @@ def recognize_phrase(phrase_wav_path: str) -> str:
 
 def chat_gpt(text, user):
     """
-    Запрос в Chat GPT для получение JSON из текста
+    Запрос в Chat GPT для получение JSON из текста. Категорию по описанию
+    подбирает локальный классификатор (budget.classifier), а пока у пользователя
+    нет истории - модель выбирает её из списка категорий пользователя
     """
 
     current_year = datetime.now().year
-    user_categories = Category.get_user_categories(user)
+    categories_hint = '' if get_classifier(user).trained else \
+        f" Категория должна быть похожа, как в списке {Category.get_user_categories(user)}."
 
-    content = f"{text}. Пиши названия ключей на русском языке. Выбери из этого текста сумма, категория, описание (в описании выдели остальную информацию), тип транзакции (расход или доход) и дату и помести это в JSON. Сумма должна быть цифрой, а категория строкой. Категория должна быть похожа, как в списке {user_categories}. Описание должно быть текстом. Тип транзакции 'I' если доход 'E' если расход. Дата в формате dd.mm.yyyy, если не назван год, то ставь текущий. Запятые в json не добавляй."
+    content = f"{text}. Пиши названия ключей на русском языке. Выбери из этого текста сумма, категория, описание (в описании выдели остальную информацию), тип транзакции (расход или доход) и дату и помести это в JSON. Сумма должна быть цифрой, а категория строкой.{categories_hint} Описание должно быть текстом. Тип транзакции 'I' если доход 'E' если расход. Дата в формате dd.mm.yyyy, если не назван год, то ставь текущий. Запятые в json не добавляй."
 
     try:
         response = g4f.ChatCompletion.create(
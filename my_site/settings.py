@@ -86,6 +86,16 @@ DATABASES = {
     }
 }
 
+# Кэш общий для всех процессов сервера и management-команд: сброс сводки главной
+# страницы бюджета из команды или другого воркера виден везде. Таблицу кэша
+# создаёт python manage.py createcachetable (выполнить после migrate при развёртывании)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 